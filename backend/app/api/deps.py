@@ -1,24 +1,22 @@
 
-from fastapi import Depends
+from typing import Optional
+from fastapi import Depends, Header
 from fastapi.security import HTTPAuthorizationCredentials
-from app.core.security import security
-from app.core.config import settings
-from supabase import create_client, Client
+from app.core.security import security, get_current_user
+from app.db.supabase import create_async_user_client
+from postgrest import AsyncPostgrestClient as AsyncClient
 
-def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
-    # We trust security.get_current_user to have validated the token (or we can validate here)
-    # For now, just extracting the token to pass to supabase
-    return "user_id_placeholder" # Actual validation happens in security.py
+def get_current_user_id(user: dict = Depends(get_current_user)) -> str:
+    # Token is verified locally (and cached), so no profiles lookup is needed
+    return user["id"]
 
-def get_supabase_client(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Client:
-    token = credentials.credentials
-    # print(f"DEBUG TOKEN: {token[:10]}..." if token else "DEBUG TOKEN: None")
-    client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-    if token and token != "undefined":
-        try:
-            client.postgrest.auth(token)
-        except Exception as e:
-            print(f"Error setting auth token: {e}")
-    else:
-        print("Warning: valid token not found in request")
-    return client
+def get_supabase_client(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user: dict = Depends(get_current_user),
+) -> AsyncClient:
+    # Reuses the process-wide connection pool; only the auth header is per request
+    return create_async_user_client(credentials.credentials)
+
+def get_client_id(x_client_id: Optional[str] = Header(None, max_length=64)) -> Optional[str]:
+    # Per-install id the app sends with writes, echoed back on change events
+    return x_client_id
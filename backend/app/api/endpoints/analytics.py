@@ -1,8 +1,17 @@
 
+import logging
+import asyncio
+from typing import Literal
 from fastapi import APIRouter, Depends, HTTPException
-from supabase import Client
-from app.api.deps import get_supabase_client
-from datetime import datetime, timedelta
+from postgrest import AsyncPostgrestClient as AsyncClient
+from app.api.deps import get_supabase_client, get_current_user_id
+from app.api.endpoints.profile import TARGET_COLUMNS
+from app.core.cache import response_cache, ANALYTICS
+from app.core.responses import FastJSONResponse, to_columns
+from app.services.trends import build_range_stats, RESOLUTIONS, ROLLING_WINDOWS
+from datetime import date, datetime, timedelta
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -14,139 +23,185 @@ DEFAULT_TARGETS = {
     "water_target_ml": 2500
 }
 
-@router.get("/daily")
-def get_daily_summary(date: str, client: Client = Depends(get_supabase_client)):
+DEFAULT_STREAK = {"current_streak": 0, "best_streak": 0}
+STREAK_COLUMNS = "current_streak, best_streak, last_completed_date"
+
+# `rows`: one object per day/bucket; `columnar`: one array per field
+Layout = Literal["rows", "columnar"]
+
+MAX_RANGE_DAYS = 5 * 366
+PAGE_SIZE = 1000
+
+async def fetch_targets(client: AsyncClient) -> dict:
+    """Get targets - handle None response gracefully"""
     try:
-        # Calculate totals for the day
-        food_res = client.table("food_logs").select("*").eq("date", date).execute()
-        water_res = client.table("water_logs").select("*").eq("date", date).execute()
-        
-        food_data = food_res.data if food_res and food_res.data else []
-        water_data = water_res.data if water_res and water_res.data else []
-        
-        total_cals = sum(float(item['calories']) for item in food_data)
-        total_protein = sum(float(item['protein_g']) for item in food_data)
-        total_carbs = sum(float(item['carbs_g']) for item in food_data)
-        total_fats = sum(float(item['fats_g']) for item in food_data)
-        total_water = sum(int(item['amount_ml']) for item in water_data)
-        
-        # Get targets - handle None response gracefully
-        try:
-            targets_res = client.table("daily_targets").select("*").limit(1).execute()
-            targets = targets_res.data[0] if targets_res and targets_res.data and len(targets_res.data) > 0 else DEFAULT_TARGETS
-        except Exception as e:
-            print(f"Error fetching targets: {e}")
-            targets = DEFAULT_TARGETS
-        
-        return {
-            "summary": {
-                "calories": total_cals,
-                "protein": total_protein,
-                "carbs": total_carbs,
-                "fats": total_fats,
-                "water": total_water
-            },
-            "targets": targets
+        targets_res = await client.table("daily_targets").select(TARGET_COLUMNS).limit(1).execute()
+        return targets_res.data[0] if targets_res and targets_res.data and len(targets_res.data) > 0 else DEFAULT_TARGETS
+    except Exception as e:
+        logger.error("Error fetching targets: %s", e)
+        return DEFAULT_TARGETS
+
+def empty_summary() -> dict:
+    return {"calories": 0, "protein": 0, "carbs": 0, "fats": 0, "water": 0}
+
+async def fetch_daily_totals(client: AsyncClient, start_date: str, end_date: str) -> dict:
+    """Per-day totals from the daily_summaries rollup; only days with logs are returned"""
+    res = await client.table("daily_summaries")\
+        .select("date, calories, protein_g, carbs_g, fats_g, water_ml")\
+        .gte("date", start_date)\
+        .lte("date", end_date)\
+        .execute()
+    return {
+        row["date"]: {
+            "calories": float(row["calories"]),
+            "protein": float(row["protein_g"]),
+            "carbs": float(row["carbs_g"]),
+            "fats": float(row["fats_g"]),
+            "water": int(row["water_ml"])
         }
+        for row in res.data or []
+    }
+
+def live_streak(streak: dict) -> dict:
+    """The stored streak only changes on writes; it has lapsed once a full day passes unlogged"""
+    last = streak.get("last_completed_date")
+    if last and date.fromisoformat(last) < datetime.now().date() - timedelta(days=1):
+        return {**streak, "current_streak": 0}
+    return streak
+
+async def fetch_streak(client: AsyncClient) -> dict:
+    try:
+        streak_res = await client.table("streaks").select(STREAK_COLUMNS).limit(1).execute()
+        return live_streak(streak_res.data[0]) if streak_res and streak_res.data and len(streak_res.data) > 0 else DEFAULT_STREAK
+    except Exception as e:
+        logger.error("Error fetching streak: %s", e)
+        return DEFAULT_STREAK
+
+async def build_daily_summary(client: AsyncClient, date: str) -> dict:
+    # Independent queries run concurrently
+    totals, targets = await asyncio.gather(
+        fetch_daily_totals(client, date, date),
+        fetch_targets(client),
+    )
+    
+    return {
+        "summary": totals.get(date, empty_summary()),
+        "targets": targets
+    }
+
+@router.get("/daily")
+async def get_daily_summary(date: str, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
+    try:
+        return FastJSONResponse(await response_cache.get_or_load(user_id, ANALYTICS, f"daily:{date}", lambda: build_daily_summary(client, date)))
     except Exception as e:
-        print(f"Error in get_daily_summary: {e}")
+        logger.error("Error in get_daily_summary: %s", e)
         # Return default values on error
         return {
-            "summary": {
-                "calories": 0,
-                "protein": 0,
-                "carbs": 0,
-                "fats": 0,
-                "water": 0
-            },
+            "summary": empty_summary(),
             "targets": DEFAULT_TARGETS
         }
 
-@router.get("/weekly")
-def get_weekly_summary(days: int = 7, client: Client = Depends(get_supabase_client)):
-    """Get daily summaries for the past N days"""
-    try:
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=days - 1)
-        
-        # Fetch all food logs in date range
-        food_res = client.table("food_logs").select("*").gte("date", str(start_date)).lte("date", str(end_date)).execute()
-        water_res = client.table("water_logs").select("*").gte("date", str(start_date)).lte("date", str(end_date)).execute()
-        
-        food_data = food_res.data if food_res and food_res.data else []
-        water_data = water_res.data if water_res and water_res.data else []
-        
-        # Get targets
-        try:
-            targets_res = client.table("daily_targets").select("*").limit(1).execute()
-            targets = targets_res.data[0] if targets_res and targets_res.data and len(targets_res.data) > 0 else DEFAULT_TARGETS
-        except Exception as e:
-            print(f"Error fetching targets: {e}")
-            targets = DEFAULT_TARGETS
-        
-        # Get streak
-        try:
-            streak_res = client.table("streaks").select("*").limit(1).execute()
-            streak = streak_res.data[0] if streak_res and streak_res.data and len(streak_res.data) > 0 else {"current_streak": 0, "best_streak": 0}
-        except Exception as e:
-            print(f"Error fetching streak: {e}")
-            streak = {"current_streak": 0, "best_streak": 0}
-        
+async def build_weekly_summary(client: AsyncClient, days: int) -> dict:
+    end_date = datetime.now().date()
+    start_date = end_date - timedelta(days=days - 1)
+    
+    async def fetch_weight():
         # Get weight logs for trend
         try:
-            weight_res = client.table("weight_logs").select("*").gte("date", str(start_date - timedelta(days=30))).order("date", desc=True).limit(10).execute()
-            weight_data = weight_res.data if weight_res and weight_res.data else []
+            weight_res = await client.table("weight_logs").select("date, weight_kg").gte("date", str(start_date - timedelta(days=30))).order("date", desc=True).limit(10).execute()
+            return weight_res.data if weight_res and weight_res.data else []
         except Exception as e:
-            print(f"Error fetching weight: {e}")
-            weight_data = []
-        
-        # Group by date
-        daily_data = {}
-        for i in range(days):
-            d = str(start_date + timedelta(days=i))
-            daily_data[d] = {
-                "date": d, 
-                "summary": {
-                    "calories": 0, 
-                    "protein": 0, 
-                    "carbs": 0, 
-                    "fats": 0, 
-                    "water": 0
-                },
-                "targets": targets
-            }
-        
-        for item in food_data:
-            d = item.get("date")
-            if d in daily_data:
-                daily_data[d]["summary"]["calories"] += float(item.get("calories", 0))
-                daily_data[d]["summary"]["protein"] += float(item.get("protein_g", 0))
-                daily_data[d]["summary"]["carbs"] += float(item.get("carbs_g", 0))
-                daily_data[d]["summary"]["fats"] += float(item.get("fats_g", 0))
-        
-        for item in water_data:
-            d = item.get("date")
-            if d in daily_data:
-                daily_data[d]["summary"]["water"] += int(item.get("amount_ml", 0))
-        
-        # Calculate weight trend
-        weight_trend = 0
-        if len(weight_data) >= 2:
-            weight_trend = float(weight_data[0].get("weight_kg", 0)) - float(weight_data[-1].get("weight_kg", 0))
-        
-        return {
-            "data": list(daily_data.values()),
-            "targets": targets,
-            "streak": streak,
-            "weight_trend": round(weight_trend, 1),
-            "weight_logs": weight_data
-        }
+            logger.error("Error fetching weight: %s", e)
+            return []
+    
+    # Independent queries run concurrently
+    totals, targets, streak, weight_data = await asyncio.gather(
+        fetch_daily_totals(client, str(start_date), str(end_date)),
+        fetch_targets(client),
+        fetch_streak(client),
+        fetch_weight(),
+    )
+    
+    # One row per day in range; days without logs are filled with zeros.
+    # Targets are the same for every day, so they're sent once at the top level
+    daily_data = []
+    for i in range(days):
+        d = str(start_date + timedelta(days=i))
+        daily_data.append({
+            "date": d,
+            "summary": totals.get(d, empty_summary()),
+        })
+    
+    # Calculate weight trend
+    weight_trend = 0
+    if len(weight_data) >= 2:
+        weight_trend = float(weight_data[0].get("weight_kg", 0)) - float(weight_data[-1].get("weight_kg", 0))
+    
+    return {
+        "data": daily_data,
+        "targets": targets,
+        "streak": streak,
+        "weight_trend": round(weight_trend, 1),
+        "weight_logs": weight_data
+    }
+
+@router.get("/weekly")
+async def get_weekly_summary(days: int = 7, format: Layout = "rows", client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
+    """Get daily summaries for the past N days"""
+    try:
+        # The window is relative to today, so today's date is part of the key
+        params = f"weekly:{days}:{datetime.now().date()}"
+        summary = await response_cache.get_or_load(user_id, ANALYTICS, params, lambda: build_weekly_summary(client, days))
+        if format == "columnar":
+            summary = {**summary, "data": to_columns(summary["data"])}
+        return FastJSONResponse(summary)
     except Exception as e:
-        print(f"Error in get_weekly_summary: {e}")
+        logger.error("Error in get_weekly_summary: %s", e)
         return {
             "data": [],
             "targets": DEFAULT_TARGETS,
-            "streak": {"current_streak": 0, "best_streak": 0},
+            "streak": DEFAULT_STREAK,
             "weight_trend": 0,
             "weight_logs": []
         }
+
+async def fetch_summary_rows(client: AsyncClient, start_date: str, end_date: str) -> list:
+    """Raw daily_summaries rows in range, paged past PostgREST's row limit"""
+    rows = []
+    while True:
+        res = await client.table("daily_summaries")\
+            .select("date, calories, protein_g, carbs_g, fats_g, water_ml, entries, weight_kg")\
+            .gte("date", start_date)\
+            .lte("date", end_date)\
+            .order("date")\
+            .range(len(rows), len(rows) + PAGE_SIZE - 1)\
+            .execute()
+        page = res.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+
+async def build_range_summary(client: AsyncClient, start: date, end: date, resolution: str) -> dict:
+    # Reach back far enough for the first day's rolling averages
+    lookback = start - timedelta(days=max(ROLLING_WINDOWS) - 1)
+    rows, targets = await asyncio.gather(
+        fetch_summary_rows(client, str(lookback), str(end)),
+        fetch_targets(client),
+    )
+    return build_range_stats(rows, targets, start, end, resolution)
+
+@router.get("/range")
+async def get_range_summary(start: date, end: date, resolution: str = "day", format: Layout = "rows", client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
+    """Bucketed totals, rolling averages, adherence and weight trend between two dates"""
+    if resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of: {', '.join(RESOLUTIONS)}")
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days")
+
+    params = f"range:{start}:{end}:{resolution}"
+    summary = await response_cache.get_or_load(user_id, ANALYTICS, params, lambda: build_range_summary(client, start, end, resolution))
+    if format == "columnar":
+        summary = {**summary, "buckets": to_columns(summary["buckets"])}
+    return FastJSONResponse(summary)
@@ -0,0 +1,91 @@
+
+import logging
+import asyncio
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from postgrest import AsyncPostgrestClient as AsyncClient
+from app.api.deps import get_supabase_client, get_current_user_id
+from app.core.cache import response_cache, PROFILE, TARGETS, FAVORITES, RECENT, ANALYTICS
+from app.core.responses import FastJSONResponse
+from app.api.endpoints.profile import load_profile, load_targets, DEFAULT_TARGETS
+from app.api.endpoints.food import load_favorites, load_recent_foods
+from app.api.endpoints.analytics import fetch_daily_totals, fetch_streak, empty_summary, DEFAULT_STREAK
+from app.services.logs import FOOD_LOG_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+SECTIONS = ("profile", "targets", "summary", "logs", "favorites", "recent", "streak", "weights")
+
+# What a section falls back to when its query fails
+FALLBACKS = {
+    "profile": {},
+    "targets": DEFAULT_TARGETS,
+    "summary": empty_summary(),
+    "logs": [],
+    "favorites": [],
+    "recent": [],
+    "streak": DEFAULT_STREAK,
+    "weights": [],
+}
+
+RECENT_LIMIT = 20
+WEIGHT_HISTORY = 7
+
+async def load_logs(client: AsyncClient, date: str) -> list:
+    res = await client.table("food_logs").select(FOOD_LOG_COLUMNS).eq("date", date).execute()
+    return res.data or []
+
+async def load_weights(client: AsyncClient) -> list:
+    res = await client.table("weight_logs")\
+        .select("date, weight_kg")\
+        .order("date", desc=True)\
+        .limit(WEIGHT_HISTORY)\
+        .execute()
+    return res.data or []
+
+async def load_summary(client: AsyncClient, date: str) -> dict:
+    totals = await fetch_daily_totals(client, date, date)
+    return totals.get(date, empty_summary())
+
+@router.get("/")
+async def bootstrap(date: Optional[str] = None, sections: Optional[str] = None, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
+    """Everything the app needs at launch (or for one tab) in one round trip.
+
+    `sections` is a comma-separated subset of SECTIONS; all by default.
+    A failing section is returned as its fallback and reported in `errors`.
+    """
+    date = date or str(datetime.now().date())
+    wanted = SECTIONS if not sections else tuple(s.strip() for s in sections.split(",") if s.strip())
+    unknown = [s for s in wanted if s not in SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {', '.join(unknown)}")
+
+    # Profile, targets, favorites and recent share the individual endpoints' cache
+    # entries, so either warms the other. The summary has its own entry: it is
+    # only the day's totals, not /api/analytics/daily's `daily:` response
+    loaders = {
+        "profile": lambda: response_cache.get_or_load(user_id, PROFILE, "", lambda: load_profile(client)),
+        "targets": lambda: response_cache.get_or_load(user_id, TARGETS, "", lambda: load_targets(client)),
+        "summary": lambda: response_cache.get_or_load(user_id, ANALYTICS, f"summary:{date}", lambda: load_summary(client, date)),
+        "logs": lambda: load_logs(client, date),
+        "favorites": lambda: response_cache.get_or_load(user_id, FAVORITES, "", lambda: load_favorites(client)),
+        "recent": lambda: response_cache.get_or_load(user_id, RECENT, str(RECENT_LIMIT), lambda: load_recent_foods(client, RECENT_LIMIT)),
+        "streak": lambda: fetch_streak(client),
+        "weights": lambda: load_weights(client),
+    }
+    results = await asyncio.gather(*(loaders[s]() for s in wanted), return_exceptions=True)
+
+    payload = {"date": date}
+    errors = {}
+    for section, result in zip(wanted, results):
+        if isinstance(result, Exception):
+            logger.error("Bootstrap %s error: %s", section, result)
+            errors[section] = str(result)
+            result = FALLBACKS[section]
+        payload[section] = result
+    if errors:
+        payload["errors"] = errors
+    return FastJSONResponse(payload)
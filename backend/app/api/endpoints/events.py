@@ -0,0 +1,74 @@
+
+import asyncio
+import time
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from postgrest import AsyncPostgrestClient as AsyncClient
+from app.api.deps import get_current_user_id
+from app.api.endpoints.analytics import fetch_daily_totals, fetch_streak, empty_summary
+from app.core.config import settings
+from app.services.events import broker, encode_event, SummaryPublisher
+
+router = APIRouter()
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Don't let a reverse proxy buffer the stream
+    "X-Accel-Buffering": "no",
+}
+
+async def load_day_summary(client: AsyncClient, day: str) -> dict:
+    """What a `summary` event carries: the day's totals (absolute, not increments) and the streak"""
+    totals, streak = await asyncio.gather(
+        fetch_daily_totals(client, day, day),
+        fetch_streak(client),
+    )
+    return {"date": day, "summary": totals.get(day, empty_summary()), "streak": streak}
+
+summaries = SummaryPublisher(load_day_summary)
+
+def publish_change(client: AsyncClient, user_id: str, event: str, data: dict, origin: Optional[str] = None, day: Optional[str] = None):
+    """Tell the user's open streams about a committed write.
+
+    The row event goes out right away (tagged with the writing device's
+    X-Client-ID, so it can ignore its own echo); if `day` is given, the
+    day's new totals follow once they've been read back.
+    """
+    if not broker.has_subscribers(user_id):
+        return
+    broker.publish(user_id, event, {**data, "origin": origin})
+    if day:
+        summaries.schedule(client, user_id, day)
+
+async def event_stream(user_id: str):
+    # Subscribed here, not in the handler, so the finally below always runs
+    sub = broker.subscribe(user_id)
+    if sub is None:
+        return
+    # Streams end now and then so reconnects pick up a fresh token
+    closes_at = time.monotonic() + settings.EVENTS_MAX_STREAM_SECONDS
+    try:
+        yield encode_event("ready", {"heartbeat": settings.EVENTS_HEARTBEAT_SECONDS})
+        while True:
+            remaining = closes_at - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                yield await asyncio.wait_for(sub.queue.get(), min(settings.EVENTS_HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+    finally:
+        broker.unsubscribe(sub)
+
+@router.get("")
+async def stream_events(user_id: str = Depends(get_current_user_id)):
+    """Server-sent events for the user's writes, from any of their devices.
+
+    Events: `summary` (a day's totals and the streak), `food_log`,
+    `water_log` and `weight_log` (the changed row). Nothing is replayed
+    after a reconnect; refetch on `ready` instead.
+    """
+    if broker.subscriber_count(user_id) >= settings.EVENTS_MAX_PER_USER:
+        raise HTTPException(status_code=429, detail="Too many open event streams")
+    return StreamingResponse(event_stream(user_id), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -0,0 +1,28 @@
+
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from postgrest import AsyncPostgrestClient as AsyncClient
+from app.api.deps import get_supabase_client
+from app.services.export import export_rows, gzip_stream
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+@router.get("")
+async def export_history(format: str = "csv", gzip: bool = False, client: AsyncClient = Depends(get_supabase_client)):
+    """Stream the user's full food, water and weight history"""
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+
+    filename = f"akilo-export-{datetime.now().date()}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    body = export_rows(client, format)
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+        body = gzip_stream(body)
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers=headers)
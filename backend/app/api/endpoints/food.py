@@ -1,137 +1,259 @@
 
+import logging
+import asyncio
+from datetime import date
 from fastapi import APIRouter, Depends, Query, HTTPException
-from supabase import Client
-from typing import Optional
-from app.api.deps import get_supabase_client
-from app.models.schemas import FoodCreate, FoodLogCreate
+from postgrest import AsyncPostgrestClient as AsyncClient
+from typing import List, Literal, Optional
+from app.api.deps import get_supabase_client, get_current_user_id, get_client_id
+from app.api.endpoints.events import publish_change
+from app.models.schemas import FoodCreate, FoodLogCreate, MealType
+from app.services.food_index import get_food_index, FOOD_COLUMNS
+from app.services.custom_foods import custom_foods, merge_ranked, encode_library_cursor, decode_library_cursor, CUSTOM_FOOD_COLUMNS
+from app.core.cache import response_cache, FAVORITES, RECENT, ANALYTICS
+from app.core.responses import FastJSONResponse
+from app.services.logs import food_log_row, bulk_insert, FOOD_LOG_COLUMNS, encode_log_cursor, decode_log_cursor, keyset_before
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.get("/search")
-def search_foods(q: str, client: Client = Depends(get_supabase_client)):
-    """Search for foods in master database and user's custom foods"""
+async def search_foods(
+    q: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    client: AsyncClient = Depends(get_supabase_client),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Search master and the user's custom foods as one ranked list.
+
+    `results` holds the page in rank order; `master` and `custom` split
+    the same page by source, for older clients.
+    """
     try:
-        # Search master foods
-        master = client.table("foods_master").select("*").ilike("name", f"%{q}%").limit(20).execute()
-        
-        # Search custom foods (RLS filters to user's own)
-        custom = client.table("foods_custom").select("*").ilike("name", f"%{q}%").limit(20).execute()
-        
-        return {"master": master.data or [], "custom": custom.data or []}
+        # Master foods come from the in-memory index; fall back to the DB until it's loaded
+        index = get_food_index()
+        if index is not None:
+            library = await custom_foods.get(client, user_id)
+            depth = offset + limit
+            results = merge_ranked(index.search_scored(q, depth), library.index.search_scored(q, depth), offset, limit)
+        else:
+            master_query = client.table("foods_master").select(FOOD_COLUMNS).ilike("name", f"%{q}%")\
+                .range(offset, offset + limit - 1).execute()
+            master_res, library = await asyncio.gather(master_query, custom_foods.get(client, user_id))
+            # Unranked master rows can't be interleaved; the user's matches lead the first page
+            custom = library.index.search(q, limit=limit) if offset == 0 else []
+            results = custom + [{**food, "is_custom": False} for food in master_res.data or []]
+
+        return FastJSONResponse({
+            "results": results,
+            "master": [food for food in results if not food["is_custom"]],
+            "custom": [food for food in results if food["is_custom"]],
+        })
     except Exception as e:
-        print(f"Search error: {e}")
-        return {"master": [], "custom": []}
+        logger.error("Search error: %s", e)
+        return {"results": [], "master": [], "custom": []}
+
+@router.get("/custom")
+async def list_custom_foods(
+    sort: Literal["name", "recent", "usage"] = "name",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    client: AsyncClient = Depends(get_supabase_client),
+    user_id: str = Depends(get_current_user_id),
+):
+    """The user's custom foods by name, newest first or most logged first.
+
+    Pages hold at most `limit` foods; pass `next_cursor` back as `cursor`
+    (with the same `sort`) for the next page.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_library_cursor(cursor, sort)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    library = await custom_foods.get(client, user_id)
+    foods, last = library.page(sort, after, limit)
+    return FastJSONResponse({
+        "foods": foods,
+        "total": len(library.foods),
+        "next_cursor": encode_library_cursor(sort, last) if last else None,
+    })
 
 @router.post("/custom")
-def create_custom_food(food: FoodCreate, client: Client = Depends(get_supabase_client)):
+async def create_custom_food(food: FoodCreate, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
     """Create a custom food for the user"""
     try:
-        # Get user_id from profile
-        p = client.table("profiles").select("id").single().execute()
-        user_id = p.data['id']
-        
         data = food.dict()
         data['user_id'] = user_id
         
-        res = client.table("foods_custom").insert(data).execute()
+        res = await client.table("foods_custom").insert(data).execute()
+        custom_foods.forget(user_id)
         return res.data[0] if res.data else {}
     except Exception as e:
-        print(f"Create custom food error: {e}")
+        logger.error("Create custom food error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/log")
-def log_food(log: FoodLogCreate, client: Client = Depends(get_supabase_client)):
+async def log_food(log: FoodLogCreate, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id), origin: Optional[str] = Depends(get_client_id)):
     """Log a food entry to the user's diary"""
     try:
-        # Get user_id from profile
-        p = client.table("profiles").select("id").single().execute()
-        user_id = p.data['id']
-        
-        # Prepare data
-        data = log.dict()
-        data['user_id'] = user_id
-        data['date'] = str(data['date'])
-        
-        # Ensure food_source is set
-        if not data.get('food_source'):
-            data['food_source'] = 'master'
+        data = food_log_row(log, user_id)
         
-        # Convert UUID fields to strings if they exist
-        if data.get('food_master_id'):
-            data['food_master_id'] = str(data['food_master_id'])
-        else:
-            data['food_master_id'] = None
-        if data.get('food_custom_id'):
-            data['food_custom_id'] = str(data['food_custom_id'])
-        else:
-            data['food_custom_id'] = None
-            
-        print(f"Logging food: {data}")
+        logger.info("Logging food", extra={"payload": data})
         
-        res = client.table("food_logs").insert(data).execute()
-        return res.data[0] if res.data else {}
+        res = await client.table("food_logs").insert(data).execute()
+        await response_cache.invalidate(user_id, RECENT, ANALYTICS)
+        row = res.data[0] if res.data else {}
+        if row.get("food_custom_id"):
+            custom_foods.record_use(user_id, row["food_custom_id"], row["created_at"])
+        publish_change(client, user_id, "food_log", {"action": "created", "log": row}, origin, day=data["date"])
+        return row
     except Exception as e:
-        print(f"Log food error: {e}")
+        logger.error("Log food error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/log/batch")
+async def log_food_batch(logs: List[FoodLogCreate], client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id), origin: Optional[str] = Depends(get_client_id)):
+    """Log many food entries in one insert; returns one result per entry, in order"""
+    rows = [food_log_row(log, user_id) for log in logs]
+    results = await bulk_insert(client, "food_logs", rows)
+    if any(r["status"] == "ok" for r in results):
+        await response_cache.invalidate(user_id, RECENT, ANALYTICS)
+        for r in results:
+            row = r.get("data") or {}
+            if row.get("food_custom_id") and row.get("created_at"):
+                custom_foods.record_use(user_id, row["food_custom_id"], row["created_at"])
+        for day in sorted({row["date"] for row, r in zip(rows, results) if r["status"] == "ok"}):
+            publish_change(client, user_id, "food_log", {"action": "batch", "date": day}, origin, day=day)
+    return {"results": results}
+
 @router.get("/log")
-def get_food_logs(date: str, client: Client = Depends(get_supabase_client)):
+async def get_food_logs(date: str, client: AsyncClient = Depends(get_supabase_client)):
     """Get all food logs for a specific date"""
     try:
-        res = client.table("food_logs").select("*").eq("date", date).execute()
-        return res.data or []
+        res = await client.table("food_logs").select(FOOD_LOG_COLUMNS).eq("date", date).execute()
+        return FastJSONResponse(res.data or [])
     except Exception as e:
-        print(f"Get food logs error: {e}")
+        logger.error("Get food logs error: %s", e)
         return []
 
+@router.get("/log/range")
+async def get_food_log_range(
+    start: date,
+    end: date,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    client: AsyncClient = Depends(get_supabase_client),
+):
+    """Food logs between two dates, newest first, grouped by day.
+
+    Pages hold at most `limit` logs; pass `next_cursor` back as `cursor`
+    for the next page. A day may continue onto the next page, but its
+    totals always cover the whole day.
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    upper = str(end)
+    keyset = None
+    if cursor:
+        try:
+            keyset = decode_log_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        upper = keyset[0]
+
+    logs_query = client.table("food_logs").select(FOOD_LOG_COLUMNS)\
+        .gte("date", str(start))\
+        .lte("date", upper)
+    if keyset:
+        logs_query = logs_query.or_(keyset_before(*keyset))
+    logs_query = logs_query\
+        .order("date", desc=True)\
+        .order("created_at", desc=True)\
+        .order("id", desc=True)\
+        .limit(limit + 1)
+
+    # A page spans at most `limit` logged days, and they are the latest
+    # logged days at or before the cursor, so their totals load concurrently
+    totals_query = client.table("daily_summaries")\
+        .select("date, calories, protein_g, carbs_g, fats_g, entries")\
+        .gte("date", str(start))\
+        .lte("date", upper)\
+        .gt("entries", 0)\
+        .order("date", desc=True)\
+        .limit(limit)
+
+    logs_res, totals_res = await asyncio.gather(logs_query.execute(), totals_query.execute())
+    rows = logs_res.data or []
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    totals = {row["date"]: row for row in totals_res.data or []}
+
+    days = []
+    for row in rows:
+        if not days or days[-1]["date"] != row["date"]:
+            total = totals.get(row["date"], {})
+            days.append({
+                "date": row["date"],
+                "totals": {
+                    "calories": float(total.get("calories", 0)),
+                    "protein": float(total.get("protein_g", 0)),
+                    "carbs": float(total.get("carbs_g", 0)),
+                    "fats": float(total.get("fats_g", 0)),
+                    "entries": int(total.get("entries", 0)),
+                },
+                "logs": [],
+            })
+        days[-1]["logs"].append(row)
+
+    return FastJSONResponse({
+        "days": days,
+        "next_cursor": encode_log_cursor(rows[-1]) if has_more else None,
+    })
+
 @router.put("/log/{id}")
-def update_food_log(id: str, log: FoodLogCreate, client: Client = Depends(get_supabase_client)):
+async def update_food_log(id: str, log: FoodLogCreate, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id), origin: Optional[str] = Depends(get_client_id)):
     """Update a food log entry"""
     try:
-        # Prepare data
-        data = log.dict()
-        data['date'] = str(data['date'])
+        data = food_log_row(log)
         
-        # Ensure food_source is set
-        if not data.get('food_source'):
-            data['food_source'] = 'master'
+        logger.info("Updating food log %s", id, extra={"payload": data})
         
-        # Convert UUID fields to strings if they exist
-        if data.get('food_master_id'):
-            data['food_master_id'] = str(data['food_master_id'])
-        else:
-            data['food_master_id'] = None
-        if data.get('food_custom_id'):
-            data['food_custom_id'] = str(data['food_custom_id'])
-        else:
-            data['food_custom_id'] = None
-            
-        print(f"Updating food log {id}: {data}")
-        
-        res = client.table("food_logs").update(data).eq("id", id).execute()
-        return res.data[0] if res.data else {}
+        res = await client.table("food_logs").update(data).eq("id", id).execute()
+        await response_cache.invalidate(user_id, RECENT, ANALYTICS)
+        # The log may have moved to or from a custom food; usage is recounted on the next read
+        custom_foods.forget(user_id)
+        row = res.data[0] if res.data else {}
+        if row:
+            publish_change(client, user_id, "food_log", {"action": "updated", "log": row}, origin, day=row["date"])
+        return row
     except Exception as e:
-        print(f"Update food log error: {e}")
+        logger.error("Update food log error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/log/{id}")
-def delete_food_log(id: str, client: Client = Depends(get_supabase_client)):
+async def delete_food_log(id: str, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id), origin: Optional[str] = Depends(get_client_id)):
     """Delete a food log entry"""
     try:
-        res = client.table("food_logs").delete().eq("id", id).execute()
+        res = await client.table("food_logs").delete().eq("id", id).execute()
+        await response_cache.invalidate(user_id, RECENT, ANALYTICS)
+        if any(row.get("food_custom_id") for row in res.data or []):
+            custom_foods.forget(user_id)
+        # The deleted row comes back, so its date is known without a read
+        for row in res.data or []:
+            publish_change(client, user_id, "food_log", {"action": "deleted", "log": {"id": row["id"], "date": row["date"]}}, origin, day=row["date"])
         return {"deleted": True}
     except Exception as e:
-        print(f"Delete food log error: {e}")
+        logger.error("Delete food log error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/favorites/{food_id}")
-def add_favorite(food_id: str, request: dict, client: Client = Depends(get_supabase_client)):
+async def add_favorite(food_id: str, request: dict, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
     """Add a food to user's favorites"""
     try:
-        # Get user_id from profile
-        p = client.table("profiles").select("id").single().execute()
-        user_id = p.data['id']
-        
         # Get is_custom from request body
         is_custom = request.get('is_custom', False)
         
@@ -141,97 +263,106 @@ def add_favorite(food_id: str, request: dict, client: Client = Depends(get_supab
             'food_custom_id': food_id if is_custom else None
         }
         
-        print(f"Adding favorite: food_id={food_id}, is_custom={is_custom}, data={data}")
+        logger.info("Adding favorite %s", food_id, extra={"payload": data})
         
-        res = client.table("favorites").insert(data).execute()
+        res = await client.table("favorites").insert(data).execute()
+        await response_cache.invalidate(user_id, FAVORITES)
         return res.data[0] if res.data else {}
     except Exception as e:
-        print(f"Add favorite error: {e}")
+        logger.error("Add favorite error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/favorites/{food_id}")
-def remove_favorite(food_id: str, client: Client = Depends(get_supabase_client)):
+async def remove_favorite(food_id: str, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
     """Remove a food from user's favorites"""
     try:
         # Try to delete by either master or custom id
-        res = client.table("favorites")\
+        res = await client.table("favorites")\
             .delete()\
             .or_(f"food_master_id.eq.{food_id},food_custom_id.eq.{food_id}")\
             .execute()
+        await response_cache.invalidate(user_id, FAVORITES)
         return {"deleted": True}
     except Exception as e:
-        print(f"Remove favorite error: {e}")
+        logger.error("Remove favorite error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+async def load_favorites(client: AsyncClient) -> list:
+    """Favorites joined with their food rows, in a unified format"""
+    # Get favorites with joined food data
+    res = await client.table("favorites")\
+        .select(f"id, food_custom_id, foods_master({FOOD_COLUMNS}), foods_custom({CUSTOM_FOOD_COLUMNS})")\
+        .execute()
+    
+    # Transform to unified format
+    favorites = []
+    for fav in res.data or []:
+        food_data = fav.get('foods_master') or fav.get('foods_custom')
+        if food_data:
+            food_data['favorite_id'] = fav['id']
+            food_data['is_custom'] = bool(fav.get('food_custom_id'))
+            favorites.append(food_data)
+    
+    return favorites
+
 @router.get("/favorites")
-def get_favorites(client: Client = Depends(get_supabase_client)):
+async def get_favorites(client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
     """Get user's favorite foods"""
     try:
-        # Get favorites with joined food data
-        res = client.table("favorites")\
-            .select("*, foods_master(*), foods_custom(*)")\
-            .execute()
-        
-        # Transform to unified format
-        favorites = []
-        for fav in res.data or []:
-            food_data = fav.get('foods_master') or fav.get('foods_custom')
-            if food_data:
-                food_data['favorite_id'] = fav['id']
-                food_data['is_custom'] = bool(fav.get('food_custom_id'))
-                favorites.append(food_data)
-        
-        return favorites
+        return FastJSONResponse(await response_cache.get_or_load(user_id, FAVORITES, "", lambda: load_favorites(client)))
     except Exception as e:
-        print(f"Get favorites error: {e}")
+        logger.error("Get favorites error: %s", e)
         return []
 
+USAGE_COLUMNS = f"uses, last_used_at, food_custom_id, foods_master({FOOD_COLUMNS}), foods_custom({CUSTOM_FOOD_COLUMNS})"
+
+def usage_foods(rows: list) -> list:
+    """food_usage rows with their joined food, in the unified format, order kept"""
+    foods = []
+    for row in rows:
+        food_data = row.get('foods_master') or row.get('foods_custom')
+        if food_data:
+            food_data['is_custom'] = bool(row.get('food_custom_id'))
+            food_data['uses'] = row['uses']
+            food_data['last_used_at'] = row['last_used_at']
+            foods.append(food_data)
+    return foods
+
+async def load_recent_foods(client: AsyncClient, limit: int) -> list:
+    """Most recently and frequently logged foods, best first"""
+    # food_usage is kept current by a trigger on food_logs (schema section 14)
+    res = await client.table("food_usage")\
+        .select(USAGE_COLUMNS)\
+        .order("score", desc=True)\
+        .limit(limit)\
+        .execute()
+    return usage_foods(res.data or [])
+
+async def load_meal_suggestions(client: AsyncClient, meal_type: str, limit: int) -> list:
+    """Foods the user usually logs for this meal, best first"""
+    column = f"{meal_type}_score"
+    res = await client.table("food_usage")\
+        .select(USAGE_COLUMNS)\
+        .not_.is_(column, "null")\
+        .order(column, desc=True)\
+        .limit(limit)\
+        .execute()
+    return usage_foods(res.data or [])
+
 @router.get("/recent")
-def get_recent_foods(limit: int = 20, client: Client = Depends(get_supabase_client)):
+async def get_recent_foods(limit: int = 20, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
     """Get recently logged foods"""
     try:
-        # Get recent unique foods from food logs
-        res = client.table("food_logs")\
-            .select("food_name, food_master_id, food_custom_id, food_source")\
-            .order("created_at", desc=True)\
-            .limit(limit * 2)\
-            .execute()
-        
-        # Get unique food IDs
-        seen = set()
-        recent_master_ids = []
-        recent_custom_ids = []
-        
-        for log in res.data or []:
-            if log.get('food_master_id') and log['food_master_id'] not in seen:
-                seen.add(log['food_master_id'])
-                recent_master_ids.append(log['food_master_id'])
-            elif log.get('food_custom_id') and log['food_custom_id'] not in seen:
-                seen.add(log['food_custom_id'])
-                recent_custom_ids.append(log['food_custom_id'])
-        
-        # Fetch actual food data
-        recent_foods = []
-        
-        if recent_master_ids:
-            master_res = client.table("foods_master")\
-                .select("*")\
-                .in_("id", recent_master_ids[:limit])\
-                .execute()
-            for food in master_res.data or []:
-                food['is_custom'] = False
-                recent_foods.append(food)
-        
-        if recent_custom_ids and len(recent_foods) < limit:
-            custom_res = client.table("foods_custom")\
-                .select("*")\
-                .in_("id", recent_custom_ids[:limit - len(recent_foods)])\
-                .execute()
-            for food in custom_res.data or []:
-                food['is_custom'] = True
-                recent_foods.append(food)
-        
-        return recent_foods
+        return FastJSONResponse(await response_cache.get_or_load(user_id, RECENT, str(limit), lambda: load_recent_foods(client, limit)))
+    except Exception as e:
+        logger.error("Get recent foods error: %s", e)
+        return []
+
+@router.get("/suggestions")
+async def get_meal_suggestions(meal_type: MealType, limit: int = Query(10, ge=1, le=50), client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
+    """Foods the user usually logs for a meal, e.g. their breakfast staples"""
+    try:
+        return FastJSONResponse(await response_cache.get_or_load(user_id, RECENT, f"{meal_type}:{limit}", lambda: load_meal_suggestions(client, meal_type, limit)))
     except Exception as e:
-        print(f"Get recent foods error: {e}")
+        logger.error("Get meal suggestions error: %s", e)
         return []
@@ -1,8 +1,13 @@
 
+import logging
 from fastapi import APIRouter, Depends, HTTPException
-from supabase import Client
-from app.api.deps import get_supabase_client
+from postgrest import AsyncPostgrestClient as AsyncClient
+from app.api.deps import get_supabase_client, get_current_user_id
 from app.models.schemas import ProfileUpdate, TargetUpdate
+from app.core.cache import response_cache, PROFILE, TARGETS, ANALYTICS
+from app.core.responses import FastJSONResponse
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -14,111 +19,105 @@ DEFAULT_TARGETS = {
     "water_target_ml": 2500
 }
 
+PROFILE_COLUMNS = "id, name, age, height_cm, weight_kg, activity_level, goal_type"
+TARGET_COLUMNS = "calories_target, protein_target_g, carbs_target_g, fats_target_g, water_target_ml"
+
+async def load_profile(client: AsyncClient) -> dict:
+    res = await client.table("profiles").select(PROFILE_COLUMNS).single().execute()
+    return res.data
+
+async def load_targets(client: AsyncClient) -> dict:
+    # Same query as analytics.fetch_targets, so overlapping loads coalesce upstream
+    res = await client.table("daily_targets").select(TARGET_COLUMNS).limit(1).execute()
+    return res.data[0] if res.data else DEFAULT_TARGETS
+
 @router.get("/")
-def get_profile(client: Client = Depends(get_supabase_client)):
+async def get_profile(client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
     """Get user profile"""
     try:
-        res = client.table("profiles").select("*").single().execute()
-        return res.data
+        return FastJSONResponse(await response_cache.get_or_load(user_id, PROFILE, "", lambda: load_profile(client)))
     except Exception as e:
-        print(f"Error fetching profile: {e}")
+        logger.error("Error fetching profile: %s", e)
         # Return empty profile for new users instead of 404
         return {}
 
 @router.put("/")
-def update_profile(profile: ProfileUpdate, client: Client = Depends(get_supabase_client)):
+async def update_profile(profile: ProfileUpdate, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
     """Update or create user profile"""
     data = profile.dict(exclude_unset=True)
     if not data:
         return {"message": "No data to update"}
     
     try:
-        # Try to get existing profile
-        current = client.table("profiles").select("id").execute()
+        # Update in place; an empty result means the profile doesn't exist yet
+        res = await client.table("profiles").update(data).eq("id", user_id).execute()
+        if res.data:
+            await response_cache.invalidate(user_id, PROFILE)
+            return res.data[0]
         
-        if current.data and len(current.data) > 0:
-            # Profile exists, update it
-            uid = current.data[0]['id']
-            res = client.table("profiles").update(data).eq("id", uid).execute()
-            return res.data[0] if res.data else {}
-        else:
-            # Profile doesn't exist - get user id from auth and create
-            user = client.auth.get_user()
-            if not user or not user.user:
-                raise HTTPException(status_code=401, detail="Not authenticated")
-            
-            uid = user.user.id
-            # Set default values for required fields if not provided
-            create_data = {
-                "id": uid,
-                "name": data.get("name", "User"),
-                "activity_level": data.get("activity_level", "medium"),
-                "goal_type": data.get("goal_type", "maintain"),
-                **data
+        # Set default values for required fields if not provided
+        create_data = {
+            "id": user_id,
+            "name": data.get("name", "User"),
+            "activity_level": data.get("activity_level", "medium"),
+            "goal_type": data.get("goal_type", "maintain"),
+            **data
+        }
+        
+        res = await client.table("profiles").insert(create_data).execute()
+        
+        # Also create default daily_targets for the new user
+        try:
+            targets_data = {
+                "user_id": user_id,
+                **DEFAULT_TARGETS
             }
-            
-            res = client.table("profiles").insert(create_data).execute()
-            
-            # Also create default daily_targets for the new user
-            try:
-                targets_data = {
-                    "user_id": uid,
-                    **DEFAULT_TARGETS
-                }
-                client.table("daily_targets").insert(targets_data).execute()
-            except Exception as te:
-                print(f"Error creating default targets: {te}")
-            
-            return res.data[0] if res.data else {}
+            await client.table("daily_targets").insert(targets_data).execute()
+        except Exception as te:
+            logger.error("Error creating default targets: %s", te)
+        
+        await response_cache.invalidate(user_id, PROFILE, TARGETS, ANALYTICS)
+        return res.data[0] if res.data else {}
             
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error updating/creating profile: {e}")
+        logger.error("Error updating/creating profile: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to update profile: {str(e)}")
 
 @router.get("/targets")
-def get_targets(client: Client = Depends(get_supabase_client)):
+async def get_targets(client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
     """Get user daily targets"""
     try:
-        res = client.table("daily_targets").select("*").single().execute()
-        return res.data if res.data else DEFAULT_TARGETS
+        return FastJSONResponse(await response_cache.get_or_load(user_id, TARGETS, "", lambda: load_targets(client)))
     except Exception as e:
-        print(f"Error fetching targets: {e}")
+        logger.error("Error fetching targets: %s", e)
         return DEFAULT_TARGETS
 
 @router.put("/targets")
-def update_targets(targets: TargetUpdate, client: Client = Depends(get_supabase_client)):
+async def update_targets(targets: TargetUpdate, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
     """Update user daily targets"""
     data = targets.dict(exclude_unset=True)
     if not data:
         return {"message": "No data"}
     
     try:
-        # Try to get existing targets
-        current = client.table("daily_targets").select("user_id").execute()
-        
-        if current.data and len(current.data) > 0:
-            uid = current.data[0]['user_id']
-            res = client.table("daily_targets").update(data).eq("user_id", uid).execute()
-            return res.data[0] if res.data else {}
-        else:
-            # Targets don't exist, create them
-            user = client.auth.get_user()
-            if not user or not user.user:
-                raise HTTPException(status_code=401, detail="Not authenticated")
-            
-            uid = user.user.id
+        # Update in place; an empty result means the targets don't exist yet
+        res = await client.table("daily_targets").update(data).eq("user_id", user_id).execute()
+        if not res.data:
             create_data = {
-                "user_id": uid,
+                "user_id": user_id,
                 **DEFAULT_TARGETS,
                 **data
             }
-            res = client.table("daily_targets").insert(create_data).execute()
-            return res.data[0] if res.data else {}
+            res = await client.table("daily_targets").insert(create_data).execute()
+        
+        # Analytics responses embed the targets
+        await response_cache.invalidate(user_id, TARGETS, ANALYTICS)
+        return res.data[0] if res.data else {}
             
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error updating targets: {e}")
+        logger.error("Error updating targets: %s", e)
         raise HTTPException(status_code=500, detail="Failed to update targets")
@@ -0,0 +1,32 @@
+
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from postgrest import AsyncPostgrestClient as AsyncClient
+from app.api.deps import get_supabase_client, get_current_user_id, get_client_id
+from app.api.endpoints.events import publish_change
+from app.models.schemas import SyncReplay
+from app.services.replay import replay_mutations
+from app.services.delta import build_delta, parse_cursor
+
+router = APIRouter()
+
+@router.get("")
+async def get_changes(since: Optional[str] = None, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id)):
+    """Rows created, updated or deleted since the cursor from the previous sync"""
+    try:
+        cursor = parse_cursor(since) if since else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync cursor")
+    return await build_delta(client, cursor)
+
+@router.post("/replay")
+async def replay(payload: SyncReplay, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id), origin: Optional[str] = Depends(get_client_id)):
+    """Replay the app's offline mutation queue in one request"""
+    results, touched = await replay_mutations(client, user_id, payload.mutations)
+    # Other devices hear about offline writes like live ones: once per table and date,
+    # then one summary per date (summaries for a date are coalesced)
+    for event, days in touched.items():
+        for day in sorted(days):
+            summary_day = day if event != "weight_log" else None
+            publish_change(client, user_id, event, {"action": "batch", "date": day}, origin, day=summary_day)
+    return {"results": results}
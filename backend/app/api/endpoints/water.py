@@ -1,22 +1,27 @@
 
+from typing import Optional
 from fastapi import APIRouter, Depends
-from supabase import Client
-from app.api.deps import get_supabase_client
+from postgrest import AsyncPostgrestClient as AsyncClient
+from app.api.deps import get_supabase_client, get_current_user_id, get_client_id
+from app.api.endpoints.events import publish_change
+from app.core.cache import response_cache, ANALYTICS
+from app.core.responses import FastJSONResponse
+from app.services.logs import water_log_row, WATER_LOG_COLUMNS
 from app.models.schemas import WaterLogCreate
 
 router = APIRouter()
 
 @router.post("/")
-def log_water(log: WaterLogCreate, client: Client = Depends(get_supabase_client)):
-    p = client.table("profiles").select("id").single().execute()
-    data = log.dict()
-    data['user_id'] = p.data['id']
-    data['date'] = str(data['date'])
+async def log_water(log: WaterLogCreate, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id), origin: Optional[str] = Depends(get_client_id)):
+    data = water_log_row(log, user_id)
     
-    res = client.table("water_logs").insert(data).execute()
+    res = await client.table("water_logs").insert(data).execute()
+    await response_cache.invalidate(user_id, ANALYTICS)
+    for row in res.data or []:
+        publish_change(client, user_id, "water_log", {"log": row}, origin, day=data["date"])
     return res.data
 
 @router.get("/")
-def get_water_logs(date: str, client: Client = Depends(get_supabase_client)):
-    res = client.table("water_logs").select("*").eq("date", date).execute()
-    return res.data
+async def get_water_logs(date: str, client: AsyncClient = Depends(get_supabase_client)):
+    res = await client.table("water_logs").select(WATER_LOG_COLUMNS).eq("date", date).execute()
+    return FastJSONResponse(res.data)
@@ -1,24 +1,46 @@
 
-from fastapi import APIRouter, Depends
-from supabase import Client
-from app.api.deps import get_supabase_client
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from postgrest import AsyncPostgrestClient as AsyncClient
+from app.api.deps import get_supabase_client, get_current_user_id, get_client_id
+from app.api.endpoints.events import publish_change
+from app.core.cache import response_cache, ANALYTICS
+from app.core.responses import FastJSONResponse
+from app.services.logs import weight_log_row, WEIGHT_LOG_COLUMNS
+from app.services.weight_history import weight_history
 from app.models.schemas import WeightLogCreate
 
 router = APIRouter()
 
 @router.post("/")
-def log_weight(log: WeightLogCreate, client: Client = Depends(get_supabase_client)):
-    p = client.table("profiles").select("id").single().execute()
-    data = log.dict()
-    data['user_id'] = p.data['id']
-    data['date'] = str(data['date'])
+async def log_weight(log: WeightLogCreate, client: AsyncClient = Depends(get_supabase_client), user_id: str = Depends(get_current_user_id), origin: Optional[str] = Depends(get_client_id)):
+    data = weight_log_row(log, user_id)
     
     # We might want upsert for weight on a specific date
-    res = client.table("weight_logs").upsert(data, on_conflict="user_id,date").execute()
+    res = await client.table("weight_logs").upsert(data, on_conflict="user_id,date").execute()
+    await response_cache.invalidate(user_id, ANALYTICS)
+    weight_history.record(user_id, data["date"], float(data["weight_kg"]))
+    for row in res.data or []:
+        publish_change(client, user_id, "weight_log", {"log": row}, origin)
     return res.data
 
 @router.get("/")
-def get_weight_logs(client: Client = Depends(get_supabase_client)):
+async def get_weight_logs(client: AsyncClient = Depends(get_supabase_client)):
     # Get last 30 days or all?
-    res = client.table("weight_logs").select("*").order("date", desc=True).limit(30).execute()
-    return res.data
+    res = await client.table("weight_logs").select(WEIGHT_LOG_COLUMNS).order("date", desc=True).limit(30).execute()
+    return FastJSONResponse(res.data)
+
+@router.get("/history")
+async def get_weight_history(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    points: int = Query(200, ge=10, le=2000),
+    client: AsyncClient = Depends(get_supabase_client),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Weigh-ins between two dates (default: all), downsampled to at most `points`, with the smoothed trend"""
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    history = await weight_history.get(client, user_id)
+    return FastJSONResponse(history.query(start, end, points))
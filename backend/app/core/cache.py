@@ -0,0 +1,158 @@
+
+import time
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Cache groups and how long their entries live (seconds)
+PROFILE = "profile"
+TARGETS = "targets"
+FAVORITES = "favorites"
+RECENT = "recent"
+ANALYTICS = "analytics"
+
+GROUP_TTLS = {
+    PROFILE: 300,
+    TARGETS: 300,
+    FAVORITES: 300,
+    RECENT: 120,
+    ANALYTICS: 60,
+}
+
+class CacheBackend(ABC):
+    """Storage interface for the response cache.
+
+    Methods are async so a shared backend (e.g. Redis) can be dropped in
+    for multiple workers without touching call sites.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float):
+        ...
+
+    @abstractmethod
+    async def generation(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    async def bump_generation(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+class MemoryCache(CacheBackend):
+    """In-process LRU with per-entry TTLs"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Generations are kept outside the LRU: evicting one would resurrect stale entries
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def generation(self, key: str) -> int:
+        return self._generations.get(key, 0)
+
+    async def bump_generation(self, key: str) -> int:
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self.invalidations += 1
+            return self._generations[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+def build_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryCache(settings.CACHE_MAX_ENTRIES)
+    raise ValueError(f"Unsupported CACHE_BACKEND: {settings.CACHE_BACKEND}")
+
+class ResponseCache:
+    """Per-user response cache invalidated by group.
+
+    Keys embed a per-(user, group) generation. Invalidating a group bumps
+    its generation, so stale entries become unreachable and age out of the
+    LRU, and a load that raced with a write is stored under the old key.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    async def get_or_load(self, user_id: str, group: str, params: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if not settings.CACHE_ENABLED:
+            return await loader()
+        generation = await self.backend.generation(f"{user_id}:{group}")
+        key = f"{user_id}:{group}:{generation}:{params}"
+        value = await self.backend.get(key)
+        if value is None:
+            value = await loader()
+            await self.backend.set(key, value, GROUP_TTLS[group])
+        return value
+
+    async def invalidate(self, user_id: str, *groups: str):
+        for group in groups:
+            await self.backend.bump_generation(f"{user_id}:{group}")
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+response_cache = ResponseCache(build_backend())
+
+for _name, _stat, _kind, _help in (
+    ("akilo_cache_entries", "size", "gauge", "Entries in the response cache"),
+    ("akilo_cache_max_entries", "max_entries", "gauge", "Capacity of the response cache"),
+    ("akilo_cache_hits_total", "hits", "counter", "Response cache hits"),
+    ("akilo_cache_misses_total", "misses", "counter", "Response cache misses"),
+    ("akilo_cache_evictions_total", "evictions", "counter", "Response cache entries evicted to make room"),
+    ("akilo_cache_expirations_total", "expirations", "counter", "Response cache entries found expired"),
+    ("akilo_cache_invalidations_total", "invalidations", "counter", "Response cache group invalidations"),
+):
+    metrics.reading(_name, _kind, _help, lambda stat=_stat: response_cache.stats().get(stat, 0))
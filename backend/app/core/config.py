@@ -1,12 +1,96 @@
 
+from functools import lru_cache
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_KEY: str
     SUPABASE_JWT_SECRET: str
+    # Only needed by admin jobs (rollup rebuilds etc.), never by request handlers
+    SUPABASE_SERVICE_KEY: Optional[str] = None
+
+    # Shared PostgREST connection pool
+    SUPABASE_HTTP2: bool = True
+    SUPABASE_POOL_MAX_CONNECTIONS: int = 100
+    SUPABASE_POOL_MAX_KEEPALIVE: int = 20
+    SUPABASE_POOL_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_TIMEOUT: float = 10.0
+    SUPABASE_CONNECT_TIMEOUT: float = 5.0
+    # Concurrent identical reads (same user and query) share one upstream call
+    SUPABASE_SINGLE_FLIGHT: bool = True
+
+    # Locally verified JWTs
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 300
+
+    # Per-user response cache
+    CACHE_ENABLED: bool = True
+    CACHE_BACKEND: str = "memory"
+    CACHE_MAX_ENTRIES: int = 10000
+
+    # In-memory foods_master search index
+    FOOD_INDEX_REFRESH_SECONDS: int = 3600
+    FOOD_INDEX_PAGE_SIZE: int = 1000
+
+    # Delta sync (GET /api/sync)
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 90
+    SYNC_OVERLAP_SECONDS: float = 5.0
+    SYNC_PAGE_SIZE: int = 1000
+
+    # Streaming export (GET /api/export)
+    EXPORT_PAGE_SIZE: int = 1000
+
+    # Request metrics (GET /metrics, Server-Timing); 0 disables slow-request traces
+    METRICS_ENABLED: bool = True
+    METRICS_SLOW_REQUEST_MS: float = 0
+    METRICS_SLOW_TRACE_SAMPLE_RATE: float = 1.0
+
+    # Structured logging (JSON lines via a background writer)
+    LOG_LEVEL: str = "INFO"
+    # Log request payloads in full instead of just their field names
+    LOG_PAYLOADS: bool = False
+    # Comma-separated path prefixes, e.g. "/api/food/search=WARNING" / "/api/food=0.1"
+    LOG_ROUTE_LEVELS: str = ""
+    LOG_ROUTE_SAMPLING: str = ""
+    LOG_QUEUE_SIZE: int = 10000
+    # Secret for the pseudonymous `user` field of log lines; unset, no user field is logged
+    LOG_USER_HASH_KEY: str = ""
+
+    # Per-user weight history tiers (GET /api/weight/history)
+    WEIGHT_HISTORY_MAX_USERS: int = 5000
+    WEIGHT_HISTORY_TTL_SECONDS: int = 3600
+
+    # Per-user custom food libraries (GET /api/food/custom, search)
+    CUSTOM_FOOD_INDEX_MAX_USERS: int = 5000
+    CUSTOM_FOOD_INDEX_TTL_SECONDS: int = 600
+
+    # Server-sent change events (GET /api/events)
+    EVENTS_QUEUE_SIZE: int = 64
+    EVENTS_MAX_PER_USER: int = 10
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    EVENTS_MAX_STREAM_SECONDS: float = 3600.0
+
+    # Response compression (brotli or gzip, as the client accepts)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
 
     class Config:
         env_file = ".env"
 
-settings = Settings()
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    return Settings()
+
+class _LazySettings:
+    """Reads (and writes) go to Settings(), which is built on first use, not at import"""
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name, value):
+        setattr(get_settings(), name, value)
+
+settings = _LazySettings()
@@ -0,0 +1,211 @@
+
+import contextvars
+import copy
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import uuid
+from typing import List, Optional, Tuple
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+# Everything under app.* goes through the queue; module loggers are logging.getLogger(__name__)
+ROOT_LOGGER = "app"
+REQUEST_ID_HEADER = "X-Request-ID"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+# LogRecord attributes that aren't user-supplied `extra` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id", "user"}
+
+class RequestContext:
+    """Per-request fields stamped onto every log record.
+
+    Mutable, so a dependency running in the threadpool (where context
+    variable changes don't flow back) can still attach the user.
+    """
+    __slots__ = ("request_id", "path", "user")
+
+    def __init__(self, request_id: str, path: str):
+        self.request_id = request_id
+        self.path = path
+        self.user = None
+
+_context: contextvars.ContextVar[Optional[RequestContext]] = contextvars.ContextVar("log_context", default=None)
+
+def hash_user_id(user_id: str) -> Optional[str]:
+    """Stable pseudonymous id, so one user's lines can be correlated without logging the uuid.
+
+    None without LOG_USER_HASH_KEY: an unkeyed hash of a uuid can be
+    reversed by hashing known user ids, so no user field is logged.
+    """
+    key = settings.LOG_USER_HASH_KEY.encode()[:64]
+    if not key:
+        return None
+    return hashlib.blake2b(user_id.encode(), key=key, digest_size=8).hexdigest()
+
+def bind_user(user_id: str):
+    ctx = _context.get()
+    if ctx is not None and ctx.user is None:
+        ctx.user = hash_user_id(user_id)
+
+def current_request_id() -> Optional[str]:
+    ctx = _context.get()
+    return ctx.request_id if ctx else None
+
+def redact(payload):
+    """Field names only; values may hold health data"""
+    if isinstance(payload, dict):
+        return {"redacted": True, "fields": sorted(payload)}
+    return "[redacted]"
+
+def _route_table(raw: str, parse) -> List[Tuple[str, object]]:
+    """"/api/food=WARNING,/api/food/search=0.1" -> [(prefix, value)], longest prefix first"""
+    table = []
+    for item in raw.split(","):
+        prefix, _, value = item.strip().partition("=")
+        if prefix and value:
+            table.append((prefix, parse(value.strip())))
+    return sorted(table, key=lambda item: len(item[0]), reverse=True)
+
+def _lookup(table: List[Tuple[str, object]], path: str):
+    for prefix, value in table:
+        if path.startswith(prefix):
+            return value
+    return None
+
+class RequestFilter(logging.Filter):
+    """Runs on the calling thread: per-route level and sampling, context, redaction.
+
+    Errors are never sampled away. Payloads (`extra={"payload": ...}`) are
+    reduced to their field names unless LOG_PAYLOADS is on, and copied
+    otherwise so later mutation can't change what gets written.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.levels = _route_table(settings.LOG_ROUTE_LEVELS, lambda v: logging.getLevelName(v.upper()))
+        self.sampling = _route_table(settings.LOG_ROUTE_SAMPLING, float)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        ctx = _context.get()
+        if ctx is not None:
+            level = _lookup(self.levels, ctx.path)
+            if level is not None and record.levelno < level:
+                return False
+            rate = _lookup(self.sampling, ctx.path)
+            if rate is not None and record.levelno < logging.ERROR and random.random() >= rate:
+                return False
+        record.request_id = ctx.request_id if ctx else None
+        record.user = ctx.user if ctx else None
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            record.payload = copy.deepcopy(payload) if settings.LOG_PAYLOADS else redact(payload)
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra` fields are included as-is"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if getattr(record, "user", None):
+            entry["user"] = record.user
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread; drops them rather than block if it falls behind"""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback here: args may be mutated after
+        # the call returns, and exc_info can't be formatted later
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _QueueHandler.dropped += 1
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def setup_logging(stream=None):
+    """Route app.* loggers through a bounded queue to a background JSON writer"""
+    global _listener
+    if _listener is not None:
+        return
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(JsonFormatter())
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(RequestFilter())
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.handlers = [handler]
+    logger.setLevel(settings.LOG_LEVEL.upper())
+    logger.propagate = False
+    _listener = logging.handlers.QueueListener(log_queue, writer)
+    _listener.start()
+
+def shutdown_logging():
+    """Flush queued records and stop the writer"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.handlers = []
+    logger.propagate = True
+
+class RequestContextMiddleware:
+    """Assigns each request an id (or keeps a sane incoming X-Request-ID) for log correlation"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for key, value in scope["headers"]:
+            if key == b"x-request-id":
+                incoming = value.decode("latin-1")
+                break
+        request_id = incoming if incoming and _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        token = _context.set(RequestContext(request_id, scope["path"]))
+
+        async def send_with_id(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _context.reset(token)
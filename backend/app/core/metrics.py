@@ -0,0 +1,287 @@
+
+import contextvars
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import httpx
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans a cache hit up to a timed-out upstream call
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+CALL_COUNT_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16, 32)
+# Seconds; a small body renders in microseconds, a large export in tens of ms
+SERIALIZE_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class _Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class MetricsRegistry:
+    """Process-local counters and histograms in Prometheus text format.
+
+    Each worker process exposes its own numbers; Prometheus sums them
+    across targets.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._readings: Dict[str, Callable[[], float]] = {}
+
+    def counter(self, name: str, help: str):
+        self._help[name] = ("counter", help)
+        self._counters.setdefault(name, {})
+
+    def histogram(self, name: str, help: str):
+        self._help[name] = ("histogram", help)
+        self._histograms.setdefault(name, {})
+
+    def reading(self, name: str, kind: str, help: str, read: Callable[[], float]):
+        """A gauge or counter whose value is read from `read` at scrape time"""
+        self._help[name] = (kind, help)
+        self._readings[name] = read
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: tuple = DURATION_BUCKETS, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms[name]
+            if key not in series:
+                series[key] = _Histogram(buckets)
+            series[key].observe(value)
+
+    def render(self) -> str:
+        # Read outside the lock; the callbacks take their owners' locks
+        readings = {name: read() for name, read in self._readings.items()}
+        lines = []
+        with self._lock:
+            for name, (kind, help) in self._help.items():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                if name in readings:
+                    lines.append(f"{name} {readings[name]:g}")
+                    continue
+                if kind == "counter":
+                    for labels, value in self._counters[name].items():
+                        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+                    continue
+                for labels, hist in self._histograms[name].items():
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        le = f'le="{bound:g}"'
+                        lines.append(f"{name}_bucket{_format_labels(labels, le)} {count}")
+                    le = 'le="+Inf"'
+                    lines.append(f"{name}_bucket{_format_labels(labels, le)} {hist.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {hist.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+metrics.counter("akilo_http_requests_total", "HTTP requests by route, method and status")
+metrics.counter("akilo_http_errors_total", "HTTP requests that failed with a 5xx or an unhandled exception")
+metrics.histogram("akilo_http_request_duration_seconds", "HTTP request latency by route")
+metrics.histogram("akilo_http_response_size_bytes", "HTTP response body size by route")
+metrics.histogram("akilo_http_upstream_calls", "PostgREST calls made per HTTP request")
+metrics.histogram("akilo_http_serialize_seconds", "CPU time spent rendering the JSON response body, by route")
+metrics.counter("akilo_upstream_requests_total", "PostgREST calls by table, operation and status")
+metrics.counter("akilo_upstream_errors_total", "PostgREST calls that failed with a 5xx or a transport error")
+metrics.histogram("akilo_upstream_duration_seconds", "PostgREST call latency (to response headers)")
+metrics.counter("akilo_upstream_coalesced_total", "PostgREST reads answered by an identical call already in flight")
+metrics.counter("akilo_event_streams_opened_total", "Event streams opened (open streams = opened - closed)")
+metrics.counter("akilo_event_streams_closed_total", "Event streams closed")
+metrics.counter("akilo_events_delivered_total", "Change events queued to open streams, by event")
+metrics.counter("akilo_events_dropped_total", "Change events dropped because a stream's queue was full")
+
+class RequestTrace:
+    """Upstream calls made while serving one request"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.calls: List[Tuple[str, str, float, float, int]] = []
+        self.serialize_seconds = 0.0
+
+    def add(self, table: str, operation: str, started: float, duration: float, status: int):
+        self.calls.append((table, operation, started - self.start, duration, status))
+
+    @property
+    def upstream_seconds(self) -> float:
+        return sum(call[3] for call in self.calls)
+
+_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("request_trace", default=None)
+
+def record_serialization(seconds: float):
+    """Count time spent rendering a response body towards the current request"""
+    trace = _trace.get()
+    if trace is not None:
+        trace.serialize_seconds += seconds
+
+def describe_call(request: httpx.Request) -> Tuple[str, str]:
+    """(table, operation) of a PostgREST request"""
+    path = request.url.path
+    _, _, rest = path.partition("/rest/v1/")
+    if rest.startswith("rpc/"):
+        return rest[4:], "rpc"
+    table = rest or path
+    if request.method == "POST":
+        merge = "resolution=" in request.headers.get("prefer", "")
+        return table, "upsert" if merge else "insert"
+    return table, {"GET": "select", "HEAD": "count", "PATCH": "update", "DELETE": "delete"}.get(request.method, request.method.lower())
+
+def _record_call(request: httpx.Request, started: float, status: int):
+    duration = time.perf_counter() - started
+    table, operation = describe_call(request)
+    metrics.inc("akilo_upstream_requests_total", table=table, operation=operation, status=str(status))
+    metrics.observe("akilo_upstream_duration_seconds", duration, table=table, operation=operation)
+    if status == 0 or status >= 500:
+        metrics.inc("akilo_upstream_errors_total", table=table, operation=operation)
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(table, operation, started, duration, status)
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """Times every call made through the shared sync pool"""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        status = 0
+        try:
+            response = self.transport.handle_request(request)
+            status = response.status_code
+            return response
+        finally:
+            _record_call(request, started, status)
+
+    def close(self):
+        self.transport.close()
+
+class AsyncInstrumentedTransport(httpx.AsyncBaseTransport):
+    """Times every call made through the shared async pool"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        status = 0
+        try:
+            response = await self.transport.handle_async_request(request)
+            status = response.status_code
+            return response
+        finally:
+            _record_call(request, started, status)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+def route_label(scope: Scope) -> str:
+    """Path template of the matched route, so ids don't explode cardinality.
+
+    Routes of an included router may only know their path below the
+    router's prefix; the prefix is then whatever precedes the part of
+    the request path the route matched.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if not template:
+        return "unmatched"
+    path = scope["path"]
+    regex = getattr(route, "path_regex", None)
+    if regex is not None:
+        for i, char in enumerate(path):
+            if char == "/" and regex.match(path[i:]):
+                return path[:i] + template
+    return template
+
+def server_timing(trace: RequestTrace, total: float) -> str:
+    return (f'app;dur={total * 1e3:.1f}, upstream;dur={trace.upstream_seconds * 1e3:.1f};desc="{len(trace.calls)} calls", '
+            f'serialize;dur={trace.serialize_seconds * 1e3:.2f}')
+
+def log_slow_request(method: str, route: str, status: int, total: float, trace: RequestTrace):
+    calls = [
+        {"table": table, "op": op, "at_ms": round(at * 1e3, 1), "ms": round(duration * 1e3, 1), "status": code}
+        for table, op, at, duration, code in trace.calls
+    ]
+    logger.warning("Slow request %s %s %s %.0fms", method, route, status, total * 1e3, extra={"upstream_calls": calls})
+
+class MetricsMiddleware:
+    """Per-route latency, response size, status and upstream call counts.
+
+    Adds a `Server-Timing` header with the handler time, the time spent
+    in PostgREST calls and the time spent rendering the body. Requests slower than
+    METRICS_SLOW_REQUEST_MS are logged with their upstream call sequence,
+    for a METRICS_SLOW_TRACE_SAMPLE_RATE share of them.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _trace.set(trace)
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message: Message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(trace, time.perf_counter() - trace.start))
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _trace.reset(token)
+            total = time.perf_counter() - trace.start
+            method, route = scope["method"], route_label(scope)
+            metrics.inc("akilo_http_requests_total", method=method, route=route, status=str(status))
+            metrics.observe("akilo_http_request_duration_seconds", total, method=method, route=route)
+            metrics.observe("akilo_http_response_size_bytes", size, SIZE_BUCKETS, method=method, route=route)
+            metrics.observe("akilo_http_upstream_calls", len(trace.calls), CALL_COUNT_BUCKETS, method=method, route=route)
+            metrics.observe("akilo_http_serialize_seconds", trace.serialize_seconds, SERIALIZE_BUCKETS, method=method, route=route)
+            if status >= 500:
+                metrics.inc("akilo_http_errors_total", method=method, route=route)
+            slow_ms = settings.METRICS_SLOW_REQUEST_MS
+            if slow_ms and total * 1e3 >= slow_ms and random.random() < settings.METRICS_SLOW_TRACE_SAMPLE_RATE:
+                log_slow_request(method, route, status, total, trace)
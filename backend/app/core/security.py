@@ -1,18 +1,59 @@
 
+import time
+import threading
+from collections import OrderedDict
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from app.core.config import settings
+from app.core.log import bind_user
 
 security = HTTPBearer()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
+# Bounded LRU of verified tokens: token -> (user, expires_at)
+_token_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+def _cached_user(token: str):
+    with _token_cache_lock:
+        entry = _token_cache.get(token)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at <= time.time():
+            del _token_cache[token]
+            return None
+        _token_cache.move_to_end(token)
+        return user
+
+def _cache_user(token: str, user: dict, expires_at: float):
+    with _token_cache_lock:
+        _token_cache[token] = (user, expires_at)
+        _token_cache.move_to_end(token)
+        while len(_token_cache) > settings.AUTH_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
+def verify_token(token: str) -> dict:
+    """Verify a Supabase JWT locally, without a round trip to Supabase"""
+    user = _cached_user(token)
+    if user is not None:
+        return user
     try:
         payload = jwt.decode(token, settings.SUPABASE_JWT_SECRET, algorithms=["HS256"], audience="authenticated")
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid credential")
-        return {"id": user_id, "email": payload.get("email")}
     except JWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    user_id = payload.get("sub")
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credential")
+    user = {"id": user_id, "email": payload.get("email")}
+    # Never cache past the token's own expiry
+    expires_at = time.time() + settings.AUTH_CACHE_TTL_SECONDS
+    if payload.get("exp"):
+        expires_at = min(expires_at, float(payload["exp"]))
+    _cache_user(token, user, expires_at)
+    return user
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    user = verify_token(credentials.credentials)
+    bind_user(user["id"])
+    return user
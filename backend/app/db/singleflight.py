@@ -0,0 +1,77 @@
+
+import asyncio
+from typing import Dict, Tuple
+import httpx
+from app.core.metrics import metrics, describe_call
+
+_READS = ("GET", "HEAD")
+
+def _key(request: httpx.Request) -> Tuple:
+    # The JWT scopes rows (RLS), so the same query by two users is two keys
+    headers = request.headers
+    return (
+        request.method, str(request.url), headers.get("authorization"),
+        headers.get("accept"), headers.get("range"), headers.get("prefer"),
+    )
+
+def _response(result: Tuple) -> httpx.Response:
+    status, headers, body, extensions = result
+    return httpx.Response(status, headers=headers, content=body, extensions=dict(extensions))
+
+class SingleFlightTransport(httpx.AsyncBaseTransport):
+    """Concurrent identical reads share one upstream call.
+
+    The first caller of a (user, query) pair makes the request; anyone
+    asking for the same thing before it completes gets a copy of that
+    response. Nothing is kept once the call finishes, so no answer is
+    older than a request that was already in flight. Writes always pass
+    straight through.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method not in _READS:
+            return await self.transport.handle_async_request(request)
+
+        key = _key(request)
+        while key in self._in_flight:
+            future = self._in_flight[key]
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled; try again (possibly as the new leader)
+                continue
+            table, operation = describe_call(request)
+            metrics.inc("akilo_upstream_coalesced_total", table=table, operation=operation)
+            return _response(result)
+
+        future = asyncio.get_running_loop().create_future()
+        # Followers see the exception themselves; don't warn when there are none
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._in_flight[key] = future
+        try:
+            response = await self.transport.handle_async_request(request)
+            try:
+                # Raw (still encoded) bytes; each copy is decoded by its own client
+                body = b"".join([chunk async for chunk in response.stream])
+            finally:
+                await response.aclose()
+            result = (response.status_code, response.headers.raw, body, response.extensions)
+            future.set_result(result)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+        return _response(result)
+
+    async def aclose(self):
+        await self.transport.aclose()
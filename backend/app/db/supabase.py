@@ -1,5 +1,102 @@
 
-from supabase import create_client, Client
+import asyncio
+import httpx
+from typing import Optional
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
 from app.core.config import settings
+from app.core.metrics import InstrumentedTransport, AsyncInstrumentedTransport
+from app.db.singleflight import SingleFlightTransport
 
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+# One HTTP/2 keep-alive pool per process (sync + async), shared by every request.
+# Calls are timed per table/operation by the instrumented transports (app.core.metrics),
+# and concurrent identical async reads share one call (app.db.singleflight).
+# Per-request clients only carry the caller's JWT in their own headers,
+# so no auth state is shared between users.
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+
+def _transport_options() -> dict:
+    return dict(
+        http2=settings.SUPABASE_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.SUPABASE_POOL_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+def _pool_options() -> dict:
+    return dict(
+        timeout=httpx.Timeout(
+            settings.SUPABASE_TIMEOUT,
+            connect=settings.SUPABASE_CONNECT_TIMEOUT,
+        ),
+        follow_redirects=True,
+    )
+
+def init_pool():
+    """Create the shared HTTP pools (called once at startup)"""
+    global _http_client, _async_http_client
+    if _http_client is None:
+        transport = InstrumentedTransport(httpx.HTTPTransport(**_transport_options()))
+        _http_client = httpx.Client(transport=transport, **_pool_options())
+    if _async_http_client is None:
+        transport = AsyncInstrumentedTransport(httpx.AsyncHTTPTransport(**_transport_options()))
+        if settings.SUPABASE_SINGLE_FLIGHT:
+            transport = SingleFlightTransport(transport)
+        _async_http_client = httpx.AsyncClient(transport=transport, **_pool_options())
+
+async def close_pool():
+    """Close the shared HTTP pools (called at shutdown)"""
+    global _http_client, _async_http_client
+    if _http_client is not None:
+        _http_client.close()
+        _http_client = None
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+        _async_http_client = None
+
+async def prewarm_pool():
+    """Open the upstream connections now rather than on the first request"""
+    url = f"{settings.SUPABASE_URL}/rest/v1/"
+    headers = {"apikey": settings.SUPABASE_KEY}
+    await asyncio.gather(
+        get_async_http_client().head(url, headers=headers),
+        asyncio.to_thread(get_http_client().head, url, headers=headers),
+    )
+
+def get_http_client() -> httpx.Client:
+    if _http_client is None:
+        init_pool()
+    return _http_client
+
+def get_async_http_client() -> httpx.AsyncClient:
+    if _async_http_client is None:
+        init_pool()
+    return _async_http_client
+
+def _headers(key: str, token: Optional[str] = None) -> dict:
+    # What supabase-py sends: the API key, and the user's JWT (or the key) as bearer
+    return {**DEFAULT_POSTGREST_CLIENT_HEADERS, "apikey": key, "Authorization": f"Bearer {token or key}"}
+
+def _rest_url() -> str:
+    return f"{settings.SUPABASE_URL}/rest/v1"
+
+# The app only talks to PostgREST, so clients are bare PostgREST clients:
+# building a full supabase client (auth, storage, realtime) per request
+# cost ~100us and its imports a few hundred ms of cold start.
+
+def create_user_client(token: Optional[str] = None) -> SyncPostgrestClient:
+    """Build a cheap per-request sync client on top of the shared pool"""
+    return SyncPostgrestClient(_rest_url(), headers=_headers(settings.SUPABASE_KEY, token), http_client=get_http_client())
+
+def create_async_user_client(token: Optional[str] = None) -> AsyncPostgrestClient:
+    """Build a cheap per-request async client on top of the shared pool"""
+    return AsyncPostgrestClient(_rest_url(), headers=_headers(settings.SUPABASE_KEY, token), http_client=get_async_http_client())
+
+def create_service_client() -> SyncPostgrestClient:
+    """Service-role client for admin jobs; bypasses RLS"""
+    if not settings.SUPABASE_SERVICE_KEY:
+        raise RuntimeError("SUPABASE_SERVICE_KEY is not set")
+    return SyncPostgrestClient(_rest_url(), headers=_headers(settings.SUPABASE_SERVICE_KEY), http_client=get_http_client())
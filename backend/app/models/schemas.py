@@ -1,5 +1,5 @@
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Literal
 from datetime import date, datetime
 from uuid import UUID
@@ -27,13 +27,14 @@ class TargetUpdate(BaseModel):
     water_target_ml: Optional[int] = None
 
 class FoodCreate(BaseModel):
-    name: str
+    # Mirrors the foods_master / foods_custom check constraints
+    name: str = Field(min_length=1)
     unit_type: UnitType
-    base_qty: float
-    calories: float
-    protein_g: float
-    carbs_g: float
-    fats_g: float
+    base_qty: float = Field(gt=0)
+    calories: float = Field(ge=0)
+    protein_g: float = Field(ge=0)
+    carbs_g: float = Field(ge=0)
+    fats_g: float = Field(ge=0)
 
 class FoodLogCreate(BaseModel):
     date: date
@@ -55,3 +56,16 @@ class WaterLogCreate(BaseModel):
 class WeightLogCreate(BaseModel):
     date: date
     weight_kg: float
+
+# Offline queue replay
+MutationMethod = Literal['POST', 'PUT', 'DELETE']
+
+class QueuedMutation(BaseModel):
+    id: Optional[str] = None
+    method: MutationMethod
+    endpoint: str
+    body: Optional[dict] = None
+    timestamp: Optional[int] = None
+
+class SyncReplay(BaseModel):
+    mutations: List[QueuedMutation]
@@ -0,0 +1,168 @@
+
+import asyncio
+import base64
+import json
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from postgrest import AsyncPostgrestClient as AsyncClient
+from app.core.config import settings
+from app.services.food_index import FoodSearchIndex, FOOD_COLUMNS, normalize
+
+PAGE_SIZE = 1000
+# Custom foods carry user_id; the app tells them apart from master foods by it
+CUSTOM_FOOD_COLUMNS = f"{FOOD_COLUMNS}, user_id"
+SORTS = ("name", "recent", "usage")
+# Types of each sort's keyset key, to reject forged cursors before they're compared
+KEY_TYPES = {
+    "name": (str, str),
+    "recent": ((int, float), str),
+    "usage": (int, (int, float), str, str),
+}
+
+def _timestamp(value: Optional[str]) -> float:
+    return datetime.fromisoformat(value).timestamp() if value else 0.0
+
+class CustomFoodLibrary:
+    """One user's custom foods: a search index plus the list in each sort order.
+
+    Orders are sorted lists of keyset keys (ascending tuples), built on
+    first use; a page is a bisect past the cursor's key, so listing
+    thousands of foods never rescans them.
+    """
+
+    def __init__(self, foods: List[dict], usage: Dict[str, Tuple[int, Optional[str]]]):
+        self.foods = [{**food, "is_custom": True} for food in foods]
+        self.index = FoodSearchIndex(self.foods)
+        # food id -> (uses, last_used_at), from food_usage
+        self.usage = usage
+        self._orders: Dict[str, Tuple[List[tuple], List[dict]]] = {}
+
+    def _key(self, sort: str, food: dict) -> tuple:
+        if sort == "name":
+            return (normalize(food["name"]), food["id"])
+        if sort == "recent":
+            return (-_timestamp(food.get("created_at")), food["id"])
+        uses, last_used_at = self.usage.get(food["id"], (0, None))
+        return (-uses, -_timestamp(last_used_at), normalize(food["name"]), food["id"])
+
+    def _order(self, sort: str) -> Tuple[List[tuple], List[dict]]:
+        order = self._orders.get(sort)
+        if order is None:
+            keyed = sorted(((self._key(sort, food), food) for food in self.foods), key=lambda pair: pair[0])
+            order = ([key for key, _ in keyed], [food for _, food in keyed])
+            self._orders[sort] = order
+        return order
+
+    def page(self, sort: str, after: Optional[tuple], limit: int) -> Tuple[List[dict], Optional[tuple]]:
+        """Up to `limit` foods after the `after` key; the last one's key if there are more"""
+        keys, foods = self._order(sort)
+        start = bisect_right(keys, after) if after is not None else 0
+        items = [
+            {**food, "uses": self.usage.get(food["id"], (0, None))[0]}
+            for food in foods[start:start + limit]
+        ]
+        more = start + limit < len(foods)
+        return items, keys[start + limit - 1] if more else None
+
+    def record_use(self, food_id: str, at: str):
+        uses, last_used_at = self.usage.get(food_id, (0, None))
+        self.usage[food_id] = (uses + 1, max(last_used_at or at, at))
+        self._orders.pop("usage", None)
+
+def encode_library_cursor(sort: str, key: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort, *key], separators=(",", ":")).encode()).decode()
+
+def decode_library_cursor(cursor: str, sort: str) -> tuple:
+    """Keyset key of an encode_library_cursor() cursor; ValueError if malformed or for another sort"""
+    try:
+        cursor_sort, *key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("malformed cursor") from e
+    types = KEY_TYPES[sort]
+    if cursor_sort != sort or len(key) != len(types) or not all(isinstance(v, t) for v, t in zip(key, types)):
+        raise ValueError("cursor belongs to another sort")
+    return tuple(key)
+
+async def _fetch_all(query) -> list:
+    """Every row of a PostgREST select, paged past its row limit"""
+    rows = []
+    while True:
+        res = await query.range(len(rows), len(rows) + PAGE_SIZE - 1).execute()
+        page = res.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+
+async def fetch_library(client: AsyncClient) -> CustomFoodLibrary:
+    foods, usage = await asyncio.gather(
+        _fetch_all(client.table("foods_custom").select(f"{CUSTOM_FOOD_COLUMNS}, created_at").order("id")),
+        _fetch_all(client.table("food_usage").select("food_custom_id, uses, last_used_at")
+                   .not_.is_("food_custom_id", "null").order("food_custom_id")),
+    )
+    return CustomFoodLibrary(foods, {row["food_custom_id"]: (row["uses"], row["last_used_at"]) for row in usage})
+
+class CustomFoodCache:
+    """Per-user CustomFoodLibrary, built lazily and LRU-bounded.
+
+    Creating a custom food drops the user's entry; logging one bumps
+    its usage in place. Entries expire after CUSTOM_FOOD_INDEX_TTL_SECONDS
+    so writes that went through another worker show up eventually.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[CustomFoodLibrary, float]]" = OrderedDict()
+        # Bumped on every write, so a load that raced one isn't stored
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, user_id: str) -> Optional[CustomFoodLibrary]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            library, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return library
+
+    async def get(self, client: AsyncClient, user_id: str) -> CustomFoodLibrary:
+        library = self._cached(user_id)
+        if library is not None:
+            return library
+        version = self._versions.get(user_id, 0)
+        library = await fetch_library(client)
+        with self._lock:
+            if self._versions.get(user_id, 0) == version:
+                self._entries[user_id] = (library, time.monotonic() + settings.CUSTOM_FOOD_INDEX_TTL_SECONDS)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > settings.CUSTOM_FOOD_INDEX_MAX_USERS:
+                    self._entries.popitem(last=False)
+        return library
+
+    def record_use(self, user_id: str, food_id: str, at: str):
+        """Count a new log of a custom food in the cached library, if there is one"""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry[0].record_use(food_id, at)
+
+    def forget(self, user_id: str):
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._entries.pop(user_id, None)
+
+custom_foods = CustomFoodCache()
+
+def merge_ranked(master: List[Tuple[dict, float]], custom: List[Tuple[dict, float]], offset: int, limit: int) -> List[dict]:
+    """One ranking over master and custom matches; the user's own food wins a tie"""
+    tagged = [(-score, 0, len(food.get("name", "")), i, food) for i, (food, score) in enumerate(custom)]
+    tagged += [(-score, 1, len(food.get("name", "")), i, {**food, "is_custom": False}) for i, (food, score) in enumerate(master)]
+    tagged.sort(key=lambda item: item[:4])
+    return [item[4] for item in tagged[offset:offset + limit]]
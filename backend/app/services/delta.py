@@ -0,0 +1,92 @@
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from postgrest import AsyncPostgrestClient as AsyncClient
+from app.core.config import settings
+
+# Synced tables and the column that moves when a row changes
+SYNC_TABLES = {
+    "food_logs": "updated_at",
+    "water_logs": "created_at",
+    "weight_logs": "updated_at",
+    "favorites": "created_at",
+    "foods_custom": "created_at",
+}
+
+def parse_cursor(cursor: str) -> datetime:
+    """Cursors are opaque to clients but are UTC timestamps underneath"""
+    value = datetime.fromisoformat(cursor.replace("Z", "+00:00"))
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def format_cursor(value: datetime) -> str:
+    return value.astimezone(timezone.utc).isoformat()
+
+async def fetch_pages(query_builder, page_size: int) -> List[dict]:
+    """Page through a query past PostgREST's row limit"""
+    rows: List[dict] = []
+    while True:
+        res = await query_builder().range(len(rows), len(rows) + page_size - 1).execute()
+        page = res.data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+async def fetch_changes(client: AsyncClient, table: str, column: str, since: Optional[datetime]) -> List[dict]:
+    def query():
+        q = client.table(table).select("*")
+        if since is not None:
+            q = q.gt(column, since.isoformat())
+        return q.order(column).order("id")
+    return await fetch_pages(query, settings.SYNC_PAGE_SIZE)
+
+async def fetch_tombstones(client: AsyncClient, since: datetime) -> List[dict]:
+    def query():
+        return client.table("sync_tombstones")\
+            .select("table_name, row_id, deleted_at")\
+            .gt("deleted_at", since.isoformat())\
+            .order("id")
+    return await fetch_pages(query, settings.SYNC_PAGE_SIZE)
+
+def latest(timestamps, since: Optional[datetime]) -> Optional[datetime]:
+    """Newest of `since` and the (database) timestamps; never moves backwards"""
+    values = [parse_cursor(value) for value in timestamps if value]
+    if since is not None:
+        values.append(since)
+    return max(values, default=None)
+
+async def build_delta(client: AsyncClient, since: Optional[datetime]) -> dict:
+    """Rows changed and ids deleted since the last sync, plus the next cursor.
+
+    Without a cursor (or one older than tombstone retention) every row is
+    returned with reset=True and the client replaces its local copy.
+    The next cursor is the newest timestamp returned, so it comes from
+    the database's clock rather than this server's; with nothing new it
+    stays put (and is None until there is anything to sync). Changes
+    are still re-read from a few seconds before the cursor, as a margin
+    for transactions that commit after a later one; clients apply them
+    by id, so repeats are harmless.
+    """
+    now = datetime.now(timezone.utc)
+    if since is not None and since < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+        since = None
+    reset = since is None
+    window_start = None if reset else since - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+
+    tables = list(SYNC_TABLES.items())
+    *changes, tombstones = await asyncio.gather(
+        *(fetch_changes(client, table, column, window_start) for table, column in tables),
+        fetch_tombstones(client, window_start) if not reset else asyncio.sleep(0, []),
+    )
+    deleted: Dict[str, List[str]] = {table: [] for table in SYNC_TABLES} if not reset else {}
+    for row in tombstones:
+        deleted.setdefault(row["table_name"], []).append(row["row_id"])
+
+    cursor = latest([row[column] for (_, column), rows in zip(tables, changes) for row in rows], since)
+    cursor = latest([row["deleted_at"] for row in tombstones], cursor)
+    return {
+        "cursor": format_cursor(cursor) if cursor else None,
+        "reset": reset,
+        "changes": {table: rows for (table, _), rows in zip(tables, changes)},
+        "deleted": deleted,
+    }
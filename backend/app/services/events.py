@@ -0,0 +1,124 @@
+
+import asyncio
+import contextvars
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Set
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class Subscription:
+    """One open event stream: a bounded queue of encoded SSE frames"""
+    __slots__ = ("user_id", "queue", "dropped")
+
+    def __init__(self, user_id: str, size: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.dropped = 0
+
+    def put(self, frame: bytes):
+        # A stalled device loses its oldest frames, never holds up the others;
+        # summaries carry absolute totals, so the newest one is what matters
+        while True:
+            try:
+                self.queue.put_nowait(frame)
+                return
+            except asyncio.QueueFull:
+                self.queue.get_nowait()
+                self.dropped += 1
+                metrics.inc("akilo_events_dropped_total")
+
+def encode_event(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, default=str, separators=(',', ':'))}\n\n".encode()
+
+class EventBroker:
+    """Per-user fan-out of change events to that user's open streams.
+
+    Process-local: a write reaches the devices connected to the same
+    worker. With several workers behind a load balancer this needs a
+    shared bus (e.g. Redis pub/sub) feeding `publish`.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def has_subscribers(self, user_id: str) -> bool:
+        return user_id in self._subscribers
+
+    def subscriber_count(self, user_id: Optional[str] = None) -> int:
+        if user_id is not None:
+            return len(self._subscribers.get(user_id, ()))
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def subscribe(self, user_id: str) -> Optional[Subscription]:
+        """A new subscription, or None if the user already has EVENTS_MAX_PER_USER open"""
+        if self.subscriber_count(user_id) >= settings.EVENTS_MAX_PER_USER:
+            return None
+        sub = Subscription(user_id, settings.EVENTS_QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(sub)
+        metrics.inc("akilo_event_streams_opened_total")
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        subs = self._subscribers.get(sub.user_id)
+        if subs is None or sub not in subs:
+            return
+        subs.discard(sub)
+        metrics.inc("akilo_event_streams_closed_total")
+        if not subs:
+            del self._subscribers[sub.user_id]
+
+    def publish(self, user_id: str, event: str, data: dict) -> int:
+        """Queue an event on every stream of the user; returns how many got it"""
+        subs = self._subscribers.get(user_id)
+        if not subs:
+            return 0
+        frame = encode_event(event, data)
+        for sub in subs:
+            sub.put(frame)
+        metrics.inc("akilo_events_delivered_total", len(subs), event=event)
+        return len(subs)
+
+broker = EventBroker()
+
+class SummaryPublisher:
+    """Recomputes and publishes a user's day totals after writes, off the request path.
+
+    Dates touched while a refresh is running are collected and refreshed
+    together afterwards, one at a time per user, so a burst of writes
+    costs one rollup read per day and summaries go out in order.
+    """
+
+    def __init__(self, load: Callable[..., Awaitable[dict]]):
+        self.load = load
+        self._pending: Dict[str, Dict[str, object]] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+
+    def schedule(self, client, user_id: str, day: str):
+        if not broker.has_subscribers(user_id):
+            return
+        # The latest writer's client is as good as any: all see the same user's rows
+        self._pending.setdefault(user_id, {})[day] = client
+        if user_id not in self._workers:
+            # Started in an empty context: the worker outlives the request that scheduled it,
+            # and its reads and log lines must not count towards that request's trace or id
+            self._workers[user_id] = contextvars.Context().run(asyncio.create_task, self._drain(user_id))
+
+    async def _drain(self, user_id: str):
+        try:
+            while self._pending.get(user_id):
+                pending = self._pending.pop(user_id)
+                for day, client in pending.items():
+                    if not broker.has_subscribers(user_id):
+                        return
+                    try:
+                        data = await self.load(client, day)
+                    except Exception as e:
+                        logger.warning("Summary push failed: %s", e)
+                        continue
+                    broker.publish(user_id, "summary", data)
+        finally:
+            self._pending.pop(user_id, None)
+            self._workers.pop(user_id, None)
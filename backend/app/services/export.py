@@ -0,0 +1,77 @@
+
+import logging
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, List, Tuple
+from postgrest import AsyncPostgrestClient as AsyncClient
+from app.core.config import settings
+from app.services.logs import FOOD_LOG_COLUMNS, keyset_filter
+
+logger = logging.getLogger(__name__)
+
+# (table, record type, columns, keyset) in export order
+EXPORT_TABLES = [
+    ("food_logs", "food", FOOD_LOG_COLUMNS, ("date", "created_at", "id")),
+    ("water_logs", "water", "id, date, amount_ml, created_at", ("date", "created_at", "id")),
+    ("weight_logs", "weight", "id, date, weight_kg, created_at", ("date", "id")),
+]
+
+CSV_FIELDS = [
+    "type", "id", "date", "meal_type", "food_source", "food_master_id", "food_custom_id",
+    "food_name", "qty", "calories", "protein_g", "carbs_g", "fats_g", "amount_ml", "weight_kg", "created_at",
+]
+
+async def iter_pages(client: AsyncClient, table: str, columns: str, keys: Tuple[str, ...]) -> AsyncIterator[List[dict]]:
+    """Pages of a table in key order; each page resumes after the previous page's last key"""
+    last = None
+    page_size = settings.EXPORT_PAGE_SIZE
+    while True:
+        query = client.table(table).select(columns)
+        if last is not None:
+            query = query.or_(keyset_filter(keys, tuple(str(last[k]) for k in keys), "gt"))
+        for key in keys:
+            query = query.order(key)
+        res = await query.limit(page_size).execute()
+        rows = res.data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        last = rows[-1]
+
+def _csv_chunk(rows: List[dict], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+async def export_rows(client: AsyncClient, fmt: str) -> AsyncIterator[str]:
+    """The user's food, water and weight logs as CSV or NDJSON text chunks, one page at a time"""
+    if fmt == "csv":
+        yield _csv_chunk([], header=True)
+    for table, kind, columns, keys in EXPORT_TABLES:
+        try:
+            async for rows in iter_pages(client, table, columns, keys):
+                rows = [{"type": kind, **row} for row in rows]
+                if fmt == "csv":
+                    yield _csv_chunk(rows)
+                else:
+                    yield "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows)
+        except Exception as e:
+            # Headers are already sent: leave a marker where the format allows one,
+            # then re-raise so the response is aborted rather than ending like a complete file
+            logger.error("Export %s error: %s", table, e)
+            if fmt == "ndjson":
+                yield json.dumps({"type": "error", "table": table}) + "\n"
+            raise
+
+async def gzip_stream(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        # Sync flush so each page reaches the client instead of sitting in the compressor
+        yield compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
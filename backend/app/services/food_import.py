@@ -0,0 +1,204 @@
+
+import csv
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from postgrest.types import ReturnMethod
+from app.models.schemas import FoodCreate
+from app.services.food_index import normalize, fetch_master_foods, FOOD_COLUMNS
+
+FOOD_FIELDS = ("name", "unit_type", "base_qty", "calories", "protein_g", "carbs_g", "fats_g")
+# Whole rows plus their key: backfill upserts them back on id
+KEYED_FOOD_COLUMNS = f"{FOOD_COLUMNS}, name_key"
+
+def _open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+def read_rows(path: str) -> Iterator[dict]:
+    """Stream raw rows from a CSV or NDJSON file (optionally .gz)"""
+    base = path[:-3] if path.endswith(".gz") else path
+    with _open_text(path) as f:
+        if base.endswith((".ndjson", ".jsonl")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+def validate_chunk(rows: List[dict]) -> Tuple[List[dict], List[Tuple[int, str]]]:
+    """Valid foods_master rows and (position, error) rejects for one chunk"""
+    valid, rejects = [], []
+    for i, raw in enumerate(rows):
+        try:
+            food = FoodCreate(**{k: raw.get(k) for k in FOOD_FIELDS})
+        except ValidationError as e:
+            rejects.append((i, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())))
+            continue
+        key = normalize(food.name)
+        if not key:
+            rejects.append((i, "name: no letters or digits"))
+            continue
+        valid.append({**food.model_dump(), "name": food.name.strip(), "name_key": key})
+    return valid, rejects
+
+class ImportCheckpoint:
+    """Source rows already written, kept next to the input so a rerun resumes"""
+
+    def __init__(self, path: str):
+        self.path = path + ".progress.json"
+
+    def load(self) -> int:
+        try:
+            with open(self.path) as f:
+                return int(json.load(f)["rows_done"])
+        except (FileNotFoundError, ValueError, KeyError):
+            return 0
+
+    def save(self, rows_done: int):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"rows_done": rows_done}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.skipped = 0
+        self.upserted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.started = time.perf_counter()
+
+    def report(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "read": self.read,
+            "resumed_past": self.skipped,
+            "upserted": self.upserted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "seconds": round(elapsed, 2),
+            "rows_per_second": round(self.read / elapsed) if elapsed else 0,
+        }
+
+def backfill_name_keys(client) -> int:
+    """Key existing rows (e.g. the seed data) so imports dedupe against them.
+
+    Rows whose key is already taken are left unkeyed rather than failing.
+    """
+    foods = fetch_master_foods(client, KEYED_FOOD_COLUMNS)
+    taken = {food["name_key"] for food in foods if food.get("name_key")}
+    updates = []
+    for food in foods:
+        key = normalize(food["name"])
+        if food.get("name_key") or not key or key in taken:
+            continue
+        taken.add(key)
+        updates.append({**food, "name_key": key})
+    if updates:
+        client.table("foods_master")\
+            .upsert(updates, on_conflict="id", returning=ReturnMethod.minimal)\
+            .execute()
+    return len(updates)
+
+def import_foods(
+    client,
+    path: str,
+    batch_size: int = 5000,
+    resume: bool = True,
+    rejects_path: Optional[str] = None,
+    dry_run: bool = False,
+    progress=None,
+) -> dict:
+    """Validate, dedupe and upsert a food catalog file into foods_master.
+
+    Batches are upserted on name_key, so replaying a batch after an
+    interruption is harmless. The checkpoint only advances once a batch
+    is written; validation of the next batch overlaps with the upload.
+    On resume, the rows before the checkpoint are re-read for their keys
+    so later duplicates are dropped just as in an uninterrupted run.
+    """
+    checkpoint = ImportCheckpoint(path)
+    start_at = checkpoint.load() if resume else 0
+    stats = ImportStats()
+    seen = set()
+    rejects = open(rejects_path, "a" if start_at else "w") if rejects_path else None
+
+    def upload(rows: List[dict], rows_done: int):
+        if not dry_run and rows:
+            client.table("foods_master")\
+                .upsert(rows, on_conflict="name_key", returning=ReturnMethod.minimal)\
+                .execute()
+        if not dry_run:
+            checkpoint.save(rows_done)
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    pending = None
+    try:
+        chunk: List[dict] = []
+        done: List[dict] = []
+        position = 0
+
+        def wait_pending():
+            nonlocal pending
+            if pending is not None:
+                future, size = pending
+                future.result()
+                stats.upserted += size
+                pending = None
+
+        def flush():
+            nonlocal pending, chunk
+            valid, bad = validate_chunk(chunk)
+            first_line = position - len(chunk)
+            for i, error in bad:
+                if rejects:
+                    rejects.write(json.dumps({"row": first_line + i + 1, "error": error, "data": chunk[i]}) + "\n")
+            stats.rejected += len(bad)
+            batch = []
+            for row in valid:
+                if row["name_key"] in seen:
+                    stats.duplicates += 1
+                    continue
+                seen.add(row["name_key"])
+                batch.append(row)
+            # At most one batch in flight, so checkpoints land in order
+            wait_pending()
+            pending = (pool.submit(upload, batch, position), len(batch))
+            chunk = []
+            if progress:
+                progress(stats)
+
+        for raw in read_rows(path):
+            position += 1
+            if position <= start_at:
+                stats.skipped += 1
+                done.append(raw)
+                if len(done) >= batch_size or position == start_at:
+                    seen.update(row["name_key"] for row in validate_chunk(done)[0])
+                    done = []
+                continue
+            stats.read += 1
+            chunk.append(raw)
+            if len(chunk) >= batch_size:
+                flush()
+        if chunk:
+            flush()
+        wait_pending()
+        if not dry_run:
+            checkpoint.clear()
+    finally:
+        pool.shutdown(wait=True)
+        if rejects:
+            rejects.close()
+    return stats.report()
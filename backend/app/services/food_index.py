@@ -0,0 +1,231 @@
+
+import logging
+import re
+import threading
+import unicodedata
+import numpy as np
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.db.supabase import create_user_client
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# Match weights per query token
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.6
+FUZZY_WEIGHT = 0.6
+MIN_FUZZY_SIMILARITY = 0.35
+MAX_PREFIX_EXPANSIONS = 200
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_DEPTH = 200
+# What a food looks like in API responses (custom foods add user_id)
+FOOD_COLUMNS = "id, name, unit_type, base_qty, calories, protein_g, carbs_g, fats_g"
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation to single spaces"""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+def trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class FoodSearchIndex:
+    """Immutable in-memory search index over food rows (foods_master, or one user's foods_custom).
+
+    Supports exact token, prefix and trigram (typo-tolerant) matching.
+    Every query token must match; results are ranked by match quality,
+    then by shorter name. Scoring runs on dense NumPy arrays so a cold
+    query over a large catalog stays well under a millisecond. Scores
+    don't depend on the catalog, so two indexes' results can be merged.
+    """
+
+    def __init__(self, foods: List[dict]):
+        names = [normalize(food.get("name", "")) for food in foods]
+        # Doc ids follow the static rank (shorter name first), so ties break on id
+        order = sorted(range(len(foods)), key=lambda i: (len(names[i]), names[i]))
+        self.foods = [foods[i] for i in order]
+        self._names = [names[i] for i in order]
+
+        postings: Dict[str, List[int]] = {}
+        for doc_id, name in enumerate(self._names):
+            for token in set(name.split()):
+                postings.setdefault(token, []).append(doc_id)
+        self._vocab = sorted(postings)
+        self._postings = {token: np.asarray(ids, dtype=np.int32) for token, ids in postings.items()}
+
+        self._trigrams: Dict[str, List[str]] = {}
+        for token in self._vocab:
+            for tri in trigrams(token):
+                self._trigrams.setdefault(tri, []).append(token)
+
+        # Position of each doc's first token in the vocab and of its name in
+        # sorted order, so "starts with" bonuses become range checks
+        vocab_pos = {token: i for i, token in enumerate(self._vocab)}
+        self._first_token_pos = np.array(
+            [vocab_pos[name.split()[0]] if name else -1 for name in self._names], dtype=np.int32
+        )
+        self._sorted_names = sorted(self._names)
+        name_pos = np.empty(len(self._names), dtype=np.int32)
+        name_pos[np.array(sorted(range(len(self._names)), key=self._names.__getitem__), dtype=np.int64)] = \
+            np.arange(len(self._names), dtype=np.int32)
+        self._name_pos = name_pos
+
+        self._query_cache: "OrderedDict[str, Tuple[List[int], List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.foods)
+
+    def _prefix_range(self, values: List[str], prefix: str):
+        lo = bisect_left(values, prefix)
+        return lo, bisect_left(values, prefix + "\uffff", lo)
+
+    def _expand(self, token: str) -> Dict[str, float]:
+        """Vocabulary tokens matching a query token, with their weights"""
+        matches: Dict[str, float] = {}
+        lo, hi = self._prefix_range(self._vocab, token)
+        for candidate in self._vocab[lo:min(hi, lo + MAX_PREFIX_EXPANSIONS)]:
+            if candidate == token:
+                matches[candidate] = EXACT_WEIGHT
+            else:
+                # Closer to the full word ranks higher
+                matches[candidate] = PREFIX_WEIGHT * (0.5 + 0.5 * len(token) / len(candidate))
+        if not matches and len(token) >= 3:
+            query_tris = trigrams(token)
+            shared = Counter()
+            for tri in query_tris:
+                shared.update(self._trigrams.get(tri, ()))
+            for candidate, count in shared.items():
+                similarity = count / (len(query_tris) + len(candidate) + 1 - count)
+                if similarity >= MIN_FUZZY_SIMILARITY:
+                    matches[candidate] = FUZZY_WEIGHT * similarity
+        return matches
+
+    def _rank(self, query: str, depth: int = QUERY_CACHE_DEPTH) -> Tuple[List[int], List[float]]:
+        """Doc ids of the best `depth` matches, best first, with their scores"""
+        tokens = query.split()
+        if not tokens:
+            ids = list(range(min(depth, len(self.foods))))
+            return ids, [0.0] * len(ids)
+
+        n = len(self.foods)
+        total = np.zeros(n, dtype=np.float32)
+        matched = None
+        for token in tokens:
+            expansions = self._expand(token)
+            if not expansions:
+                return [], []
+            scores = np.zeros(n, dtype=np.float32)
+            for candidate, weight in expansions.items():
+                ids = self._postings[candidate]
+                scores[ids] = np.maximum(scores[ids], weight)
+            total += scores
+            hit = scores > 0
+            matched = hit if matched is None else matched & hit
+
+        # Every query token must match
+        candidates = np.flatnonzero(matched)
+        if not len(candidates):
+            return [], []
+        score = total[candidates]
+
+        lo, hi = self._prefix_range(self._sorted_names, query)
+        name_pos = self._name_pos[candidates]
+        score += np.where((name_pos >= lo) & (name_pos < hi), 0.3, 0.0)
+        if lo < hi and self._sorted_names[lo] == query:
+            score += np.where(name_pos == lo, 0.5, 0.0)
+        lo, hi = self._prefix_range(self._vocab, tokens[0])
+        first = self._first_token_pos[candidates]
+        score += np.where((first >= lo) & (first < hi), 0.2, 0.0)
+
+        if len(candidates) > depth:
+            top = np.argpartition(-score, depth - 1)[:depth]
+            candidates, score = candidates[top], score[top]
+        # Best score first; lower doc id (shorter name) breaks ties
+        order = np.lexsort((candidates, -score))
+        return candidates[order].tolist(), score[order].tolist()
+
+    def _ranked(self, q: str, needed: int) -> Tuple[List[int], List[float]]:
+        query = normalize(q)
+        with self._lock:
+            ranked = self._query_cache.get(query)
+            if ranked is not None:
+                self._query_cache.move_to_end(query)
+        if ranked is None:
+            ranked = self._rank(query)
+            with self._lock:
+                self._query_cache[query] = ranked
+                if len(self._query_cache) > QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+        if needed > len(ranked[0]) and len(ranked[0]) == QUERY_CACHE_DEPTH:
+            # Deep pages fall outside the cached window; rank without truncation
+            ranked = self._rank(query, depth=len(self.foods))
+        return ranked
+
+    def search(self, q: str, offset: int = 0, limit: int = 20) -> List[dict]:
+        """Ranked foods matching `q`, paginated with offset/limit"""
+        ids, _ = self._ranked(q, offset + limit)
+        return [self.foods[doc_id] for doc_id in ids[offset:offset + limit]]
+
+    def search_scored(self, q: str, limit: int) -> List[Tuple[dict, float]]:
+        """The best `limit` foods matching `q` with their scores, for merging with another index"""
+        ids, scores = self._ranked(q, limit)
+        return [(self.foods[doc_id], score) for doc_id, score in zip(ids[:limit], scores[:limit])]
+
+# Process-wide index, swapped atomically on refresh
+_index: Optional[FoodSearchIndex] = None
+_refresh_stop = threading.Event()
+_refresh_thread: Optional[threading.Thread] = None
+
+def get_food_index() -> Optional[FoodSearchIndex]:
+    return _index
+
+def fetch_master_foods(client=None, columns: str = FOOD_COLUMNS) -> List[dict]:
+    """Page through the whole foods_master catalog, selecting `columns`"""
+    client = client or create_user_client()
+    page_size = settings.FOOD_INDEX_PAGE_SIZE
+    foods: List[dict] = []
+    while True:
+        res = client.table("foods_master").select(columns)\
+            .order("id")\
+            .range(len(foods), len(foods) + page_size - 1)\
+            .execute()
+        rows = res.data or []
+        foods.extend(rows)
+        if len(rows) < page_size:
+            return foods
+
+def load_food_index(client=None) -> FoodSearchIndex:
+    """Rebuild the index from foods_master and swap it in"""
+    global _index
+    _index = FoodSearchIndex(fetch_master_foods(client))
+    return _index
+
+def _refresh_loop(interval: float):
+    while not _refresh_stop.wait(interval):
+        try:
+            load_food_index()
+        except Exception as e:
+            logger.error("Food index refresh error: %s", e)
+
+def start_food_index(interval: Optional[float] = None, load_now: bool = True):
+    """Load the index (unless the caller does it) and keep refreshing it in the background"""
+    global _refresh_thread
+    if load_now:
+        try:
+            load_food_index()
+        except Exception as e:
+            # Search falls back to the database until a refresh succeeds
+            logger.error("Food index load error: %s", e)
+    interval = interval or settings.FOOD_INDEX_REFRESH_SECONDS
+    _refresh_stop.clear()
+    _refresh_thread = threading.Thread(target=_refresh_loop, args=(interval,), daemon=True)
+    _refresh_thread.start()
+
+def stop_food_index():
+    _refresh_stop.set()
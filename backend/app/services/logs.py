@@ -0,0 +1,106 @@
+
+import logging
+import asyncio
+import base64
+from typing import List, Optional, Tuple
+from postgrest import AsyncPostgrestClient as AsyncClient
+from app.models.schemas import FoodLogCreate, WaterLogCreate, WeightLogCreate
+
+logger = logging.getLogger(__name__)
+
+def food_log_row(log: FoodLogCreate, user_id: Optional[str] = None) -> dict:
+    """Row for food_logs from a validated payload"""
+    data = log.dict()
+    if user_id:
+        data['user_id'] = user_id
+    data['date'] = str(data['date'])
+    
+    # Ensure food_source is set
+    if not data.get('food_source'):
+        data['food_source'] = 'master'
+    
+    # Convert UUID fields to strings if they exist
+    data['food_master_id'] = str(data['food_master_id']) if data.get('food_master_id') else None
+    data['food_custom_id'] = str(data['food_custom_id']) if data.get('food_custom_id') else None
+    return data
+
+def water_log_row(log: WaterLogCreate, user_id: str) -> dict:
+    data = log.dict()
+    data['user_id'] = user_id
+    data['date'] = str(data['date'])
+    return data
+
+def weight_log_row(log: WeightLogCreate, user_id: str) -> dict:
+    data = log.dict()
+    data['user_id'] = user_id
+    data['date'] = str(data['date'])
+    return data
+
+async def bulk_insert(client: AsyncClient, table: str, rows: List[dict], upsert_on: Optional[str] = None) -> List[dict]:
+    """Insert rows in one call; on failure retry each row alone to isolate bad ones.
+
+    Returns one result per input row, in order: {"status": "ok", "data": row}
+    or {"status": "error", "error": message}.
+    """
+    if not rows:
+        return []
+
+    def write(payload):
+        query = client.table(table)
+        if upsert_on:
+            return query.upsert(payload, on_conflict=upsert_on).execute()
+        return query.insert(payload).execute()
+
+    try:
+        res = await write(rows)
+        data = res.data or []
+        # PostgREST returns written rows in input order
+        return [{"status": "ok", "data": data[i] if i < len(data) else None} for i in range(len(rows))]
+    except Exception as e:
+        if len(rows) == 1:
+            return [{"status": "error", "error": str(e)}]
+        logger.warning("Bulk %s write failed, retrying rows individually: %s", table, e)
+
+    async def one(row):
+        try:
+            res = await write(row)
+            return {"status": "ok", "data": res.data[0] if res.data else row}
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
+
+    return list(await asyncio.gather(*(one(row) for row in rows)))
+
+# Columns log reads return (user_id and updated_at are left out)
+FOOD_LOG_COLUMNS = "id, date, meal_type, food_source, food_master_id, food_custom_id, food_name, qty, calories, protein_g, carbs_g, fats_g, created_at"
+WATER_LOG_COLUMNS = "id, date, amount_ml, created_at"
+WEIGHT_LOG_COLUMNS = "id, date, weight_kg, created_at"
+
+def encode_log_cursor(row: dict) -> str:
+    """Opaque keyset cursor after `row` in (date, created_at, id) order"""
+    raw = f"{row['date']}|{row['created_at']}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_log_cursor(cursor: str) -> Tuple[str, str, str]:
+    """Inverse of encode_log_cursor; raises ValueError on malformed input"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except Exception:
+        raise ValueError("Malformed cursor")
+    parts = raw.split("|")
+    if len(parts) != 3 or not all(parts):
+        raise ValueError("Malformed cursor")
+    return parts[0], parts[1], parts[2]
+
+def keyset_filter(keys: Tuple[str, ...], values: Tuple[str, ...], op: str = "lt") -> str:
+    """PostgREST `or` filter for rows strictly after (gt) or before (lt) a composite key"""
+    values = tuple(f'"{v}"' for v in values)
+    branches = []
+    for i, key in enumerate(keys):
+        equal = [f"{k}.eq.{v}" for k, v in zip(keys[:i], values[:i])]
+        condition = f"{key}.{op}.{values[i]}"
+        branches.append(f"and({','.join(equal + [condition])})" if equal else condition)
+    return ",".join(branches)
+
+def keyset_before(date: str, created_at: str, log_id: str) -> str:
+    """Rows before a history cursor, newest first"""
+    return keyset_filter(("date", "created_at", "id"), (date, created_at, log_id), "lt")
@@ -0,0 +1,132 @@
+
+import re
+import asyncio
+from typing import Dict, List, Set, Tuple
+from pydantic import ValidationError
+from postgrest import AsyncPostgrestClient as AsyncClient
+from app.models.schemas import QueuedMutation, FoodLogCreate, WaterLogCreate, WeightLogCreate
+from app.services.logs import food_log_row, water_log_row, weight_log_row, bulk_insert
+from app.core.cache import response_cache, RECENT, ANALYTICS
+from app.services.weight_history import weight_history
+from app.services.custom_foods import custom_foods
+
+FOOD_LOG = re.compile(r"^/api/food/log/?$")
+FOOD_LOG_ID = re.compile(r"^/api/food/log/([0-9a-fA-F-]{36})/?$")
+WATER_LOG = re.compile(r"^/api/water/?$")
+WEIGHT_LOG = re.compile(r"^/api/weight/?$")
+
+class _Plan:
+    """Mutations grouped into bulk operations, remembering each item's position"""
+
+    def __init__(self):
+        self.food_inserts: List[tuple] = []      # (index, row)
+        self.water_inserts: List[tuple] = []     # (index, row)
+        self.weight_upserts: Dict[str, tuple] = {}  # date -> (index, row), last write wins
+        self.food_updates: Dict[str, tuple] = {}    # log id -> (index, row), last write wins
+        self.food_deletes: Dict[str, int] = {}      # log id -> index
+        # Change event -> dates whose rows were written, for the live streams
+        self.touched: Dict[str, Set[str]] = {"food_log": set(), "water_log": set(), "weight_log": set()}
+
+def _plan(mutations: List[QueuedMutation], user_id: str, results: list) -> _Plan:
+    plan = _Plan()
+    for i, m in enumerate(mutations):
+        try:
+            if m.method == "POST" and FOOD_LOG.match(m.endpoint):
+                plan.food_inserts.append((i, food_log_row(FoodLogCreate(**(m.body or {})), user_id)))
+            elif m.method == "POST" and WATER_LOG.match(m.endpoint):
+                plan.water_inserts.append((i, water_log_row(WaterLogCreate(**(m.body or {})), user_id)))
+            elif m.method == "POST" and WEIGHT_LOG.match(m.endpoint):
+                row = weight_log_row(WeightLogCreate(**(m.body or {})), user_id)
+                previous = plan.weight_upserts.get(row["date"])
+                if previous:
+                    results[previous[0]] = {"status": "superseded"}
+                plan.weight_upserts[row["date"]] = (i, row)
+            elif m.method in ("PUT", "DELETE") and FOOD_LOG_ID.match(m.endpoint):
+                log_id = FOOD_LOG_ID.match(m.endpoint).group(1)
+                if log_id in plan.food_deletes:
+                    results[i] = {"status": "skipped", "error": "Food log was deleted earlier in the batch"}
+                    continue
+                previous = plan.food_updates.pop(log_id, None)
+                if previous:
+                    results[previous[0]] = {"status": "superseded"}
+                if m.method == "PUT":
+                    plan.food_updates[log_id] = (i, food_log_row(FoodLogCreate(**(m.body or {})), user_id))
+                else:
+                    plan.food_deletes[log_id] = i
+            else:
+                results[i] = {"status": "unsupported", "error": f"{m.method} {m.endpoint} cannot be replayed in bulk"}
+        except ValidationError as e:
+            results[i] = {"status": "invalid", "error": str(e)}
+    return plan
+
+async def _apply_updates(client: AsyncClient, updates: Dict[str, tuple], results: list, touched: Set[str]):
+    if not updates:
+        return
+    # Upsert on id would re-create rows deleted on another device; only touch rows that still exist
+    res = await client.table("food_logs").select("id, date").in_("id", list(updates)).execute()
+    existing = {row["id"]: row["date"] for row in res.data or []}
+    rows = []
+    for log_id, (i, row) in updates.items():
+        if log_id in existing:
+            rows.append((i, {**row, "id": log_id}))
+        else:
+            results[i] = {"status": "not_found"}
+    outcomes = await bulk_insert(client, "food_logs", [row for _, row in rows], upsert_on="id")
+    for (i, row), outcome in zip(rows, outcomes):
+        results[i] = outcome
+        if outcome["status"] == "ok":
+            # An edit can move a log to another day; both days' totals change
+            touched.update((existing[row["id"]], row["date"]))
+
+async def _apply_deletes(client: AsyncClient, deletes: Dict[str, int], results: list, touched: Set[str]):
+    if not deletes:
+        return
+    try:
+        res = await client.table("food_logs").delete().in_("id", list(deletes)).execute()
+        touched.update(row["date"] for row in res.data or [])
+        outcome = {"status": "ok", "data": {"deleted": True}}
+    except Exception as e:
+        outcome = {"status": "error", "error": str(e)}
+    for i in deletes.values():
+        results[i] = dict(outcome)
+
+async def _apply_inserts(client: AsyncClient, table: str, items: List[tuple], results: list, touched: Set[str], upsert_on: str = None):
+    outcomes = await bulk_insert(client, table, [row for _, row in items], upsert_on=upsert_on)
+    for (i, row), outcome in zip(items, outcomes):
+        results[i] = outcome
+        if outcome["status"] == "ok":
+            touched.add(row["date"])
+
+async def replay_mutations(client: AsyncClient, user_id: str, mutations: List[QueuedMutation]) -> Tuple[List[dict], Dict[str, Set[str]]]:
+    """Replay an ordered offline queue as a handful of bulk writes.
+
+    Later writes to the same food log or weight date supersede earlier ones,
+    and each table's writes go out as one call, all tables concurrently.
+    Returns one result per mutation, in input order, and the dates written
+    per change event (food_log, water_log, weight_log).
+    """
+    results: List[dict] = [None] * len(mutations)
+    plan = _plan(mutations, user_id, results)
+    touched = plan.touched
+
+    await asyncio.gather(
+        _apply_inserts(client, "food_logs", plan.food_inserts, results, touched["food_log"]),
+        _apply_inserts(client, "water_logs", plan.water_inserts, results, touched["water_log"]),
+        _apply_inserts(client, "weight_logs", list(plan.weight_upserts.values()), results, touched["weight_log"], upsert_on="user_id,date"),
+        _apply_updates(client, plan.food_updates, results, touched["food_log"]),
+        _apply_deletes(client, plan.food_deletes, results, touched["food_log"]),
+    )
+
+    food_changed = plan.food_inserts or plan.food_updates or plan.food_deletes
+    if food_changed:
+        await response_cache.invalidate(user_id, RECENT, ANALYTICS)
+        custom_foods.forget(user_id)
+    elif plan.water_inserts or plan.weight_upserts:
+        await response_cache.invalidate(user_id, ANALYTICS)
+    if plan.weight_upserts:
+        weight_history.forget(user_id)
+
+    return [
+        {"id": m.id, **(result or {"status": "error", "error": "Not processed"})}
+        for m, result in zip(mutations, results)
+    ], touched
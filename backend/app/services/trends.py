@@ -0,0 +1,196 @@
+
+import numpy as np
+from datetime import date, timedelta
+from typing import List, Optional
+
+METRICS = ("calories", "protein", "carbs", "fats", "water")
+ADHERENCE_METRICS = ("calories", "protein", "water")
+ROLLING_WINDOWS = (7, 30)
+RESOLUTIONS = ("day", "week", "month")
+
+# A logged day counts towards calorie adherence within this share of target
+CALORIE_TOLERANCE = 0.10
+# Smoothing factor of the weight trend line (per day)
+WEIGHT_SMOOTHING = 0.1
+
+class DailySeries:
+    """Dense per-day columns for one user over [origin, end].
+
+    Food and water are logged separately, so `logged` has one row per
+    metric: food metrics count days with a food entry, water days with a
+    water log. Unlogged days are zero and excluded from that metric's
+    averages. Weight is NaN on days without a weigh-in.
+    """
+
+    def __init__(self, rows: List[dict], origin: date, end: date):
+        self.origin = origin
+        n = (end - origin).days + 1
+        self.values = np.zeros((len(METRICS), n), dtype=np.float64)
+        self.food_logged = np.zeros(n, dtype=bool)
+        self.water_logged = np.zeros(n, dtype=bool)
+        self.weight = np.full(n, np.nan)
+        if not rows:
+            return
+
+        idx = (np.array([row["date"] for row in rows], dtype="datetime64[D]") - np.datetime64(origin)).astype(np.int64)
+        keep = (idx >= 0) & (idx < n)
+        columns = ("calories", "protein_g", "carbs_g", "fats_g", "water_ml")
+        raw = np.array([[row[c] or 0 for c in columns] for row in rows], dtype=np.float64)
+        self.values[:, idx[keep]] = raw[keep].T
+        entries = np.array([row.get("entries", 1) or 0 for row in rows])
+        self.food_logged[idx[keep]] = entries[keep] > 0
+        self.water_logged[idx[keep]] = raw[keep, METRICS.index("water")] > 0
+        weights = np.array([row.get("weight_kg") for row in rows], dtype=np.float64)
+        self.weight[idx[keep]] = weights[keep]
+
+    @property
+    def logged(self) -> np.ndarray:
+        """Per-metric mask of logged days, aligned with `values`"""
+        return np.vstack([self.water_logged if metric == "water" else self.food_logged for metric in METRICS])
+
+    @property
+    def any_logged(self) -> np.ndarray:
+        return self.food_logged | self.water_logged
+
+    def __len__(self) -> int:
+        return self.values.shape[1]
+
+def rolling_means(values: np.ndarray, logged: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over the last `window` days, counting only logged days (NaN if none)"""
+    sums = np.cumsum(values * logged, axis=-1)
+    counts = np.cumsum(logged, axis=-1)
+    sums[..., window:] = sums[..., window:] - sums[..., :-window].copy()
+    counts[..., window:] = counts[..., window:] - counts[..., :-window].copy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+def smoothed_weight(day_idx: np.ndarray, weights: np.ndarray, initial: Optional[float] = None, initial_day: Optional[int] = None) -> np.ndarray:
+    """Exponentially smoothed weight at each weigh-in, decayed by the gap in days.
+
+    `initial`/`initial_day` continue a line that ended before `day_idx[0]`.
+    """
+    trend = np.empty_like(weights)
+    if not len(weights):
+        return trend
+    previous = day_idx[0] if initial_day is None else initial_day
+    decay = 1.0 - (1.0 - WEIGHT_SMOOTHING) ** np.diff(day_idx, prepend=previous)
+    current = weights[0] if initial is None else initial
+    for i in range(len(weights)):
+        current += decay[i] * (weights[i] - current)
+        trend[i] = current
+    return trend
+
+def bucket_ids(days: np.ndarray, resolution: str) -> np.ndarray:
+    """Bucket number of each datetime64[D] day (weeks start on Monday)"""
+    if resolution == "day":
+        return days.astype(np.int64)
+    if resolution == "week":
+        # Day 0 of the epoch is a Thursday
+        return (days.astype(np.int64) + 3) // 7
+    return days.astype("datetime64[M]").astype(np.int64)
+
+def _num(value: float, digits: int = 1) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), digits)
+
+def _column(values: np.ndarray, digits: int = 1) -> list:
+    """Rounded values as plain floats, NaN as None"""
+    return [None if v != v else v for v in np.round(values, digits).tolist()]
+
+def build_range_stats(rows: List[dict], targets: dict, start: date, end: date, resolution: str = "day") -> dict:
+    """Bucketed intake, rolling averages, adherence and weight trend for [start, end].
+
+    `rows` are daily_summaries rows and may reach back up to 30 days
+    before `start` so the first rolling averages are complete.
+    """
+    origin = start - timedelta(days=max(ROLLING_WINDOWS) - 1)
+    series = DailySeries(rows, origin, end)
+    offset = (start - origin).days
+
+    series_logged = series.logged
+    rolling = {w: rolling_means(series.values, series_logged, w)[:, offset:] for w in ROLLING_WINDOWS}
+    values = series.values[:, offset:]
+    logged = series_logged[:, offset:]
+    any_logged = series.any_logged[offset:]
+    weight = series.weight[offset:]
+    days = np.arange(np.datetime64(start), np.datetime64(end) + 1)
+
+    # Per-day adherence, only meaningful on days that metric was logged
+    calories, protein, water = values[0], values[1], values[4]
+    cal_target = float(targets.get("calories_target") or 0)
+    adherence_logged = logged[[METRICS.index(metric) for metric in ADHERENCE_METRICS]]
+    adherent = np.vstack([
+        np.abs(calories - cal_target) <= CALORIE_TOLERANCE * cal_target,
+        protein >= float(targets.get("protein_target_g") or 0),
+        water >= float(targets.get("water_target_ml") or 0),
+    ]) & adherence_logged
+
+    # Group consecutive days into buckets; bucket ids are sorted, so boundaries are where they change
+    ids = bucket_ids(days, resolution)
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    ends = np.r_[starts[1:], len(days)] - 1
+    group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(days)]))
+
+    def per_bucket(x):
+        return np.stack([np.bincount(group, weights=row, minlength=len(starts)) for row in np.atleast_2d(x)])
+
+    days_logged = per_bucket(any_logged.astype(np.float64))[0]
+    metric_days = per_bucket(logged.astype(np.float64))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = per_bucket(values * logged) / metric_days
+        adherence = per_bucket(adherent.astype(np.float64)) * 100.0 / per_bucket(adherence_logged.astype(np.float64))
+        has_weight = ~np.isnan(weight)
+        weight_means = per_bucket(np.where(has_weight, weight, 0.0))[0] / per_bucket(has_weight.astype(np.float64))[0]
+
+    # Weight trend: smoothed line for display, least-squares slope for the rate
+    weigh_ins = np.flatnonzero(has_weight)
+    trend_line = smoothed_weight(weigh_ins, weight[weigh_ins])
+    last_trend = np.full(len(starts), np.nan)
+    if len(weigh_ins):
+        # Latest smoothed value at or before each bucket's last day
+        pos = np.searchsorted(weigh_ins, ends, side="right") - 1
+        last_trend = np.where(pos >= 0, trend_line[np.maximum(pos, 0)], np.nan)
+    slope = np.nan
+    if len(weigh_ins) >= 2:
+        slope = np.polyfit(weigh_ins.astype(np.float64), weight[weigh_ins], 1)[0]
+
+    # Assemble the JSON from plain lists; per-element NumPy scalars are slow
+    columns = zip(
+        days[starts].astype(str).tolist(),
+        days[ends].astype(str).tolist(),
+        days_logged.astype(int).tolist(),
+        zip(*(_column(row) for row in means)),
+        *(zip(*(_column(row) for row in rolling[w][:, ends])) for w in ROLLING_WINDOWS),
+        zip(*(_column(row) for row in adherence)),
+        _column(weight_means, 2),
+        _column(last_trend, 2),
+    )
+    rolling_keys = [f"rolling_{w}d" for w in ROLLING_WINDOWS]
+    buckets = []
+    for first, last, count, average, *rest in columns:
+        *rolled, adhered, weight_kg, trend_kg = rest
+        bucket = {"start": first, "end": last, "days_logged": count, "average": dict(zip(METRICS, average))}
+        for key, values in zip(rolling_keys, rolled):
+            bucket[key] = dict(zip(METRICS, values))
+        bucket["adherence"] = dict(zip(ADHERENCE_METRICS, adhered))
+        bucket["weight_kg"] = weight_kg
+        bucket["weight_trend_kg"] = trend_kg
+        buckets.append(bucket)
+
+    total_logged = int(any_logged.sum())
+    with np.errstate(invalid="ignore", divide="ignore"):
+        overall = adherent.sum(axis=1) * 100.0 / adherence_logged.sum(axis=1)
+    return {
+        "start": str(start),
+        "end": str(end),
+        "resolution": resolution,
+        "targets": targets,
+        "days_logged": total_logged,
+        "adherence": dict(zip(ADHERENCE_METRICS, _column(overall))),
+        "weight_trend": {
+            "current_kg": _num(trend_line[-1], 2) if len(weigh_ins) else None,
+            "slope_kg_per_week": _num(slope * 7, 3),
+            "change_kg": _num(trend_line[-1] - trend_line[0], 2) if len(weigh_ins) else None,
+            "weigh_ins": int(len(weigh_ins)),
+        },
+        "buckets": buckets,
+    }
@@ -0,0 +1,219 @@
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Optional, Tuple
+import numpy as np
+from postgrest import AsyncPostgrestClient as AsyncClient
+from app.core.config import settings
+from app.services.trends import smoothed_weight, bucket_ids
+
+PAGE_SIZE = 1000
+# Finest first; each keeps every bucket's lightest and heaviest weigh-in
+TIER_RESOLUTIONS = ("week", "month")
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of `threshold` points chosen by Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last point; from each bucket in between, picks the
+    point forming the largest triangle with the previous pick and the
+    next bucket's average, which keeps the peaks and dips a stride drops.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64) + 1
+    # Bucket averages; the last "bucket" is the final point itself
+    counts = np.diff(np.r_[edges, n])
+    avg_x = np.add.reduceat(x, edges) / counts
+    avg_y = np.add.reduceat(y, edges) / counts
+
+    # Buckets hold a handful of points here (tiers see to that), where a
+    # plain loop over lists beats per-bucket NumPy calls by ~10x
+    xs, ys, bounds = x.tolist(), y.tolist(), edges.tolist()
+    avg_x, avg_y = avg_x.tolist(), avg_y.tolist()
+    picked = [0]
+    a = 0
+    for i in range(threshold - 2):
+        ax, ay = xs[a], ys[a]
+        dx, dy = ax - avg_x[i + 1], avg_y[i + 1] - ay
+        best = -1.0
+        for j in range(bounds[i], bounds[i + 1]):
+            area = abs(dx * (ys[j] - ay) - (ax - xs[j]) * dy)
+            if area > best:
+                best, a = area, j
+        picked.append(a)
+    picked.append(n - 1)
+    return np.array(picked, dtype=np.int64)
+
+def extremes(days: np.ndarray, weights: np.ndarray, resolution: str) -> np.ndarray:
+    """Days of the lightest and heaviest weigh-in of every bucket, in date order"""
+    if not len(days):
+        return days
+    ids = bucket_ids(days.astype("datetime64[D]"), resolution)
+    order = np.lexsort((weights, ids))
+    sorted_ids = ids[order]
+    first = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    last = np.r_[first[1:], len(order)] - 1
+    return days[np.unique(np.r_[order[first], order[last]])]
+
+def bucket_span(day: int, resolution: str) -> Tuple[int, int]:
+    """First and last day (epoch days) of the bucket holding `day`"""
+    if resolution == "week":
+        # Day 0 of the epoch is a Thursday; weeks start on Monday
+        first = day - (day + 3) % 7
+        return first, first + 6
+    month = np.datetime64(day, "D").astype("datetime64[M]")
+    return int(month.astype("datetime64[D]").astype(np.int64)), int((month + 1).astype("datetime64[D]").astype(np.int64)) - 1
+
+def _epoch_day(value) -> int:
+    return int(np.datetime64(str(value), "D").astype(np.int64))
+
+class WeightHistory:
+    """One user's weigh-ins (epoch days, sorted) with their trend line and coarser tiers.
+
+    Tiers hold days, not copies of weights, so an upsert only has to
+    rebuild the one bucket per tier that holds the changed day, and the
+    trend line from that day on.
+    """
+
+    def __init__(self, days: np.ndarray, weights: np.ndarray):
+        self.days = days
+        self.weights = weights
+        self.trend = smoothed_weight(days, weights)
+        self.tiers: Dict[str, np.ndarray] = {res: extremes(days, weights, res) for res in TIER_RESOLUTIONS}
+
+    @classmethod
+    def from_rows(cls, rows: list) -> "WeightHistory":
+        rows = [row for row in rows if row.get("weight_kg") is not None]
+        days = np.array([_epoch_day(row["date"]) for row in rows], dtype=np.int64)
+        weights = np.array([float(row["weight_kg"]) for row in rows], dtype=np.float64)
+        order = np.argsort(days, kind="stable")
+        return cls(days[order], weights[order])
+
+    def upsert(self, day: str, weight: float):
+        d = _epoch_day(day)
+        i = int(np.searchsorted(self.days, d))
+        if i < len(self.days) and self.days[i] == d:
+            self.weights[i] = weight
+        else:
+            self.days = np.insert(self.days, i, d)
+            self.weights = np.insert(self.weights, i, weight)
+
+        if i == 0:
+            self.trend = smoothed_weight(self.days, self.weights)
+        else:
+            tail = smoothed_weight(self.days[i:], self.weights[i:], self.trend[i - 1], self.days[i - 1])
+            self.trend = np.r_[self.trend[:i], tail]
+
+        for res, tier in self.tiers.items():
+            first, last = bucket_span(d, res)
+            lo, hi = np.searchsorted(self.days, [first, last + 1])
+            t_lo, t_hi = np.searchsorted(tier, [first, last + 1])
+            self.tiers[res] = np.r_[tier[:t_lo], extremes(self.days[lo:hi], self.weights[lo:hi], res), tier[t_hi:]]
+
+    def query(self, start: Optional[date], end: Optional[date], points: int) -> dict:
+        """About `points` weigh-ins between start and end that keep the chart's shape, with the trend"""
+        lo = 0 if start is None else int(np.searchsorted(self.days, _epoch_day(start)))
+        hi = len(self.days) if end is None else int(np.searchsorted(self.days, _epoch_day(end), side="right"))
+        total = max(hi - lo, 0)
+
+        resolution = "day"
+        idx = np.arange(lo, hi)
+        if total > points:
+            # Start from the coarsest tier that still has enough points, so the
+            # work is a few times `points` however long the history is
+            for res in reversed(TIER_RESOLUTIONS):
+                tier = self.tiers[res]
+                t_lo, t_hi = np.searchsorted(tier, [self.days[lo], self.days[hi - 1] + 1])
+                if t_hi - t_lo >= points:
+                    resolution = res
+                    candidates = np.union1d(tier[t_lo:t_hi], self.days[[lo, hi - 1]])
+                    idx = np.searchsorted(self.days, candidates)
+                    break
+            idx = idx[lttb(self.days[idx].astype(np.float64), self.weights[idx], points)]
+
+        days = self.days[idx].astype("datetime64[D]").astype(str).tolist()
+        weights = np.round(self.weights[idx], 2).tolist()
+        trend = np.round(self.trend[idx], 2).tolist()
+        return {
+            "start": str(start) if start else (days[0] if days else None),
+            "end": str(end) if end else (days[-1] if days else None),
+            "resolution": resolution,
+            "weigh_ins": total,
+            "points": len(days),
+            "series": [{"date": d, "weight_kg": w, "trend_kg": t} for d, w, t in zip(days, weights, trend)],
+            "trend": {
+                "current_kg": round(float(self.trend[hi - 1]), 2) if total else None,
+                "change_kg": round(float(self.trend[hi - 1] - self.trend[lo]), 2) if total else None,
+            },
+        }
+
+async def fetch_weigh_ins(client: AsyncClient) -> list:
+    """All of the user's weigh-ins, oldest first, paged past PostgREST's row limit"""
+    rows = []
+    while True:
+        res = await client.table("weight_logs")\
+            .select("date, weight_kg")\
+            .order("date")\
+            .range(len(rows), len(rows) + PAGE_SIZE - 1)\
+            .execute()
+        page = res.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+
+class WeightHistoryCache:
+    """Per-user WeightHistory, LRU-bounded, kept current by `record` on writes.
+
+    Entries expire after WEIGHT_HISTORY_TTL_SECONDS so writes that went
+    through another worker show up eventually.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[WeightHistory, float]]" = OrderedDict()
+        # Bumped on every write, so a load that raced one isn't stored
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, user_id: str) -> Optional[WeightHistory]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            history, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return history
+
+    async def get(self, client: AsyncClient, user_id: str) -> WeightHistory:
+        history = self._cached(user_id)
+        if history is not None:
+            return history
+        version = self._versions.get(user_id, 0)
+        history = WeightHistory.from_rows(await fetch_weigh_ins(client))
+        with self._lock:
+            if self._versions.get(user_id, 0) == version:
+                self._entries[user_id] = (history, time.monotonic() + settings.WEIGHT_HISTORY_TTL_SECONDS)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > settings.WEIGHT_HISTORY_MAX_USERS:
+                    self._entries.popitem(last=False)
+        return history
+
+    def record(self, user_id: str, day: str, weight: float):
+        """Apply an upserted weigh-in to the cached history, if there is one"""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry[0].upsert(day, weight)
+
+    def forget(self, user_id: str):
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._entries.pop(user_id, None)
+
+weight_history = WeightHistoryCache()
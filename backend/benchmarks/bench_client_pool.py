@@ -0,0 +1,55 @@
+"""Requests/sec with a fresh Supabase client per request vs the shared pool.
+
+Run from backend/:  python -m benchmarks.bench_client_pool [--requests N] [--workers N]
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.postgrest_stub import PostgrestStub
+
+TOKEN = "bench-token"
+
+def run(label, make_client, requests, workers):
+    def one(_):
+        client = make_client()
+        client.table("profiles").select("*").execute()
+
+    one(0)  # warm up
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {requests / elapsed:>10.1f} req/s   {elapsed / requests * 1e3:>7.2f} ms/req")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    with PostgrestStub(rows=[{"id": "00000000-0000-0000-0000-000000000000"}]) as url:
+        os.environ["SUPABASE_URL"] = url
+        os.environ.setdefault("SUPABASE_KEY", "bench-key")
+        os.environ.setdefault("SUPABASE_JWT_SECRET", "bench-secret")
+
+        from supabase import create_client
+        from app.core.config import settings
+        from app.db.supabase import init_pool, close_pool, create_user_client
+
+        def per_request_client():
+            client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+            client.postgrest.auth(TOKEN)
+            return client
+
+        run("create_client per request", per_request_client, args.requests, args.workers)
+        init_pool()
+        try:
+            run("shared pool", lambda: create_user_client(TOKEN), args.requests, args.workers)
+        finally:
+            asyncio.run(close_pool())
+
+if __name__ == "__main__":
+    main()
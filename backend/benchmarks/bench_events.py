@@ -0,0 +1,181 @@
+"""Event stream fan-out: many idle subscribers on one worker.
+
+Starts a real uvicorn worker against `fake_postgrest` (httpx's ASGI
+transport doesn't stream), opens --subscribers idle `/api/events`
+streams over raw sockets (two devices per user) and reports:
+- worker RSS per open stream
+- write latency (POST /api/food/log) with no streams vs. all of them open
+- push latency: from a write on one device to its `food_log` row event
+  and to the recomputed `summary` on the user's other device
+
+Run from backend/:  python -m benchmarks.bench_events [--subscribers N] [--writes N] [--latency MS]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from benchmarks.fake_postgrest import FakePostgrest
+from benchmarks.bench_suite import make_token
+from benchmarks.bench_startup import free_port
+
+DEVICES_PER_USER = 2
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def user_id(i: int) -> str:
+    return f"00000000-0000-4000-8000-{i:012d}"
+
+class Stream:
+    """One raw-socket SSE connection; frames are read as they arrive"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, base: str, token: str) -> "Stream":
+        url = urlsplit(base)
+        reader, writer = await asyncio.open_connection(url.hostname, url.port)
+        writer.write((
+            f"GET /api/events HTTP/1.1\r\nHost: {url.netloc}\r\n"
+            f"Authorization: Bearer {token}\r\nAccept: text/event-stream\r\n\r\n"
+        ).encode())
+        await writer.drain()
+        stream = cls(reader, writer)
+        await stream.wait_for(b"event: ready")
+        return stream
+
+    async def wait_for(self, marker: bytes):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionError("stream closed")
+            if line.startswith(marker):
+                return
+
+    def close(self):
+        self.writer.close()
+
+def food_log(day: str) -> dict:
+    return {"date": day, "meal_type": "lunch", "food_source": "master", "food_name": "Bench Apple",
+            "qty": 1, "calories": 95, "protein_g": 0.5, "carbs_g": 25, "fats_g": 0.3}
+
+async def time_writes(http: httpx.AsyncClient, tokens: list, writes: int) -> list:
+    samples = []
+    for i in range(writes):
+        token = tokens[i % len(tokens)]
+        start = time.perf_counter()
+        res = await http.post("/api/food/log", json=food_log("2026-01-01"), headers={"Authorization": f"Bearer {token}"})
+        res.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1e3)
+    return samples
+
+async def time_push(http: httpx.AsyncClient, pairs: list, writes: int):
+    row_samples, summary_samples = [], []
+    for i in range(writes):
+        token, other = pairs[i % len(pairs)]
+        start = time.perf_counter()
+        res = await http.post("/api/food/log", json=food_log("2026-01-01"), headers={"Authorization": f"Bearer {token}"})
+        res.raise_for_status()
+        await other.wait_for(b"event: food_log")
+        row_samples.append((time.perf_counter() - start) * 1e3)
+        await other.wait_for(b"event: summary")
+        summary_samples.append((time.perf_counter() - start) * 1e3)
+    return row_samples, summary_samples
+
+def describe(samples: list) -> str:
+    samples = sorted(samples)
+    p95 = samples[max(int(len(samples) * 0.95) - 1, 0)]
+    return f"p50 {statistics.median(samples):7.1f} ms   p95 {p95:7.1f} ms"
+
+async def run(base: str, pid: int, args):
+    users = max(args.subscribers // DEVICES_PER_USER, 1)
+    tokens = [make_token(user_id(i + 1)) for i in range(users)]
+
+    async with httpx.AsyncClient(base_url=base, timeout=30) as http:
+        await time_writes(http, tokens, 20)  # warm connections and token cache
+        baseline = await time_writes(http, tokens, args.writes)
+        idle_rss = rss_mb(pid)
+
+        limit = asyncio.Semaphore(200)
+
+        async def connect(token):
+            async with limit:
+                return await Stream.open(base, token)
+
+        start = time.perf_counter()
+        streams = await asyncio.gather(*(connect(token) for token in tokens for _ in range(DEVICES_PER_USER)))
+        connect_s = time.perf_counter() - start
+        await asyncio.sleep(1)
+        open_rss = rss_mb(pid)
+
+        # Push latency is read off the last users' second device; the
+        # others' streams are left unread, as a backgrounded app would
+        watched = max(min(users // 2, 50), 1)
+        loaded = await time_writes(http, tokens[:users - watched] or tokens, args.writes)
+        pairs = [(tokens[i], streams[i * DEVICES_PER_USER + 1]) for i in range(users - watched, users)]
+        rows, summaries = await time_push(http, pairs, args.writes)
+
+        metrics = (await http.get("/metrics")).text
+        for stream in streams:
+            stream.close()
+
+    print(f"{len(streams)} streams ({users} users x {DEVICES_PER_USER} devices), opened in {connect_s:.1f} s\n")
+    print(f"worker RSS          {idle_rss:7.1f} MB idle -> {open_rss:7.1f} MB with streams open "
+          f"({(open_rss - idle_rss) * 1024 / len(streams):.1f} KB per stream)")
+    print(f"write, no streams   {describe(baseline)}")
+    print(f"write, all open     {describe(loaded)}")
+    print(f"push: row event     {describe(rows)}")
+    print(f"push: day summary   {describe(summaries)}")
+    delivered = [line for line in metrics.splitlines() if line.startswith("akilo_events_")]
+    print("\n" + "\n".join(delivered))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=10.0)
+    args = parser.parse_args()
+
+    env = dict(os.environ, SUPABASE_KEY="bench-key", SUPABASE_JWT_SECRET="bench-secret",
+               LOG_LEVEL="WARNING", EVENTS_HEARTBEAT_SECONDS="30")
+    os.environ["SUPABASE_JWT_SECRET"] = env["SUPABASE_JWT_SECRET"]
+    with FakePostgrest(latency=args.latency / 1e3) as url:
+        env["SUPABASE_URL"] = url
+        port = free_port()
+        base = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning",
+             "--backlog", "4096"],
+            env=env, stdout=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if httpx.get(f"{base}/ready").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("server did not become ready")
+                time.sleep(0.05)
+            asyncio.run(run(base, server.pid, args))
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
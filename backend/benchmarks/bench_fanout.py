@@ -0,0 +1,86 @@
+"""Handler latency and concurrency with async fan-out of upstream queries.
+
+Every upstream call to the stub takes --latency ms. A handler whose
+independent queries run concurrently should take about one latency,
+not one per query. The response cache is off, so every request reaches
+the stub; `calls` is what the handler made (from Server-Timing), next to
+what it is expected to make.
+
+Run from backend/:  python -m benchmarks.bench_fanout [--latency MS] [--concurrency N]
+"""
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import time
+
+from benchmarks.postgrest_stub import PostgrestStub
+
+ENDPOINTS = [
+    ("/api/analytics/daily?date=2026-01-01", 2),
+    ("/api/analytics/weekly?days=7", 4),
+    ("/api/food/recent", 1),
+]
+UPSTREAM_CALLS = re.compile(r'upstream;[^,]*desc="(\d+) calls"')
+
+def make_token():
+    from jose import jwt
+    claims = {"sub": "00000000-0000-0000-0000-000000000001", "aud": "authenticated", "exp": time.time() + 3600}
+    return jwt.encode(claims, os.environ["SUPABASE_JWT_SECRET"], algorithm="HS256")
+
+async def run(args):
+    import httpx
+    import main
+    from app.db.supabase import init_pool, close_pool
+
+    init_pool()
+    headers = {"Authorization": f"Bearer {make_token()}"}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as http:
+        print(f"upstream latency {args.latency:.0f} ms per call\n")
+        print(f"{'endpoint':<40} {'calls':>5} {'expected':>8} {'sequential':>11} {'p50 ms':>8}")
+        for path, expected in ENDPOINTS:
+            samples, calls = [], 0
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                res = await http.get(path, headers=headers)
+                res.raise_for_status()
+                samples.append((time.perf_counter() - start) * 1e3)
+                match = UPSTREAM_CALLS.search(res.headers.get("server-timing", ""))
+                calls = max(calls, int(match.group(1)) if match else 0)
+            print(f"{path:<40} {calls:>5} {expected:>8} {calls * args.latency:>9.0f}ms {statistics.median(samples):>8.1f}")
+
+        path = ENDPOINTS[1][0]
+        start = time.perf_counter()
+        results = await asyncio.gather(*(http.get(path, headers=headers) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+        ok = sum(r.status_code == 200 for r in results)
+        print(f"\n{args.concurrency} concurrent {path}: {ok} ok in {elapsed:.2f}s ({ok / elapsed:.0f} req/s)")
+    await close_pool()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=20.0)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    rows = [{
+        "id": "00000000-0000-0000-0000-000000000002",
+        "date": "2026-01-01",
+        "food_master_id": "00000000-0000-0000-0000-000000000003",
+        "calories": 250, "protein_g": 10, "carbs_g": 30, "fats_g": 8, "amount_ml": 250, "weight_kg": 70,
+        # daily_summaries rollup columns
+        "water_ml": 250, "entries": 1,
+    }]
+    with PostgrestStub(rows=rows, latency=args.latency / 1e3) as url:
+        os.environ["SUPABASE_URL"] = url
+        os.environ.setdefault("SUPABASE_KEY", "bench-key")
+        os.environ.setdefault("SUPABASE_JWT_SECRET", "bench-secret")
+        # Cache hits would measure the cache, not the fan-out
+        os.environ["CACHE_ENABLED"] = "false"
+        asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
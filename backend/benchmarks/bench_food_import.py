@@ -0,0 +1,80 @@
+"""Throughput of the foods_master bulk import over a synthetic 250k-row file.
+
+Upserts go to a local PostgREST stub (--latency ms per batch), so this
+measures parsing, validation, dedupe and batching. A second run is
+interrupted halfway and resumed to check that no rows are lost or redone.
+
+Run from backend/:  python -m benchmarks.bench_food_import [--rows N] [--batch-size N]
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+
+os.environ.setdefault("SUPABASE_KEY", "bench-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "bench-secret")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "bench-service-key")
+
+from benchmarks.bench_food_search import synthetic_catalog
+from benchmarks.postgrest_stub import PostgrestStub
+
+FIELDS = ["name", "unit_type", "base_qty", "calories", "protein_g", "carbs_g", "fats_g"]
+
+class Interrupted(Exception):
+    pass
+
+def write_catalog(path, rows, seed=3):
+    rng = random.Random(seed)
+    foods = synthetic_catalog(rows)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for food in foods:
+            roll = rng.random()
+            if roll < 0.01:
+                food = {**food, "calories": -5}
+            elif roll < 0.02:
+                food = {**food, "unit_type": "cup"}
+            elif roll < 0.05:
+                # Same food, different case and punctuation
+                food = {**rng.choice(foods), "name": rng.choice(foods)["name"].upper() + "!"}
+            writer.writerow(food)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=250_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=50.0, help="Stub latency per upsert (ms)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, PostgrestStub(latency=args.latency / 1e3) as url:
+        # Settings were loaded when the catalog generator was imported
+        from app.core.config import settings
+        settings.SUPABASE_URL = url
+        from app.db.supabase import create_service_client
+        from app.services.food_import import import_foods
+
+        path = os.path.join(tmp, "foods.csv")
+        write_catalog(path, args.rows)
+        print(f"{args.rows} rows, {os.path.getsize(path) / 1e6:.1f} MB CSV, "
+              f"batches of {args.batch_size}, {args.latency:.0f} ms per upsert\n")
+        client = create_service_client()
+
+        report = import_foods(client, path, batch_size=args.batch_size, resume=False,
+                              rejects_path=path + ".rejects.ndjson")
+        print("full run:   ", report)
+
+        def stop_halfway(stats):
+            if stats.read >= args.rows // 2:
+                raise Interrupted()
+        try:
+            import_foods(client, path, batch_size=args.batch_size, resume=False, progress=stop_halfway)
+        except Interrupted:
+            pass
+        resumed = import_foods(client, path, batch_size=args.batch_size)
+        print("resumed run:", resumed)
+        assert resumed["read"] + resumed["resumed_past"] == args.rows
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Latency of the in-memory foods_master index over a synthetic catalog.
+
+Run from backend/:  python -m benchmarks.bench_food_search [--foods N]
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "bench-secret")
+
+from app.services.food_index import FoodSearchIndex, normalize
+
+ADJECTIVES = ["grilled", "boiled", "fried", "roasted", "steamed", "raw", "baked", "spicy",
+              "sweet", "salted", "smoked", "creamy", "crispy", "low fat", "whole wheat"]
+BASES = ["chicken", "rice", "paneer", "dal", "egg", "potato", "banana", "apple", "oats",
+         "salmon", "tofu", "lentil", "chickpea", "yogurt", "milk", "bread", "pasta", "beef",
+         "spinach", "broccoli", "almond", "peanut", "mango", "cheese", "quinoa", "mushroom"]
+STYLES = ["curry", "salad", "soup", "sandwich", "wrap", "bowl", "masala", "tikka", "biryani",
+          "smoothie", "pancake", "stew", "burger", "noodles", "pulao", "paratha", "omelette"]
+QUERIES = ["c", "ch", "chick", "chicken", "chicken curry", "grilled chicken tikka",
+           "paneer", "panner", "biryni", "rice bowl", "low fat milk", "brocoli soup", "zzz"]
+
+def synthetic_catalog(n, seed=42):
+    rng = random.Random(seed)
+    foods = []
+    for i in range(n):
+        parts = [rng.choice(ADJECTIVES), rng.choice(BASES), rng.choice(STYLES)]
+        if rng.random() < 0.3:
+            parts.append(rng.choice(BASES))
+        foods.append({
+            "id": f"{i:08d}",
+            "name": " ".join(parts).title() + f" {i % 97}",
+            "unit_type": "g",
+            "base_qty": 100,
+            "calories": rng.randint(20, 600),
+            "protein_g": rng.randint(0, 40),
+            "carbs_g": rng.randint(0, 80),
+            "fats_g": rng.randint(0, 30),
+        })
+    return foods
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e3)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--foods", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    foods = synthetic_catalog(args.foods)
+    start = time.perf_counter()
+    index = FoodSearchIndex(foods)
+    print(f"built index over {len(index)} foods in {time.perf_counter() - start:.2f}s\n")
+
+    print(f"{'query':<24} {'hits':>5} {'cold p50':>9} {'warm p50':>9} {'warm p99':>9}")
+    for q in QUERIES:
+        # Cold = ranking without the per-index query cache
+        cold, _ = timed(lambda: index._rank(normalize(q)), args.repeat)
+        hits = index.search(q)
+        p50, p99 = timed(lambda: index.search(q), args.repeat)
+        print(f"{q!r:<24} {len(hits):>5} {cold:>9.3f} {p50:>9.4f} {p99:>9.4f}")
+
+    p50, p99 = timed(lambda: index.search("chicken", offset=40, limit=20), args.repeat)
+    print(f"\npage 3 of 'chicken'      warm p50 {p50:.4f} ms  p99 {p99:.4f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Cost of logging on the request path.
+
+Compares what one log call costs the calling thread when stdout is slow
+(--sink-us per write, like a blocked pipe to a log shipper):
+`print()` of the payload, a plain synchronous StreamHandler, the queued
+JSON pipeline, and a record dropped by a per-route level.
+
+Run from backend/:  python -m benchmarks.bench_logging [--records N] [--sink-us US]
+"""
+import argparse
+import contextlib
+import logging
+import os
+import statistics
+import time
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "bench-secret")
+os.environ.setdefault("LOG_ROUTE_LEVELS", "/api/food/search=WARNING")
+os.environ.setdefault("LOG_USER_HASH_KEY", "bench-hash-key")
+
+from app.core import log
+
+PAYLOAD = {
+    "user_id": "00000000-0000-4000-8000-000000000001", "date": "2026-01-01", "meal_type": "lunch",
+    "food_source": "master", "food_master_id": "00000000-0000-0000-0000-000000000003",
+    "food_custom_id": None, "food_name": "Grilled Chicken", "qty": 1.5,
+    "calories": 250, "protein_g": 30, "carbs_g": 0, "fats_g": 8,
+}
+
+class SlowSink:
+    """A stream whose writes block (without holding the GIL) for a while"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        time.sleep(self.delay)
+        return len(text)
+
+    def flush(self):
+        pass
+
+def timed(fn, records):
+    samples = []
+    for _ in range(records):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--sink-us", type=float, default=50.0)
+    args = parser.parse_args()
+    sink = SlowSink(args.sink_us / 1e6)
+    rows = []
+
+    with contextlib.redirect_stdout(sink):
+        rows.append(("print(payload)", *timed(lambda: print(f"Logging food: {PAYLOAD}"), args.records)))
+
+    plain = logging.getLogger("bench.plain")
+    plain.propagate = False
+    plain.addHandler(logging.StreamHandler(sink))
+    plain.setLevel(logging.INFO)
+    rows.append(("sync StreamHandler", *timed(lambda: plain.info("Logging food: %s", PAYLOAD), args.records)))
+
+    log.setup_logging(stream=sink)
+    logger = logging.getLogger("app.bench")
+    ctx = log.RequestContext("bench-request", "/api/food/log")
+    ctx.user = log.hash_user_id(PAYLOAD["user_id"])
+    token = log._context.set(ctx)
+    rows.append(("queued JSON", *timed(lambda: logger.info("Logging food", extra={"payload": PAYLOAD}), args.records)))
+    log._context.reset(token)
+
+    token = log._context.set(log.RequestContext("bench-request", "/api/food/search"))
+    rows.append(("route-level filtered", *timed(lambda: logger.info("Search", extra={"payload": PAYLOAD}), args.records)))
+    log._context.reset(token)
+
+    start = time.perf_counter()
+    log.shutdown_logging()
+    drain = time.perf_counter() - start
+
+    print(f"{args.records} records per case, sink {args.sink_us:g} us per write\n")
+    print(f"{'case':<22} {'caller p50 us':>14} {'caller p99 us':>14}")
+    for name, p50, p99 in rows:
+        print(f"{name:<22} {p50:>14.1f} {p99:>14.1f}")
+    print(f"\nwriter drained the backlog in {drain * 1e3:.0f} ms after the last call; "
+          f"{log._QueueHandler.dropped} records dropped (queue full)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""CPU cost of /api/analytics/range over synthetic multi-year history.
+
+Times the NumPy aggregation on daily_summaries rows for a heavy logger
+(every day logged, frequent weigh-ins); upstream I/O is not included.
+
+Run from backend/:  python -m benchmarks.bench_range_analytics [--years N]
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "bench-secret")
+
+from app.services.trends import build_range_stats
+
+TARGETS = {"calories_target": 2000, "protein_target_g": 120, "carbs_target_g": 250,
+           "fats_target_g": 60, "water_target_ml": 2500}
+
+def synthetic_history(end, years, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    weight = 85.0
+    day = end - timedelta(days=int(365 * years) + 30)
+    while day <= end:
+        weight += rng.gauss(-0.02, 0.25)
+        rows.append({
+            "date": str(day),
+            # Rollup values come back from PostgREST as strings
+            "calories": f"{rng.gauss(2000, 300):.2f}",
+            "protein_g": f"{rng.gauss(110, 25):.2f}",
+            "carbs_g": f"{rng.gauss(240, 50):.2f}",
+            "fats_g": f"{rng.gauss(65, 15):.2f}",
+            "water_ml": rng.randint(1000, 3500),
+            "entries": rng.randint(3, 12),
+            "weight_kg": f"{weight:.2f}" if rng.random() < 0.6 else None,
+        })
+        day += timedelta(days=1)
+    return rows
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        samples.append((time.process_time() - start) * 1e3)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    end = date(2026, 6, 30)
+    rows = synthetic_history(end, args.years)
+    print(f"{len(rows)} daily_summaries rows ({args.years:g} years)\n")
+
+    print(f"{'window':<10} {'resolution':<11} {'buckets':>7} {'cpu p50 ms':>11} {'cpu p95 ms':>11}")
+    for label, days in (("30 days", 30), ("1 year", 365), (f"{args.years:g} years", int(365 * args.years))):
+        start = end - timedelta(days=days - 1)
+        # Only what the endpoint would fetch for this window
+        window = [row for row in rows if row["date"] >= str(start - timedelta(days=29))]
+        for resolution in ("day", "week", "month"):
+            result = build_range_stats(window, TARGETS, start, end, resolution)
+            p50, p95 = timed(lambda: build_range_stats(window, TARGETS, start, end, resolution), args.repeat)
+            print(f"{label:<10} {resolution:<11} {len(result['buckets']):>7} {p50:>11.2f} {p95:>11.2f}")
+
+    result = build_range_stats(rows, TARGETS, end - timedelta(days=364), end, "month")
+    print(f"\n1 year weight trend: {result['weight_trend']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Cold start: import time and time to first successful request.
+
+Each run spawns a fresh interpreter, so nothing is cached:
+- `import main` alone (routers are imported lazily by create_app)
+- `create_app()` (every router and its dependencies)
+- a real uvicorn worker against `fake_postgrest`, timing from spawn to
+  the first `/` (listening), the first 200 from `/ready` (warmed up) and
+  the first successful authenticated API request.
+
+Run from backend/:  python -m benchmarks.bench_startup [--runs N] [--latency MS]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.fake_postgrest import FakePostgrest
+from benchmarks.bench_suite import make_token
+
+IMPORT_SNIPPETS = {
+    "import main": "import main",
+    "main.create_app()": "import main; main.create_app()",
+}
+
+def time_snippet(code: str, env: dict) -> float:
+    timer = f"import time; t = time.perf_counter(); {code}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", timer], env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1]) * 1e3
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def time_server(env: dict, token: str, timeout: float = 30.0) -> dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    marks = {}
+    try:
+        with httpx.Client(timeout=5) as http:
+            while "first API request" not in marks:
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError("server did not become ready")
+                try:
+                    if "listening" not in marks:
+                        http.get(f"{base}/").raise_for_status()
+                        marks["listening"] = time.perf_counter() - started
+                    if "ready" not in marks:
+                        if http.get(f"{base}/ready").status_code != 200:
+                            time.sleep(0.005)
+                            continue
+                        marks["ready"] = time.perf_counter() - started
+                    res = http.get(f"{base}/api/analytics/daily?date=2026-01-01", headers={"Authorization": f"Bearer {token}"})
+                    res.raise_for_status()
+                    marks["first API request"] = time.perf_counter() - started
+                except httpx.TransportError:
+                    time.sleep(0.005)
+    finally:
+        server.terminate()
+        server.wait()
+    return {key: value * 1e3 for key, value in marks.items()}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=20.0)
+    args = parser.parse_args()
+
+    env = dict(os.environ, SUPABASE_KEY="bench-key", SUPABASE_JWT_SECRET="bench-secret", LOG_LEVEL="WARNING")
+    with FakePostgrest(latency=args.latency / 1e3) as url:
+        env["SUPABASE_URL"] = url
+        os.environ["SUPABASE_JWT_SECRET"] = env["SUPABASE_JWT_SECRET"]
+        token = make_token("00000000-0000-4000-8000-000000000001")
+
+        print(f"{args.runs} runs, upstream latency {args.latency:g} ms\n")
+        print(f"{'step':<28} {'median ms':>10} {'max ms':>10}")
+        for label, code in IMPORT_SNIPPETS.items():
+            samples = [time_snippet(code, env) for _ in range(args.runs)]
+            print(f"{label:<28} {statistics.median(samples):>10.0f} {max(samples):>10.0f}")
+
+        runs = [time_server(env, token) for _ in range(args.runs)]
+        for mark in ("listening", "ready", "first API request"):
+            samples = [run[mark] for run in runs]
+            print(f"{'spawn -> ' + mark:<28} {statistics.median(samples):>10.0f} {max(samples):>10.0f}")
+
+if __name__ == "__main__":
+    main()
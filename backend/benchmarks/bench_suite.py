@@ -0,0 +1,226 @@
+"""End-to-end latency and upstream calls per endpoint under a realistic mix.
+
+Drives the app in-process against `fake_postgrest` (every upstream call
+takes --latency ms) with a synthetic user population, and reports per
+scenario p50/p95/p99 latency, throughput, upstream calls per request,
+upstream stages per request (runs of calls that had to wait for the
+previous ones, i.e. sequential round trips), response bytes on the wire
+vs. decoded (requests send --accept-encoding, like the app does) and the
+server's JSON serialization time (from its Server-Timing header).
+
+Calls and stages are counted per request, so they don't depend on
+timing: `--check` compares the worst case of each against
+benchmarks/budgets.json and exits non-zero on any N+1 or newly
+sequential query. `--write-budgets` records the current run as the new
+budget.
+
+Run from backend/:  python -m benchmarks.bench_suite [--users N] [--requests N] [--check]
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+from benchmarks.fake_postgrest import FakePostgrest, FOOD_WORDS, MEALS
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), "budgets.json")
+
+SERIALIZE_TIMING = re.compile(r"serialize;dur=([0-9.]+)")
+
+# Upstream accounting for the app request running in this context
+_upstream = contextvars.ContextVar("upstream", default=None)
+
+class Upstream:
+    def __init__(self):
+        self.calls = 0
+        self.stages = 0
+        self.in_flight = 0
+
+async def _on_request(request):
+    state = _upstream.get()
+    if state is not None:
+        state.calls += 1
+        if state.in_flight == 0:
+            state.stages += 1
+        state.in_flight += 1
+
+async def _on_response(response):
+    state = _upstream.get()
+    if state is not None:
+        state.in_flight -= 1
+
+def make_token(user_id):
+    from jose import jwt
+    claims = {"sub": user_id, "aud": "authenticated", "exp": time.time() + 3600}
+    return jwt.encode(claims, os.environ["SUPABASE_JWT_SECRET"], algorithm="HS256")
+
+def food_log(rng, today):
+    return {
+        "date": str(today), "meal_type": rng.choice(MEALS), "food_source": "manual",
+        "food_name": f"{rng.choice(FOOD_WORDS)} bowl", "qty": 1,
+        "calories": rng.randint(100, 700), "protein_g": 20, "carbs_g": 40, "fats_g": 15,
+    }
+
+# name -> (weight in the mix, request builder)
+SCENARIOS = {
+    "bootstrap": (15, lambda rng, today: ("GET", f"/api/bootstrap/?date={today}", None)),
+    "daily": (10, lambda rng, today: ("GET", f"/api/analytics/daily?date={today}", None)),
+    "search": (25, lambda rng, today: ("GET", f"/api/food/search?q={rng.choice(FOOD_WORDS)[:rng.randint(2, 6)]}", None)),
+    "recent": (8, lambda rng, today: ("GET", "/api/food/recent", None)),
+    "custom": (4, lambda rng, today: ("GET", f"/api/food/custom?sort={rng.choice(('name', 'recent', 'usage'))}", None)),
+    "log_food": (12, lambda rng, today: ("POST", "/api/food/log", food_log(rng, today))),
+    "log_water": (6, lambda rng, today: ("POST", "/api/water/", {"date": str(today), "amount_ml": 250})),
+    "weekly": (8, lambda rng, today: ("GET", "/api/analytics/weekly?days=7", None)),
+    "range": (6, lambda rng, today: ("GET", f"/api/analytics/range?start={today - timedelta(days=89)}&end={today}&resolution=week", None)),
+    "history": (10, lambda rng, today: ("GET", f"/api/food/log/range?start={today - timedelta(days=6)}&end={today}", None)),
+}
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+async def run(args):
+    import httpx
+    import main
+    from app.db.supabase import init_pool, close_pool, get_async_http_client
+    from app.services.food_index import load_food_index
+    from app.core.log import setup_logging, shutdown_logging
+
+    # Same logging pipeline as production, so its cost is in the numbers
+    setup_logging(stream=open(os.devnull, "w"))
+    init_pool()
+    load_food_index()
+    hooks = get_async_http_client().event_hooks
+    hooks["request"].append(_on_request)
+    hooks["response"].append(_on_response)
+
+    rng = random.Random(args.seed)
+    today = date.today()
+    users = [f"00000000-0000-4000-8000-{i:012d}" for i in range(args.users)]
+    tokens = {user: make_token(user) for user in users}
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name][0] for name in names]
+    plan = [(rng.choice(users), rng.choices(names, weights)[0]) for _ in range(args.requests)]
+
+    results = {name: {"ms": [], "calls": [], "stages": [], "wire": [], "body": [], "serialize_ms": [], "errors": 0}
+               for name in names}
+    queue = iter(plan)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=60) as http:
+        async def worker():
+            for user, name in queue:
+                method, path, body = SCENARIOS[name][1](rng, today)
+                state = Upstream()
+                token = _upstream.set(state)
+                start = time.perf_counter()
+                res = None
+                try:
+                    res = await http.request(method, path, json=body, headers={
+                        "Authorization": f"Bearer {tokens[user]}", "Accept-Encoding": args.accept_encoding,
+                    })
+                    ok = res.status_code < 400
+                except Exception:
+                    ok = False
+                finally:
+                    _upstream.reset(token)
+                elapsed = (time.perf_counter() - start) * 1e3
+                result = results[name]
+                if res is not None:
+                    result["wire"].append(res.num_bytes_downloaded)
+                    result["body"].append(len(res.content))
+                    timing = SERIALIZE_TIMING.search(res.headers.get("server-timing", ""))
+                    result["serialize_ms"].append(float(timing.group(1)) if timing else 0.0)
+                result["ms"].append(elapsed)
+                result["calls"].append(state.calls)
+                result["stages"].append(state.stages)
+                result["errors"] += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        wall = time.perf_counter() - started
+    await close_pool()
+    shutdown_logging()
+    return results, wall
+
+def report(results, wall, args):
+    total = sum(len(r["ms"]) for r in results.values())
+    print(f"{total} requests, {args.users} users, concurrency {args.concurrency}, "
+          f"upstream latency {args.latency:g} ms: {wall:.2f}s ({total / wall:.0f} req/s)\n")
+    print(f"{'scenario':<11} {'n':>5} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'calls avg':>9} {'calls max':>9} {'stages max':>10} {'wire B':>8} {'body B':>8} {'ser us':>7}")
+    for name, r in results.items():
+        if not r["ms"]:
+            continue
+        wire = statistics.mean(r["wire"]) if r["wire"] else 0
+        body = statistics.mean(r["body"]) if r["body"] else 0
+        serialize = statistics.mean(r["serialize_ms"]) * 1e3 if r["serialize_ms"] else 0
+        print(f"{name:<11} {len(r['ms']):>5} {r['errors']:>4} {percentile(r['ms'], 50):>8.1f} "
+              f"{percentile(r['ms'], 95):>8.1f} {percentile(r['ms'], 99):>8.1f} "
+              f"{statistics.mean(r['calls']):>9.2f} {max(r['calls']):>9} {max(r['stages']):>10} "
+              f"{wire:>8.0f} {body:>8.0f} {serialize:>7.0f}")
+
+def observed(results) -> dict:
+    return {
+        name: {"calls": max(r["calls"]), "stages": max(r["stages"])}
+        for name, r in results.items() if r["ms"]
+    }
+
+def check(results, budgets) -> list:
+    failures = []
+    for name, seen in observed(results).items():
+        budget = budgets.get(name)
+        if budget is None:
+            failures.append(f"{name}: no budget (run with --write-budgets)")
+            continue
+        for key in ("calls", "stages"):
+            if seen[key] > budget[key]:
+                failures.append(f"{name}: {seen[key]} upstream {key} per request, budget {budget[key]}")
+        if results[name]["errors"]:
+            failures.append(f"{name}: {results[name]['errors']} failed requests")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--accept-encoding", default="br, gzip", help='e.g. "identity" to measure uncompressed')
+    parser.add_argument("--check", action="store_true", help="fail if calls/stages exceed budgets.json")
+    parser.add_argument("--write-budgets", action="store_true")
+    parser.add_argument("--budgets", default=BUDGETS_PATH)
+    args = parser.parse_args()
+
+    with FakePostgrest(latency=args.latency / 1e3, seed=args.seed) as url:
+        os.environ["SUPABASE_URL"] = url
+        os.environ.setdefault("SUPABASE_KEY", "bench-key")
+        os.environ.setdefault("SUPABASE_JWT_SECRET", "bench-secret")
+        results, wall = asyncio.run(run(args))
+    report(results, wall, args)
+
+    if args.write_budgets:
+        with open(args.budgets, "w") as f:
+            json.dump(observed(results), f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nWrote {args.budgets}")
+    if args.check:
+        with open(args.budgets) as f:
+            failures = check(results, json.load(f))
+        print()
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+        print("All scenarios within budget")
+
+if __name__ == "__main__":
+    main()
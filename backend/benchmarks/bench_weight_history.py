@@ -0,0 +1,76 @@
+"""Cost of /api/weight/history over years of daily weigh-ins.
+
+CPU only (no upstream I/O), for one user with --years of weigh-ins:
+- returning every row vs. the downsampled series: payload bytes
+- building the tiers from rows (a cache miss)
+- answering a query from the tiers, for a few point counts
+- applying one upsert incrementally vs. rebuilding from all rows
+
+Run from backend/:  python -m benchmarks.bench_weight_history [--years N]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "bench-secret")
+
+from app.services.weight_history import WeightHistory
+
+def synthetic_weigh_ins(end, years, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    weight = 90.0
+    day = end - timedelta(days=int(365 * years))
+    while day <= end:
+        weight += rng.gauss(-0.01, 0.3)
+        if rng.random() < 0.9:
+            # numeric columns come back from PostgREST as strings
+            rows.append({"date": str(day), "weight_kg": f"{weight:.2f}"})
+        day += timedelta(days=1)
+    return rows
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(samples), result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    end = date(2026, 1, 1)
+    rows = synthetic_weigh_ins(end, args.years)
+    print(f"{len(rows)} weigh-ins over {args.years:g} years, median of {args.runs} runs\n")
+
+    full_bytes = len(json.dumps(rows))
+    build_ms, history = timed(lambda: WeightHistory.from_rows(rows), args.runs)
+    print(f"{'all rows as JSON':<34} {full_bytes / 1024:>8.1f} KB")
+    print(f"{'build tiers (cache miss)':<34} {build_ms:>8.2f} ms")
+
+    for points in (100, 200, 500):
+        ms, result = timed(lambda: history.query(None, None, points), args.runs)
+        size = len(json.dumps(result))
+        label = f"query {points} points ({result['resolution']} tier)"
+        print(f"{label:<34} {ms:>8.2f} ms {size / 1024:>8.1f} KB")
+
+    ms, result = timed(lambda: history.query(end - timedelta(days=90), end, 200), args.runs)
+    print(f"{'query last 90 days, 200 points':<34} {ms:>8.2f} ms {result['points']:>8} points")
+
+    today = str(end)
+    upsert_ms, _ = timed(lambda: history.upsert(today, 80.0), args.runs)
+    rebuild_ms, _ = timed(lambda: WeightHistory.from_rows(rows + [{"date": today, "weight_kg": "80.0"}]), args.runs)
+    print(f"{'upsert latest weigh-in':<34} {upsert_ms:>8.3f} ms (full rebuild {rebuild_ms:.2f} ms)")
+
+if __name__ == "__main__":
+    main()
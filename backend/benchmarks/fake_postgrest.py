@@ -0,0 +1,360 @@
+"""Table-aware local PostgREST stand-in for end-to-end benchmarks.
+
+Unlike `postgrest_stub`, which answers everything with one canned body,
+this serves a synthetic dataset per user (taken from the JWT `sub`, the
+way RLS scopes rows) and applies the subset of PostgREST it needs:
+`eq/neq/gt/gte/lt/lte/in/ilike/is` filters, `order`, `limit`/`offset`,
+Range headers, single-object responses, `select` column lists with
+`foods_master(...)`/`foods_custom(...)` embeds, and inserts/updates/deletes
+kept in memory. Triggers are not
+emulated, so writes don't move the daily_summaries rollups or the
+food_usage index (seeded from the synthetic logs). `or=` filters are
+ignored.
+
+Every call waits --latency seconds first, like a round trip to Supabase.
+"""
+import base64
+import json
+import math
+import multiprocessing
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+HISTORY_DAYS = 120
+LOGGED_DAYS = 21
+MASTER_FOODS = 2000
+
+FOOD_WORDS = ("chicken", "rice", "paneer", "dal", "egg", "oats", "banana", "apple", "milk", "curd",
+              "roti", "salad", "almond", "peanut", "butter", "bread", "fish", "tofu", "soya", "poha")
+FOOD_STYLES = ("boiled", "grilled", "fried", "masala", "plain", "brown", "whole", "roasted", "curry", "raw")
+MEALS = ("breakfast", "lunch", "snacks", "dinner")
+# Embedded resource -> the foreign key column that points at it
+EMBEDS = {"foods_master": "food_master_id", "foods_custom": "food_custom_id"}
+HALF_LIFE_SECONDS = 14 * 86400
+
+def user_from_token(authorization: str):
+    """`sub` of a bearer JWT, unverified; None for the anon key"""
+    try:
+        payload = authorization.split()[1].split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))["sub"]
+    except (IndexError, ValueError, KeyError):
+        return None
+
+def master_foods(seed: int = 0) -> list:
+    rng = random.Random(seed)
+    foods = []
+    for i in range(MASTER_FOODS):
+        foods.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": f"{rng.choice(FOOD_STYLES)} {rng.choice(FOOD_WORDS)} {i}".title(),
+            "unit_type": rng.choice(("g", "ml", "serving")),
+            "base_qty": 100,
+            "calories": round(rng.uniform(20, 600), 1),
+            "protein_g": round(rng.uniform(0, 40), 1),
+            "carbs_g": round(rng.uniform(0, 80), 1),
+            "fats_g": round(rng.uniform(0, 30), 1),
+        })
+    return foods
+
+def _frecency_add(a, b):
+    if a is None or b is None:
+        return b if a is None else a
+    return max(a, b) + math.log1p(math.exp(-abs(a - b)))
+
+def food_usage(logs: list) -> list:
+    """What the food_usage trigger (schema section 14) would hold for these logs"""
+    usage = {}
+    for log in logs:
+        food_id = log["food_master_id"] or log["food_custom_id"]
+        if not food_id:
+            continue
+        at = datetime.fromisoformat(log["created_at"])
+        key = math.log(2) * at.timestamp() / HALF_LIFE_SECONDS
+        row = usage.setdefault(food_id, {
+            "user_id": log["user_id"], "food_master_id": log["food_master_id"],
+            "food_custom_id": None if log["food_master_id"] else log["food_custom_id"],
+            "uses": 0, "last_used_at": log["created_at"], "score": None,
+            **{f"{meal}_score": None for meal in MEALS},
+        })
+        row["uses"] += 1
+        row["last_used_at"] = max(row["last_used_at"], log["created_at"])
+        row["score"] = _frecency_add(row["score"], key)
+        meal = f"{log['meal_type']}_score"
+        row[meal] = _frecency_add(row[meal], key)
+    return list(usage.values())
+
+def user_tables(user_id: str, foods: list, today: date) -> dict:
+    """A few months of plausible history for one user"""
+    rng = random.Random(user_id)
+    now = datetime.now(timezone.utc).isoformat()
+    custom = [{
+        "id": str(uuid.UUID(int=rng.getrandbits(128))), "user_id": user_id,
+        "name": f"Home {rng.choice(FOOD_WORDS)} {i}", "unit_type": "serving", "base_qty": 1,
+        "calories": 300, "protein_g": 12, "carbs_g": 35, "fats_g": 10, "created_at": now,
+    } for i in range(10)]
+
+    logs, summaries, weights = [], [], []
+    weight = rng.uniform(60, 95)
+    for back in range(HISTORY_DAYS):
+        day = str(today - timedelta(days=back))
+        weight += rng.gauss(0.01, 0.2)
+        if rng.random() < 0.5:
+            weights.append({"id": str(uuid.UUID(int=rng.getrandbits(128))), "user_id": user_id, "date": day,
+                            "weight_kg": round(weight, 1), "created_at": f"{day}T07:00:00+00:00", "updated_at": now})
+        if rng.random() < 0.15:
+            continue
+        entries = rng.randint(3, 8)
+        summaries.append({
+            "user_id": user_id, "date": day, "calories": f"{rng.gauss(2000, 300):.2f}",
+            "protein_g": f"{rng.gauss(110, 25):.2f}", "carbs_g": f"{rng.gauss(240, 50):.2f}",
+            "fats_g": f"{rng.gauss(65, 15):.2f}", "water_ml": rng.randint(1000, 3500), "entries": entries,
+            "weight_kg": weights[-1]["weight_kg"] if weights and weights[-1]["date"] == day else None,
+        })
+        if back >= LOGGED_DAYS:
+            continue
+        for n in range(entries):
+            food = rng.choice(foods)
+            logs.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))), "user_id": user_id, "date": day,
+                "meal_type": MEALS[n % 4], "food_source": "master", "food_master_id": food["id"],
+                "food_custom_id": None, "food_name": food["name"], "qty": 1,
+                "calories": food["calories"], "protein_g": food["protein_g"], "carbs_g": food["carbs_g"],
+                "fats_g": food["fats_g"], "created_at": f"{day}T{8 + n:02d}:00:00+00:00", "updated_at": now,
+            })
+    return {
+        "profiles": [{"id": user_id, "name": "Bench User", "age": 30, "height_cm": 172, "weight_kg": round(weight, 1),
+                      "activity_level": "medium", "goal_type": "fat_loss", "updated_at": now}],
+        "daily_targets": [{"user_id": user_id, "calories_target": 2000, "protein_target_g": 120, "carbs_target_g": 250,
+                           "fats_target_g": 60, "water_target_ml": 2500, "updated_at": now}],
+        "streaks": [{"user_id": user_id, "current_streak": 5, "best_streak": 12,
+                     "last_completed_date": str(today - timedelta(days=1)), "updated_at": now}],
+        "daily_summaries": summaries,
+        "food_logs": logs,
+        "food_usage": food_usage(logs),
+        "water_logs": [],
+        "weight_logs": weights,
+        "foods_custom": custom,
+        "favorites": [{"id": str(uuid.UUID(int=rng.getrandbits(128))), "user_id": user_id,
+                       "food_master_id": food["id"], "food_custom_id": None, "created_at": now}
+                      for food in rng.sample(foods, 5)],
+        "sync_tombstones": [],
+    }
+
+def _value(raw: str):
+    try:
+        return float(raw)
+    except ValueError:
+        return raw
+
+def _compare(row_value, op: str, raw: str) -> bool:
+    if op == "is":
+        return row_value is None if raw == "null" else str(row_value).lower() == raw
+    if row_value is None:
+        return False
+    if op == "in":
+        return str(row_value) in {v.strip('"') for v in raw.strip("()").split(",")}
+    if op == "ilike":
+        needle = raw.replace("*", "%").strip("%").lower()
+        return needle in str(row_value).lower()
+    target = _value(raw)
+    value = _value(str(row_value)) if isinstance(target, float) else str(row_value)
+    return {
+        "eq": value == target, "neq": value != target, "gt": value > target,
+        "gte": value >= target, "lt": value < target, "lte": value <= target,
+    }.get(op, True)
+
+class Dataset:
+    """Per-user tables built on first touch, shared catalog for foods_master"""
+
+    GLOBAL = ("foods_master",)
+
+    def __init__(self, seed: int = 0):
+        self.lock = threading.Lock()
+        self.today = date.today()
+        self.foods = master_foods(seed)
+        self.foods_by_id = {food["id"]: food for food in self.foods}
+        self.users = {}
+
+    def table(self, name: str, user_id):
+        if name in self.GLOBAL or user_id is None:
+            return self.foods if name == "foods_master" else []
+        if user_id not in self.users:
+            self.users[user_id] = user_tables(user_id, self.foods, self.today)
+        return self.users[user_id].setdefault(name, [])
+
+    def embed(self, rows: list, embeds: dict, user_id) -> list:
+        """Attach the rows' embedded foods, as PostgREST does for `foods_master(...)`"""
+        for name, columns in embeds.items():
+            fk = EMBEDS.get(name)
+            if fk is None:
+                continue
+            by_id = self.foods_by_id if name == "foods_master" else {
+                food["id"]: food for food in self.table(name, user_id)}
+            for row in rows:
+                food = by_id.get(row.get(fk))
+                row[name] = _project(food, columns) if food else None
+        return rows
+
+    @staticmethod
+    def matches(row: dict, filters: list) -> bool:
+        for column, expr in filters:
+            negate = expr.startswith("not.")
+            op, _, raw = expr.removeprefix("not.").partition(".")
+            if _compare(row.get(column), op, raw) == negate:
+                return False
+        return True
+
+def _sort_key(value):
+    # numeric columns may come back as strings; compare them as numbers
+    value = _value(str(value))
+    return (0, value, "") if isinstance(value, float) else (1, 0.0, value)
+
+def _project(row: dict, columns) -> dict:
+    return dict(row) if columns is None else {c: row.get(c) for c in columns}
+
+def _columns(select: str):
+    """None for `*`, else the listed column names"""
+    names = [c.strip() for c in select.split(",") if c.strip()]
+    return None if "*" in names else names
+
+def _query(params: list):
+    filters, order, limit, offset = [], [], None, 0
+    columns, embeds = None, {}
+    for key, value in params:
+        if key == "select":
+            # Embedded resources first, so their column lists don't split the top-level one
+            embeds = {name: _columns(cols) for name, cols in re.findall(r"(\w+)\(([^)]*)\)", value)}
+            columns = _columns(re.sub(r"\w+\([^)]*\)", "", value))
+        elif key == "order":
+            for part in value.split(","):
+                column, *flags = part.split(".")
+                desc = "desc" in flags
+                # PostgREST's default: nulls last ascending, first descending
+                nulls_first = "nullsfirst" in flags or (desc and "nullslast" not in flags)
+                order.append((column, desc, nulls_first))
+        elif key == "limit":
+            limit = int(value)
+        elif key == "offset":
+            offset = int(value)
+        elif key not in ("select", "columns", "on_conflict", "or", "and"):
+            filters.append((key, value))
+    return filters, order, limit, offset, columns, embeds
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    dataset: Dataset = None
+    latency = 0.0
+
+    def _send(self, status: int, payload=None, headers=()):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _handle(self):
+        if self.latency:
+            time.sleep(self.latency)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        if parts[:2] != ["rest", "v1"] or len(parts) != 3:
+            self._send(404, {"message": "not found"})
+            return
+        table, params = parts[2], parse_qsl(url.query, keep_blank_values=True)
+        user_id = user_from_token(self.headers.get("Authorization", ""))
+        filters, order, limit, offset, columns, embeds = _query(params)
+        prefer = self.headers.get("Prefer", "")
+
+        with self.dataset.lock:
+            rows = self.dataset.table(table, user_id)
+            if self.command in ("POST", "PATCH", "DELETE") and table == "foods_master":
+                rows = self.dataset.foods
+            if self.command == "POST":
+                new = body if isinstance(body, list) else [body]
+                now = datetime.now(timezone.utc).isoformat()
+                new = [{"id": str(uuid.uuid4()), "created_at": now, "updated_at": now, "user_id": user_id, **row}
+                       for row in new]
+                rows.extend(new)
+                result = new
+            elif self.command == "PATCH":
+                result = [row for row in rows if Dataset.matches(row, filters)]
+                for row in result:
+                    row.update(body or {})
+            elif self.command == "DELETE":
+                result = [row for row in rows if Dataset.matches(row, filters)]
+                rows[:] = [row for row in rows if not Dataset.matches(row, filters)]
+            else:
+                result = [row for row in rows if Dataset.matches(row, filters)]
+                for column, desc, nulls_first in reversed(order):
+                    present = [row for row in result if row.get(column) is not None]
+                    missing = [row for row in result if row.get(column) is None]
+                    present.sort(key=lambda row: _sort_key(row[column]), reverse=desc)
+                    result = missing + present if nulls_first else present + missing
+                span = self.headers.get("Range")
+                if span:
+                    first, _, last = span.partition("-")
+                    offset, limit = int(first), int(last) - int(first) + 1
+                result = result[offset:offset + limit if limit is not None else None]
+            if self.command == "GET":
+                # Foreign keys of embeds are needed before the projection drops them
+                result = [dict(row) for row in result]
+                self.dataset.embed(result, embeds, user_id)
+                if columns is not None:
+                    result = [_project(row, columns + list(embeds)) for row in result]
+            else:
+                result = [dict(row) for row in result]
+
+        if "return=minimal" in prefer:
+            self._send(201 if self.command == "POST" else 204)
+        elif "vnd.pgrst.object" in self.headers.get("Accept", ""):
+            if len(result) != 1:
+                self._send(406, {"code": "PGRST116", "message": "JSON object requested, multiple (or no) rows returned"})
+            else:
+                self._send(200, result[0])
+        else:
+            self._send(201 if self.command == "POST" else 200, result)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = do_HEAD = _handle
+
+    def log_message(self, *args):
+        pass
+
+def _serve(seed, latency, host, port, conn):
+    handler = type("Handler", (_Handler,), {"dataset": Dataset(seed), "latency": latency})
+    server_class = type("Server", (ThreadingHTTPServer,), {"request_queue_size": 1024, "daemon_threads": True})
+    server = server_class((host, port), handler)
+    conn.send(server.server_address[:2])
+    server.serve_forever()
+
+class FakePostgrest:
+    """Run the fake in a child process: `with FakePostgrest(latency=0.02) as url: ...`"""
+
+    def __init__(self, latency=0.0, seed=0, host="127.0.0.1", port=0):
+        self._parent, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_serve, args=(seed, latency, host, port, child), daemon=True
+        )
+        self.url = None
+
+    def __enter__(self) -> str:
+        self.process.start()
+        host, port = self._parent.recv()
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.join()
@@ -0,0 +1,64 @@
+"""Minimal local PostgREST stand-in for benchmarks.
+
+Answers every request under /rest/v1/ with a canned JSON body over
+HTTP/1.1 keep-alive, optionally after a fixed delay per call, so client-side overhead can be measured without
+a real Supabase project.
+"""
+import json
+import multiprocessing
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    body = b"[]"
+    latency = 0.0
+
+    def _reply(self):
+        if self.latency:
+            time.sleep(self.latency)
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = do_HEAD = _reply
+
+    def log_message(self, *args):
+        pass
+
+def _serve(rows, latency, host, port, conn):
+    handler = type("Handler", (_Handler,), {"body": json.dumps(rows).encode(), "latency": latency})
+    server_class = type("Server", (ThreadingHTTPServer,), {"request_queue_size": 1024, "daemon_threads": True})
+    server = server_class((host, port), handler)
+    conn.send(server.server_address[:2])
+    server.serve_forever()
+
+class PostgrestStub:
+    """Run the stub in a child process: `with PostgrestStub() as url: ...`
+
+    A separate process keeps the stub from competing with the code under
+    test for the GIL.
+    """
+
+    def __init__(self, rows=None, latency=0.0, host="127.0.0.1", port=0):
+        self._parent, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_serve, args=(rows or [], latency, host, port, child), daemon=True
+        )
+        self.url = None
+
+    def __enter__(self) -> str:
+        self.process.start()
+        host, port = self._parent.recv()
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.join()
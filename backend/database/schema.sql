@@ -105,6 +105,8 @@ create table if not exists public.food_logs (
 );
 
 create index if not exists idx_food_logs_user_date on public.food_logs(user_id, date);
+-- Keyset pagination for history: (date, created_at, id), scanned backwards
+create index if not exists idx_food_logs_user_history on public.food_logs(user_id, date, created_at, id);
 create index if not exists idx_food_logs_meal_type on public.food_logs(meal_type);
 
 -- ============================================
@@ -478,4 +480,765 @@ for each row execute function public.handle_new_user();
 
 -- ============================================
 -- Done ✅
--- ============================================
\ No newline at end of file
+-- ============================================
+
+-- ============================================
+-- Analytics: per-day nutrition totals (RPC)
+-- ============================================
+
+-- Sums food and water logs per date so the API transfers one row per day
+-- instead of every log row. security invoker keeps RLS in force; the
+-- explicit user_id filter lets the (user_id, date) indexes be used.
+-- Analytics reads the daily_summaries rollup (section 10), which caches
+-- these same sums; this stays the on-demand aggregation over the raw
+-- logs, e.g. to check a user's rollup before repairing it with
+-- rebuild_daily_summaries.
+create or replace function public.daily_nutrition_totals(p_start date, p_end date)
+returns table (
+  log_date date,
+  calories numeric,
+  protein numeric,
+  carbs numeric,
+  fats numeric,
+  water bigint,
+  entries bigint
+)
+language sql
+stable
+security invoker
+set search_path = public
+as $$
+  with food as (
+    select f.date,
+           sum(f.calories) as calories,
+           sum(f.protein_g) as protein,
+           sum(f.carbs_g) as carbs,
+           sum(f.fats_g) as fats,
+           count(*) as entries
+    from public.food_logs f
+    where f.user_id = auth.uid()
+      and f.date between p_start and p_end
+    group by f.date
+  ),
+  water as (
+    select w.date, sum(w.amount_ml) as water
+    from public.water_logs w
+    where w.user_id = auth.uid()
+      and w.date between p_start and p_end
+    group by w.date
+  )
+  select coalesce(food.date, water.date),
+         coalesce(food.calories, 0),
+         coalesce(food.protein, 0),
+         coalesce(food.carbs, 0),
+         coalesce(food.fats, 0),
+         coalesce(water.water, 0),
+         coalesce(food.entries, 0)
+  from food
+  full outer join water on water.date = food.date
+  order by 1;
+$$;
+
+revoke execute on function public.daily_nutrition_totals(date, date) from public, anon;
+grant execute on function public.daily_nutrition_totals(date, date) to authenticated;
+
+-- ============================================
+-- 10) DAILY SUMMARIES (Rollup)
+-- ============================================
+
+-- One row per user per day, kept in sync by triggers on food_logs,
+-- water_logs and weight_logs so analytics reads at most one row per day.
+create table if not exists public.daily_summaries (
+  user_id uuid not null references auth.users(id) on delete cascade,
+  date date not null,
+  calories numeric(12,2) not null default 0,
+  protein_g numeric(12,2) not null default 0,
+  carbs_g numeric(12,2) not null default 0,
+  fats_g numeric(12,2) not null default 0,
+  water_ml bigint not null default 0,
+  entries int not null default 0,
+  weight_kg numeric(5,2),
+  updated_at timestamptz not null default now(),
+  primary key (user_id, date)
+);
+
+alter table public.daily_summaries enable row level security;
+
+-- Read-only for users; rows are written by the triggers below
+create policy "Daily summaries: select own"
+on public.daily_summaries
+for select
+using (auth.uid() = user_id);
+
+-- Apply a delta to one day's totals, dropping rows that become empty
+create or replace function public.bump_daily_summary(
+  p_user_id uuid,
+  p_date date,
+  p_calories numeric default 0,
+  p_protein numeric default 0,
+  p_carbs numeric default 0,
+  p_fats numeric default 0,
+  p_water bigint default 0,
+  p_entries int default 0
+)
+returns void
+language plpgsql
+security definer set search_path = public
+as $$
+begin
+  insert into public.daily_summaries as s
+    (user_id, date, calories, protein_g, carbs_g, fats_g, water_ml, entries)
+  values
+    (p_user_id, p_date, p_calories, p_protein, p_carbs, p_fats, p_water, p_entries)
+  on conflict (user_id, date) do update set
+    calories = s.calories + excluded.calories,
+    protein_g = s.protein_g + excluded.protein_g,
+    carbs_g = s.carbs_g + excluded.carbs_g,
+    fats_g = s.fats_g + excluded.fats_g,
+    water_ml = s.water_ml + excluded.water_ml,
+    entries = s.entries + excluded.entries,
+    updated_at = now();
+
+  delete from public.daily_summaries
+  where user_id = p_user_id and date = p_date
+    and entries <= 0 and water_ml <= 0 and weight_kg is null;
+end;
+$$;
+
+create or replace function public.rollup_food_logs()
+returns trigger
+language plpgsql
+security definer set search_path = public
+as $$
+begin
+  -- Nothing to roll back when the rows go away because the account was deleted
+  if tg_op = 'UPDATE' or (tg_op = 'DELETE' and exists (select 1 from auth.users where id = old.user_id)) then
+    perform public.bump_daily_summary(old.user_id, old.date,
+      -old.calories, -old.protein_g, -old.carbs_g, -old.fats_g, 0, -1);
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') then
+    perform public.bump_daily_summary(new.user_id, new.date,
+      new.calories, new.protein_g, new.carbs_g, new.fats_g, 0, 1);
+  end if;
+  return null;
+end;
+$$;
+
+create or replace function public.rollup_water_logs()
+returns trigger
+language plpgsql
+security definer set search_path = public
+as $$
+begin
+  if tg_op = 'UPDATE' or (tg_op = 'DELETE' and exists (select 1 from auth.users where id = old.user_id)) then
+    perform public.bump_daily_summary(old.user_id, old.date, p_water => -old.amount_ml);
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') then
+    perform public.bump_daily_summary(new.user_id, new.date, p_water => new.amount_ml);
+  end if;
+  return null;
+end;
+$$;
+
+create or replace function public.rollup_weight_logs()
+returns trigger
+language plpgsql
+security definer set search_path = public
+as $$
+begin
+  if tg_op = 'UPDATE' or (tg_op = 'DELETE' and exists (select 1 from auth.users where id = old.user_id)) then
+    update public.daily_summaries set weight_kg = null, updated_at = now()
+    where user_id = old.user_id and date = old.date;
+    perform public.bump_daily_summary(old.user_id, old.date);
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') then
+    insert into public.daily_summaries as s (user_id, date, weight_kg)
+    values (new.user_id, new.date, new.weight_kg)
+    on conflict (user_id, date) do update set
+      weight_kg = excluded.weight_kg,
+      updated_at = now();
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists trg_food_logs_rollup on public.food_logs;
+create trigger trg_food_logs_rollup
+after insert or update or delete on public.food_logs
+for each row execute function public.rollup_food_logs();
+
+drop trigger if exists trg_water_logs_rollup on public.water_logs;
+create trigger trg_water_logs_rollup
+after insert or update or delete on public.water_logs
+for each row execute function public.rollup_water_logs();
+
+drop trigger if exists trg_weight_logs_rollup on public.weight_logs;
+create trigger trg_weight_logs_rollup
+after insert or update or delete on public.weight_logs
+for each row execute function public.rollup_weight_logs();
+
+-- Backfill / repair: rebuild rollups from the raw logs for one user (or everyone)
+create or replace function public.rebuild_daily_summaries(p_user_id uuid default null)
+returns bigint
+language plpgsql
+security definer set search_path = public
+as $$
+declare
+  rebuilt bigint;
+begin
+  -- Streak runs are rebuilt in one pass below instead of row by row
+  perform set_config('akilo.skip_streaks', 'on', true);
+
+  delete from public.daily_summaries
+  where p_user_id is null or user_id = p_user_id;
+
+  insert into public.daily_summaries
+    (user_id, date, calories, protein_g, carbs_g, fats_g, water_ml, entries, weight_kg)
+  select
+    k.user_id,
+    k.date,
+    coalesce(f.calories, 0),
+    coalesce(f.protein_g, 0),
+    coalesce(f.carbs_g, 0),
+    coalesce(f.fats_g, 0),
+    coalesce(w.water_ml, 0),
+    coalesce(f.entries, 0),
+    wt.weight_kg
+  from (
+    select user_id, date from public.food_logs where p_user_id is null or user_id = p_user_id
+    union
+    select user_id, date from public.water_logs where p_user_id is null or user_id = p_user_id
+    union
+    select user_id, date from public.weight_logs where p_user_id is null or user_id = p_user_id
+  ) k
+  left join (
+    select user_id, date,
+           sum(calories) as calories, sum(protein_g) as protein_g,
+           sum(carbs_g) as carbs_g, sum(fats_g) as fats_g, count(*) as entries
+    from public.food_logs
+    where p_user_id is null or user_id = p_user_id
+    group by user_id, date
+  ) f on f.user_id = k.user_id and f.date = k.date
+  left join (
+    select user_id, date, sum(amount_ml) as water_ml
+    from public.water_logs
+    where p_user_id is null or user_id = p_user_id
+    group by user_id, date
+  ) w on w.user_id = k.user_id and w.date = k.date
+  left join public.weight_logs wt on wt.user_id = k.user_id and wt.date = k.date;
+
+  get diagnostics rebuilt = row_count;
+
+  perform public.rebuild_streaks(p_user_id);
+  perform set_config('akilo.skip_streaks', 'off', true);
+  return rebuilt;
+end;
+$$;
+
+-- Internal helpers: not callable through the API
+revoke execute on function public.bump_daily_summary(uuid, date, numeric, numeric, numeric, numeric, bigint, int) from public, anon, authenticated;
+revoke execute on function public.rebuild_daily_summaries(uuid) from public, anon, authenticated;
+grant execute on function public.rebuild_daily_summaries(uuid) to service_role;
+
+-- ============================================
+-- 11) STREAKS (Incremental)
+-- ============================================
+
+-- Maximal runs of consecutive days with at least one food log.
+-- A day being logged or unlogged touches at most two runs, found by
+-- index lookup, so keeping streaks current is O(1) per write no matter
+-- how long the history is or how far back the entry is dated.
+create table if not exists public.streak_runs (
+  user_id uuid not null references auth.users(id) on delete cascade,
+  start_date date not null,
+  end_date date not null check (end_date >= start_date),
+  primary key (user_id, start_date)
+);
+
+create index if not exists idx_streak_runs_end on public.streak_runs(user_id, end_date);
+
+-- Internal bookkeeping; users read the streaks table
+alter table public.streak_runs enable row level security;
+
+-- Recompute the streaks row from the runs.
+-- p_best is a known lower bound for best_streak; null forces a full recompute
+create or replace function public.refresh_streak(p_user_id uuid, p_best int default null)
+returns void
+language plpgsql
+security definer set search_path = public
+as $$
+declare
+  latest record;
+  best int;
+begin
+  select start_date, end_date into latest
+  from public.streak_runs
+  where user_id = p_user_id
+  order by end_date desc
+  limit 1;
+
+  if p_best is null then
+    select coalesce(max(end_date - start_date + 1), 0) into best
+    from public.streak_runs where user_id = p_user_id;
+  end if;
+
+  insert into public.streaks as s (user_id, current_streak, best_streak, last_completed_date)
+  values (
+    p_user_id,
+    coalesce(latest.end_date - latest.start_date + 1, 0),
+    coalesce(best, p_best, 0),
+    latest.end_date
+  )
+  on conflict (user_id) do update set
+    current_streak = excluded.current_streak,
+    best_streak = case when p_best is null then excluded.best_streak
+                       else greatest(s.best_streak, excluded.best_streak) end,
+    last_completed_date = excluded.last_completed_date,
+    updated_at = now();
+end;
+$$;
+
+-- A day gained its first food log: merge with the runs ending the day
+-- before and starting the day after
+create or replace function public.streak_add_day(p_user_id uuid, p_date date)
+returns void
+language plpgsql
+security definer set search_path = public
+as $$
+declare
+  run_start date := p_date;
+  run_end date := p_date;
+  prev_start date;
+  next_end date;
+begin
+  delete from public.streak_runs
+  where user_id = p_user_id and end_date = p_date - 1
+  returning start_date into prev_start;
+
+  delete from public.streak_runs
+  where user_id = p_user_id and start_date = p_date + 1
+  returning end_date into next_end;
+
+  run_start := coalesce(prev_start, p_date);
+  run_end := coalesce(next_end, p_date);
+
+  insert into public.streak_runs (user_id, start_date, end_date)
+  values (p_user_id, run_start, run_end)
+  on conflict (user_id, start_date) do nothing;
+
+  perform public.refresh_streak(p_user_id, run_end - run_start + 1);
+end;
+$$;
+
+-- A day lost its last food log: split the run containing it
+create or replace function public.streak_remove_day(p_user_id uuid, p_date date)
+returns void
+language plpgsql
+security definer set search_path = public
+as $$
+declare
+  run record;
+  was_best boolean;
+begin
+  select start_date, end_date into run
+  from public.streak_runs
+  where user_id = p_user_id and start_date <= p_date
+  order by start_date desc
+  limit 1;
+
+  if run is null or run.end_date < p_date then
+    return;
+  end if;
+
+  delete from public.streak_runs where user_id = p_user_id and start_date = run.start_date;
+  if run.start_date < p_date then
+    insert into public.streak_runs (user_id, start_date, end_date)
+    values (p_user_id, run.start_date, p_date - 1);
+  end if;
+  if run.end_date > p_date then
+    insert into public.streak_runs (user_id, start_date, end_date)
+    values (p_user_id, p_date + 1, run.end_date);
+  end if;
+
+  -- Only a split of the best run can lower best_streak
+  select best_streak = run.end_date - run.start_date + 1 into was_best
+  from public.streaks where user_id = p_user_id;
+
+  if coalesce(was_best, true) then
+    perform public.refresh_streak(p_user_id, null);
+  else
+    perform public.refresh_streak(p_user_id, 0);
+  end if;
+end;
+$$;
+
+-- Fires when a day's food entry count crosses zero in either direction
+create or replace function public.track_streaks()
+returns trigger
+language plpgsql
+security definer set search_path = public
+as $$
+declare
+  was_logged boolean := tg_op in ('UPDATE', 'DELETE') and old.entries > 0;
+  is_logged boolean := tg_op in ('INSERT', 'UPDATE') and new.entries > 0;
+begin
+  if current_setting('akilo.skip_streaks', true) = 'on' then
+    return null;
+  end if;
+  if is_logged and not was_logged then
+    perform public.streak_add_day(new.user_id, new.date);
+  elsif was_logged and not is_logged and exists (select 1 from auth.users where id = old.user_id) then
+    -- Skipped when the rows go away because the account was deleted
+    perform public.streak_remove_day(old.user_id, old.date);
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists trg_daily_summaries_streaks on public.daily_summaries;
+create trigger trg_daily_summaries_streaks
+after insert or update of entries or delete on public.daily_summaries
+for each row execute function public.track_streaks();
+
+-- Bulk recompute: rebuild runs and streaks for one user (or everyone)
+-- from food_logs in a single gaps-and-islands pass
+create or replace function public.rebuild_streaks(p_user_id uuid default null)
+returns bigint
+language plpgsql
+security definer set search_path = public
+as $$
+declare
+  rebuilt bigint;
+begin
+  delete from public.streak_runs
+  where p_user_id is null or user_id = p_user_id;
+
+  -- Consecutive dates share the same (date - row_number) value
+  insert into public.streak_runs (user_id, start_date, end_date)
+  select user_id, min(date), max(date)
+  from (
+    select user_id, date,
+           date - (row_number() over (partition by user_id order by date))::int as island
+    from (
+      select distinct user_id, date
+      from public.food_logs
+      where p_user_id is null or user_id = p_user_id
+    ) days
+  ) d
+  group by user_id, island;
+
+  -- Users with no logs at all are reset to zero
+  insert into public.streaks as s (user_id, current_streak, best_streak, last_completed_date)
+  select u.user_id,
+         coalesce(latest.length, 0),
+         coalesce(best.length, 0),
+         latest.end_date
+  from (
+    select user_id from public.streaks where p_user_id is null or user_id = p_user_id
+    union
+    select distinct user_id from public.streak_runs where p_user_id is null or user_id = p_user_id
+  ) u
+  left join lateral (
+    select end_date, end_date - start_date + 1 as length
+    from public.streak_runs r
+    where r.user_id = u.user_id
+    order by end_date desc
+    limit 1
+  ) latest on true
+  left join lateral (
+    select max(end_date - start_date + 1) as length
+    from public.streak_runs r
+    where r.user_id = u.user_id
+  ) best on true
+  on conflict (user_id) do update set
+    current_streak = excluded.current_streak,
+    best_streak = excluded.best_streak,
+    last_completed_date = excluded.last_completed_date,
+    updated_at = now();
+
+  get diagnostics rebuilt = row_count;
+  return rebuilt;
+end;
+$$;
+
+-- Streaks are derived from the logs; users can no longer write them directly
+drop policy if exists "Streaks: insert own" on public.streaks;
+drop policy if exists "Streaks: update own" on public.streaks;
+
+revoke execute on function public.refresh_streak(uuid, int) from public, anon, authenticated;
+revoke execute on function public.streak_add_day(uuid, date) from public, anon, authenticated;
+revoke execute on function public.streak_remove_day(uuid, date) from public, anon, authenticated;
+revoke execute on function public.rebuild_streaks(uuid) from public, anon, authenticated;
+grant execute on function public.rebuild_streaks(uuid) to service_role;
+
+-- ============================================
+-- 12) DELTA SYNC (Change Columns + Tombstones)
+-- ============================================
+
+-- weight_logs rows are upserted in place, so they need their own updated_at
+alter table public.weight_logs add column if not exists updated_at timestamptz not null default now();
+
+drop trigger if exists trg_weight_logs_updated on public.weight_logs;
+create trigger trg_weight_logs_updated
+before update on public.weight_logs
+for each row execute function public.set_updated_at();
+
+-- Change columns scanned by GET /api/sync (the other tables are insert/delete only)
+create index if not exists idx_food_logs_user_updated on public.food_logs(user_id, updated_at);
+create index if not exists idx_weight_logs_user_updated on public.weight_logs(user_id, updated_at);
+create index if not exists idx_water_logs_user_created on public.water_logs(user_id, created_at);
+create index if not exists idx_favorites_user_created on public.favorites(user_id, created_at);
+create index if not exists idx_foods_custom_user_created on public.foods_custom(user_id, created_at);
+
+-- One row per deleted synced row, so clients can drop it locally
+create table if not exists public.sync_tombstones (
+  id bigserial primary key,
+  user_id uuid not null references auth.users(id) on delete cascade,
+  table_name text not null,
+  row_id uuid not null,
+  deleted_at timestamptz not null default now()
+);
+
+create index if not exists idx_sync_tombstones_user_deleted on public.sync_tombstones(user_id, deleted_at);
+
+alter table public.sync_tombstones enable row level security;
+
+create policy "Sync tombstones: select own"
+on public.sync_tombstones
+for select
+using (auth.uid() = user_id);
+
+create or replace function public.record_tombstone()
+returns trigger
+language plpgsql
+security definer set search_path = public
+as $$
+begin
+  -- Nothing to sync once the account itself is gone
+  if exists (select 1 from auth.users where id = old.user_id) then
+    insert into public.sync_tombstones (user_id, table_name, row_id)
+    values (old.user_id, tg_table_name, old.id);
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists trg_food_logs_tombstone on public.food_logs;
+create trigger trg_food_logs_tombstone
+after delete on public.food_logs
+for each row execute function public.record_tombstone();
+
+drop trigger if exists trg_water_logs_tombstone on public.water_logs;
+create trigger trg_water_logs_tombstone
+after delete on public.water_logs
+for each row execute function public.record_tombstone();
+
+drop trigger if exists trg_weight_logs_tombstone on public.weight_logs;
+create trigger trg_weight_logs_tombstone
+after delete on public.weight_logs
+for each row execute function public.record_tombstone();
+
+drop trigger if exists trg_favorites_tombstone on public.favorites;
+create trigger trg_favorites_tombstone
+after delete on public.favorites
+for each row execute function public.record_tombstone();
+
+drop trigger if exists trg_foods_custom_tombstone on public.foods_custom;
+create trigger trg_foods_custom_tombstone
+after delete on public.foods_custom
+for each row execute function public.record_tombstone();
+
+-- Tombstones older than the retention window are dropped; clients whose
+-- cursor is older than that get a full resync instead
+create or replace function public.purge_sync_tombstones(p_retention interval default interval '90 days')
+returns bigint
+language plpgsql
+security definer set search_path = public
+as $$
+declare
+  purged bigint;
+begin
+  delete from public.sync_tombstones where deleted_at < now() - p_retention;
+  get diagnostics purged = row_count;
+  return purged;
+end;
+$$;
+
+revoke execute on function public.purge_sync_tombstones(interval) from public, anon, authenticated;
+grant execute on function public.purge_sync_tombstones(interval) to service_role;
+
+-- ============================================
+-- 13) FOODS MASTER IMPORT
+-- ============================================
+
+-- Normalized name (see app/services/food_index.normalize) used to dedupe
+-- bulk imports; set by scripts/import_foods.py, null for unkeyed rows
+alter table public.foods_master add column if not exists name_key text;
+
+create unique index if not exists idx_foods_master_name_key on public.foods_master(name_key);
+
+-- ============================================
+-- 14) FOOD USAGE (Recent & Frequent)
+-- ============================================
+
+-- One row per user per logged food, kept in sync by a trigger on food_logs,
+-- so "recent" and per-meal suggestions are one indexed read. Scores are
+-- frecency: the sum over the food's logs of 2^(age / 14 days), stored as
+-- its log so it never overflows. Comparing scores of one user needs no
+-- "now", since the decay shrinks every score by the same amount.
+create table if not exists public.food_usage (
+  user_id uuid not null references auth.users(id) on delete cascade,
+  food_master_id uuid references public.foods_master(id) on delete cascade,
+  food_custom_id uuid references public.foods_custom(id) on delete cascade,
+  food_id uuid generated always as (coalesce(food_master_id, food_custom_id)) stored,
+  uses int not null default 0,
+  last_used_at timestamptz not null,
+  score double precision not null,
+  breakfast_score double precision,
+  lunch_score double precision,
+  snacks_score double precision,
+  dinner_score double precision,
+  primary key (user_id, food_id),
+  check (num_nonnulls(food_master_id, food_custom_id) = 1)
+);
+
+create index if not exists idx_food_usage_user_score on public.food_usage(user_id, score desc);
+-- Exact recomputes after an update or delete read one food's logs
+create index if not exists idx_food_logs_user_food on public.food_logs(user_id, (coalesce(food_master_id, food_custom_id)));
+
+alter table public.food_usage enable row level security;
+
+-- Read-only for users; rows are written by the trigger below
+create policy "Food usage: select own"
+on public.food_usage
+for select
+using (auth.uid() = user_id);
+
+-- log2 of one log's weight, in natural-log units: a 14-day half-life
+create or replace function public.frecency_key(p_at timestamptz)
+returns double precision
+language sql
+immutable
+as $$
+  select ln(2) * extract(epoch from p_at) / (14 * 86400);
+$$;
+
+-- ln(exp(a) + exp(b)), without overflowing; null counts as no logs
+create or replace function public.frecency_add(a double precision, b double precision)
+returns double precision
+language sql
+immutable
+as $$
+  select case
+    when a is null then b
+    when b is null then a
+    else greatest(a, b) + ln(1 + exp(-abs(a - b)))
+  end;
+$$;
+
+-- Recompute usage from food_logs for one user (or everyone), optionally
+-- for a single food; foods with no logs left lose their row
+create or replace function public.rebuild_food_usage(p_user_id uuid default null, p_food_id uuid default null)
+returns bigint
+language plpgsql
+security definer set search_path = public
+as $$
+declare
+  rebuilt bigint;
+begin
+  delete from public.food_usage
+  where (p_user_id is null or user_id = p_user_id)
+    and (p_food_id is null or food_id = p_food_id);
+
+  -- Sums of exponentials are taken relative to the food's newest log
+  insert into public.food_usage
+    (user_id, food_master_id, food_custom_id, uses, last_used_at, score,
+     breakfast_score, lunch_score, snacks_score, dinner_score)
+  select
+    user_id, food_master_id, food_custom_id, count(*), max(created_at),
+    max(top) + ln(sum(exp(key - top))),
+    max(top) + ln(nullif(sum(exp(key - top)) filter (where meal_type = 'breakfast'), 0)),
+    max(top) + ln(nullif(sum(exp(key - top)) filter (where meal_type = 'lunch'), 0)),
+    max(top) + ln(nullif(sum(exp(key - top)) filter (where meal_type = 'snacks'), 0)),
+    max(top) + ln(nullif(sum(exp(key - top)) filter (where meal_type = 'dinner'), 0))
+  from (
+    select user_id, meal_type, created_at,
+           food_master_id,
+           case when food_master_id is null then food_custom_id end as food_custom_id,
+           public.frecency_key(created_at) as key,
+           max(public.frecency_key(created_at)) over (
+             partition by user_id, coalesce(food_master_id, food_custom_id)
+           ) as top
+    from public.food_logs
+    where (p_user_id is null or user_id = p_user_id)
+      and (p_food_id is null or coalesce(food_master_id, food_custom_id) = p_food_id)
+      and coalesce(food_master_id, food_custom_id) is not null
+  ) l
+  group by user_id, food_master_id, food_custom_id;
+
+  get diagnostics rebuilt = row_count;
+  return rebuilt;
+end;
+$$;
+
+create or replace function public.track_food_usage()
+returns trigger
+language plpgsql
+security definer set search_path = public
+as $$
+declare
+  new_food uuid := case when tg_op in ('INSERT', 'UPDATE') then coalesce(new.food_master_id, new.food_custom_id) end;
+  old_food uuid := case when tg_op in ('UPDATE', 'DELETE') then coalesce(old.food_master_id, old.food_custom_id) end;
+  key double precision;
+begin
+  if tg_op = 'INSERT' then
+    -- Manual entries have no food to suggest
+    if new_food is null then
+      return null;
+    end if;
+    key := public.frecency_key(new.created_at);
+    insert into public.food_usage as u
+      (user_id, food_master_id, food_custom_id, uses, last_used_at, score,
+       breakfast_score, lunch_score, snacks_score, dinner_score)
+    values (
+      new.user_id,
+      new.food_master_id,
+      case when new.food_master_id is null then new.food_custom_id end,
+      1,
+      new.created_at,
+      key,
+      case when new.meal_type = 'breakfast' then key end,
+      case when new.meal_type = 'lunch' then key end,
+      case when new.meal_type = 'snacks' then key end,
+      case when new.meal_type = 'dinner' then key end
+    )
+    on conflict (user_id, food_id) do update set
+      uses = u.uses + 1,
+      last_used_at = greatest(u.last_used_at, excluded.last_used_at),
+      score = public.frecency_add(u.score, excluded.score),
+      breakfast_score = public.frecency_add(u.breakfast_score, excluded.breakfast_score),
+      lunch_score = public.frecency_add(u.lunch_score, excluded.lunch_score),
+      snacks_score = public.frecency_add(u.snacks_score, excluded.snacks_score),
+      dinner_score = public.frecency_add(u.dinner_score, excluded.dinner_score);
+    return null;
+  end if;
+
+  -- Scores can't be subtracted from exactly, so removals recompute the food
+  -- from its logs; skipped when the rows go away because the account was deleted
+  if old_food is not null and exists (select 1 from auth.users where id = old.user_id) then
+    perform public.rebuild_food_usage(old.user_id, old_food);
+  end if;
+  if new_food is not null and new_food is distinct from old_food then
+    perform public.rebuild_food_usage(new.user_id, new_food);
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists trg_food_logs_usage on public.food_logs;
+create trigger trg_food_logs_usage
+after insert or update of food_master_id, food_custom_id, meal_type, created_at or delete on public.food_logs
+for each row execute function public.track_food_usage();
+
+revoke execute on function public.rebuild_food_usage(uuid, uuid) from public, anon, authenticated;
+grant execute on function public.rebuild_food_usage(uuid, uuid) to service_role;
@@ -1,24 +1,113 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 
-from fastapi import FastAPI
-from app.api.endpoints import profile, food, water, weight, analytics
-from fastapi.middleware.cors import CORSMiddleware
-
-app = FastAPI(title="Akilo API", version="1.0.0")
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(profile.router, prefix="/api/profile", tags=["Profile"])
-app.include_router(food.router, prefix="/api/food", tags=["Food"])
-app.include_router(water.router, prefix="/api/water", tags=["Water"])
-app.include_router(weight.router, prefix="/api/weight", tags=["Weight"])
-app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
-
-@app.get("/")
-def health_check():
-    return {"status": "ok", "app": "Akilo Backend"}
+logger = logging.getLogger("app.main")
+
+async def warm_up(app: FastAPI):
+    """Open upstream connections and load the food index; /ready turns 200 once done"""
+    from app.db.supabase import prewarm_pool
+    from app.services.food_index import load_food_index
+
+    started = time.perf_counter()
+    results = await asyncio.gather(prewarm_pool(), asyncio.to_thread(load_food_index), return_exceptions=True)
+    for step, result in zip(("connection pool", "food index"), results):
+        if isinstance(result, Exception):
+            # Not fatal: connections open on demand, search falls back to the DB
+            logger.error("Warm-up of %s failed: %s", step, result)
+    app.state.ready = True
+    logger.info("Warm-up done in %.0f ms", (time.perf_counter() - started) * 1e3)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.core.log import setup_logging, shutdown_logging
+    from app.db.supabase import init_pool, close_pool
+    from app.services.food_index import start_food_index, stop_food_index
+
+    setup_logging()
+    init_pool()
+    # Serve (and answer liveness) right away; readiness waits for the warm-up
+    app.state.ready = False
+    warm_up_task = asyncio.create_task(warm_up(app))
+    start_food_index(load_now=False)
+    yield
+    warm_up_task.cancel()
+    stop_food_index()
+    await close_pool()
+    shutdown_logging()
+
+def create_app() -> FastAPI:
+    """Build the app. Routers and their dependencies are imported here, not when main is"""
+    from fastapi.middleware.cors import CORSMiddleware
+    from app.api.endpoints import profile, food, water, weight, analytics, sync, bootstrap, export, events
+    from app.core.compression import CompressionMiddleware
+    from app.core.config import settings
+    from app.core.etag import ETagMiddleware
+    from app.core.log import RequestContextMiddleware
+    from app.core.metrics import MetricsMiddleware, metrics
+    from app.core.responses import FastJSONResponse
+
+    app = FastAPI(title="Akilo API", version="1.0.0", lifespan=lifespan, default_response_class=FastJSONResponse)
+    app.state.ready = False
+
+    app.add_middleware(ETagMiddleware)
+
+    # Outside ETag, so the tag (weak) is computed once over the plain body
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["ETag", "Server-Timing", "X-Request-ID"],
+    )
+
+    # Outside CORS, ETag and compression, so latency and response size include them
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    # Outside metrics, so slow-request logs carry the request id
+    app.add_middleware(RequestContextMiddleware)
+
+    app.include_router(profile.router, prefix="/api/profile", tags=["Profile"])
+    app.include_router(food.router, prefix="/api/food", tags=["Food"])
+    app.include_router(water.router, prefix="/api/water", tags=["Water"])
+    app.include_router(weight.router, prefix="/api/weight", tags=["Weight"])
+    app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
+    app.include_router(sync.router, prefix="/api/sync", tags=["Sync"])
+    app.include_router(bootstrap.router, prefix="/api/bootstrap", tags=["Bootstrap"])
+    app.include_router(export.router, prefix="/api/export", tags=["Export"])
+    app.include_router(events.router, prefix="/api/events", tags=["Events"])
+
+    @app.get("/")
+    def health_check():
+        """Liveness: the process is up and serving"""
+        return {"status": "ok", "app": "Akilo Backend"}
+
+    @app.get("/ready")
+    def readiness_check():
+        """Readiness: upstream connections are open and the food index is loaded"""
+        if not app.state.ready:
+            return JSONResponse({"status": "starting"}, status_code=503)
+        return {"status": "ready"}
+
+    @app.get("/metrics")
+    def get_metrics():
+        """Prometheus text exposition for this worker"""
+        return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    return app
+
+def __getattr__(name: str):
+    # `uvicorn main:app` keeps working; the app is only built when asked for
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,56 @@
+"""Bulk-import a food catalog (CSV or NDJSON, optionally .gz) into foods_master.
+
+Run from backend/:
+    python -m scripts.import_foods foods.csv
+    python -m scripts.import_foods foods.ndjson.gz --batch-size 10000
+
+Columns: name, unit_type (g|ml|serving), base_qty, calories, protein_g,
+carbs_g, fats_g. Rows are deduped by normalized name (first one wins) and
+upserted, so re-importing a newer dataset updates existing foods. An
+interrupted import resumes where it stopped; pass --restart to start over.
+Rejected rows go to <file>.rejects.ndjson. Requires SUPABASE_SERVICE_KEY.
+"""
+import argparse
+import json
+
+from app.core.config import settings
+from app.db.supabase import create_service_client
+from app.services.food_import import import_foods, backfill_name_keys
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("file")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per upsert")
+    parser.add_argument("--restart", action="store_true", help="Ignore any saved progress")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and dedupe only")
+    parser.add_argument("--timeout", type=float, default=120, help="Request timeout in seconds")
+    args = parser.parse_args()
+
+    # Large upserts take longer than API requests
+    settings.SUPABASE_TIMEOUT = args.timeout
+    client = create_service_client()
+
+    if not args.dry_run:
+        keyed = backfill_name_keys(client)
+        if keyed:
+            print(f"Keyed {keyed} existing foods for dedupe")
+
+    def progress(stats):
+        print(f"  {stats.read + stats.skipped} rows, {stats.rejected} rejected, {stats.duplicates} duplicates", flush=True)
+
+    report = import_foods(
+        client,
+        args.file,
+        batch_size=args.batch_size,
+        resume=not args.restart,
+        rejects_path=args.file + ".rejects.ndjson",
+        dry_run=args.dry_run,
+        progress=progress,
+    )
+    print(json.dumps(report, indent=2))
+    if report["rejected"]:
+        print(f"Rejected rows written to {args.file}.rejects.ndjson")
+    # The search index picks up new foods on its next refresh (FOOD_INDEX_REFRESH_SECONDS)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""Drop delta-sync tombstones older than the retention window.
+
+Run from backend/ (e.g. daily from cron):
+    python -m scripts.purge_sync_tombstones
+
+Clients whose cursor predates the window get a full resync, so the
+retention matches SYNC_TOMBSTONE_RETENTION_DAYS. Requires SUPABASE_SERVICE_KEY.
+"""
+import argparse
+
+from app.core.config import settings
+from app.db.supabase import create_service_client
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=settings.SYNC_TOMBSTONE_RETENTION_DAYS, help="Retention in days")
+    args = parser.parse_args()
+
+    client = create_service_client()
+    res = client.rpc("purge_sync_tombstones", {"p_retention": f"{args.days} days"}).execute()
+    print(f"Purged {res.data} tombstones older than {args.days} days")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Backfill or repair a derived table from the raw logs.
+
+Run from backend/:
+    python -m scripts.rebuild daily_summaries              # every user
+    python -m scripts.rebuild food_usage --user-id ID      # one user
+
+Requires SUPABASE_SERVICE_KEY.
+"""
+import argparse
+import time
+
+from app.core.config import settings
+from app.db.supabase import create_service_client
+
+# Target -> (rebuild RPC, what its result counts)
+TARGETS = {
+    "daily_summaries": ("rebuild_daily_summaries", "daily summaries"),
+    "food_usage": ("rebuild_food_usage", "food usage rows"),
+    "streaks": ("rebuild_streaks", "users' streaks"),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("target", choices=sorted(TARGETS))
+    parser.add_argument("--user-id", help="Only rebuild this user's rows")
+    parser.add_argument("--timeout", type=float, default=600, help="Request timeout in seconds")
+    args = parser.parse_args()
+
+    # A full rebuild runs as one statement; allow far more than the API default
+    settings.SUPABASE_TIMEOUT = args.timeout
+
+    rpc, counted = TARGETS[args.target]
+    client = create_service_client()
+    start = time.perf_counter()
+    res = client.rpc(rpc, {"p_user_id": args.user_id}).execute()
+    print(f"Rebuilt {res.data} {counted} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@
 import { Tabs } from 'expo-router';
 import { Home, Utensils, TrendingUp, User, ClipboardList } from 'lucide-react-native';
 import { Platform, View, Text, StyleSheet } from 'react-native';
+import { useEffect } from 'react';
+import { liveEvents } from '../../core/liveEvents';
 
 // Modern floating tab bar with glow effect
 const TabIcon = ({ icon: Icon, label, color, focused }: { 
@@ -25,6 +27,9 @@ const TabIcon = ({ icon: Icon, label, color, focused }: {
 );
 
 export default function TabLayout() {
+  // Signed in: listen for changes made on this and the user's other devices
+  useEffect(() => liveEvents.start(), []);
+
   return (
     <Tabs
       screenOptions={{
@@ -7,6 +7,7 @@ import { BarChart, LineChart } from 'react-native-gifted-charts';
 import { Flame, Droplets, TrendingUp, TrendingDown, Scale, Activity } from 'lucide-react-native';
 import { AnalyticsSkeleton } from '../../components/SkeletonLoader';
 import { dataEvents } from '../../core/dataEvents';
+import { liveEvents } from '../../core/liveEvents';
 
 const { width } = Dimensions.get('window');
 
@@ -31,7 +32,6 @@ export default function Analytics() {
         setData(dailyData);
         
         if (res.targets?.calories_target) setTarget(res.targets.calories_target);
-        else if (dailyData.length > 0 && dailyData[0].targets?.calories_target) setTarget(dailyData[0].targets.calories_target);
         
         if (res.targets?.water_target_ml) setWaterTarget(res.targets.water_target_ml);
         if (res.streak) setStreak(res.streak);
@@ -52,13 +52,21 @@ export default function Analytics() {
 
   // Auto-refresh on data changes
   useEffect(() => {
-    const unsub1 = dataEvents.on('food_logged', fetchAnalytics);
-    const unsub2 = dataEvents.on('food_deleted', fetchAnalytics);
-    const unsub3 = dataEvents.on('water_logged', fetchAnalytics);
+    // While the event stream is up, day totals arrive as `summary_updated`
+    const refreshTotals = () => { if (!liveEvents.isLive()) fetchAnalytics(); };
+    const applySummary = (update: any) => {
+      setData(prev => prev.map(d => d.date === update.date ? { ...d, summary: update.summary } : d));
+      if (update.streak) setStreak(update.streak);
+    };
+    const unsub1 = dataEvents.on('food_logged', refreshTotals);
+    const unsub2 = dataEvents.on('food_deleted', refreshTotals);
+    const unsub3 = dataEvents.on('water_logged', refreshTotals);
     const unsub4 = dataEvents.on('weight_logged', fetchAnalytics);
-    const unsub5 = dataEvents.on('food_edited', fetchAnalytics);
+    const unsub5 = dataEvents.on('food_edited', refreshTotals);
     const unsub6 = dataEvents.on('targets_updated', fetchAnalytics);
-    return () => { unsub1(); unsub2(); unsub3(); unsub4(); unsub5(); unsub6(); };
+    const unsub7 = dataEvents.on('summary_updated', applySummary);
+    const unsub8 = dataEvents.on('live_resync', fetchAnalytics);
+    return () => { unsub1(); unsub2(); unsub3(); unsub4(); unsub5(); unsub6(); unsub7(); unsub8(); };
   }, [period]);
 
   // Chart data with tap-to-show values
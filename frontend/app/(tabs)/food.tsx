@@ -27,7 +27,7 @@ interface Food {
 
 export default function FoodSearch() {
   const [query, setQuery] = useState('');
-  const [results, setResults] = useState<{master: Food[], custom: Food[]}>({ master: [], custom: [] });
+  const [results, setResults] = useState<Food[]>([]);
   const [loading, setLoading] = useState(false);
   const [selectedFood, setSelectedFood] = useState<Food | null>(null);
   const [qty, setQty] = useState(100);
@@ -40,6 +40,8 @@ export default function FoodSearch() {
   const [recentFoods, setRecentFoods] = useState<Food[]>([]);
   const [favoriteFoods, setFavoriteFoods] = useState<Food[]>([]);
   const [customFoods, setCustomFoods] = useState<Food[]>([]);
+  const [customCursor, setCustomCursor] = useState<string | null>(null);
+  const [loadingMoreCustom, setLoadingMoreCustom] = useState(false);
   const [favoriteIds, setFavoriteIds] = useState<Set<string>>(new Set());
   
   // Custom food form
@@ -62,15 +64,15 @@ export default function FoodSearch() {
       if (localResults.length > 0) {
         const master = localResults.filter(f => f.source === 'master');
         const custom = localResults.filter(f => f.source === 'custom').map(f => ({ ...f, is_custom: true }));
-        setResults({ master, custom });
+        setResults([...custom, ...master]);
         setLoading(false);
         return;
       }
 
       // Fallback to API
+      // One ranking across master and custom foods
       const res = await api.get('/api/food/search', { q: query });
-      const customWithFlag = (res.custom || []).map((f: Food) => ({ ...f, is_custom: true }));
-      setResults({ master: res.master || [], custom: customWithFlag });
+      setResults(res.results || []);
     } catch (e) {
       console.error("Search error:", e);
       showToast('Failed to search food', 'error');
@@ -178,14 +180,13 @@ export default function FoodSearch() {
     }
   };
 
-  // Load custom foods
+  // Load custom foods, one page at a time
   const loadCustom = async () => {
     setLoading(true);
     try {
-      const custom = await api.get('/api/food/search', { q: '' });
-      // Mark custom foods with is_custom flag
-      const customWithFlag = (custom.custom || []).map((f: Food) => ({ ...f, is_custom: true }));
-      setCustomFoods(customWithFlag);
+      const page = await api.get('/api/food/custom');
+      setCustomFoods(page.foods || []);
+      setCustomCursor(page.next_cursor || null);
     } catch (e) {
       console.error('Load custom error:', e);
     } finally {
@@ -193,6 +194,20 @@ export default function FoodSearch() {
     }
   };
 
+  const loadMoreCustom = async () => {
+    if (!customCursor || loadingMoreCustom) return;
+    setLoadingMoreCustom(true);
+    try {
+      const page = await api.get('/api/food/custom', { cursor: customCursor });
+      setCustomFoods(prev => [...prev, ...(page.foods || [])]);
+      setCustomCursor(page.next_cursor || null);
+    } catch (e) {
+      console.error('Load more custom error:', e);
+    } finally {
+      setLoadingMoreCustom(false);
+    }
+  };
+
   // Toggle favorite
   const toggleFavorite = async (food: Food) => {
     const isFavorite = favoriteIds.has(food.id);
@@ -344,13 +359,15 @@ export default function FoodSearch() {
         </View>
       ) : (
         <FlatList
-          data={query ? [...results.custom, ...results.master] : 
+          data={query ? results : 
                 activeTab === 'recent' ? recentFoods :
                 activeTab === 'favorites' ? favoriteFoods :
                 activeTab === 'custom' ? customFoods : []}
           keyExtractor={(item) => item.id}
           renderItem={renderFoodItem}
           contentContainerStyle={styles.listContent}
+          onEndReached={!query && activeTab === 'custom' ? loadMoreCustom : undefined}
+          onEndReachedThreshold={0.5}
           ListEmptyComponent={
             <View style={styles.emptyContainer}>
               <Text style={styles.emptyEmoji}>
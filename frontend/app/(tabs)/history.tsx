@@ -1,7 +1,7 @@
 
 import { View, Text, ScrollView, TouchableOpacity, StyleSheet, RefreshControl, Alert, ActivityIndicator, Modal, TextInput } from 'react-native';
 import { SafeAreaView } from 'react-native-safe-area-context';
-import { useEffect, useState, useCallback } from 'react';
+import { useEffect, useState, useCallback, useRef } from 'react';
 import { useRouter } from 'expo-router';
 import Slider from '@react-native-community/slider';
 import { api } from '../../core/api';
@@ -89,14 +89,24 @@ export default function History() {
   const [editMeal, setEditMeal] = useState<MealType>('breakfast');
   const [updating, setUpdating] = useState(false);
 
+  // Logs for the whole date strip, loaded in one paginated range request
+  const weekLogs = useRef<Record<string, FoodLog[]> | null>(null);
+
   const fetchLogs = async () => {
     try {
-      const res = await api.get('/api/food/log', { date: selectedDate });
-      if (res && Array.isArray(res)) {
-        setLogs(res);
-      } else {
-        setLogs([]);
-      }
+      const byDate: Record<string, FoodLog[]> = {};
+      let cursor: string | null = null;
+      do {
+        const params: any = { start: dates[0].date, end: dates[dates.length - 1].date, limit: 200 };
+        if (cursor) params.cursor = cursor;
+        const res = await api.get('/api/food/log/range', params);
+        for (const day of res?.days || []) {
+          byDate[day.date] = [...(byDate[day.date] || []), ...day.logs];
+        }
+        cursor = res?.next_cursor || null;
+      } while (cursor);
+      weekLogs.current = byDate;
+      setLogs(byDate[selectedDate] || []);
     } catch (e) {
       console.error('Error fetching food logs:', e);
       setLogs([]);
@@ -107,6 +117,11 @@ export default function History() {
   };
 
   useEffect(() => {
+    // Switching days within the strip needs no request
+    if (weekLogs.current) {
+      setLogs(weekLogs.current[selectedDate] || []);
+      return;
+    }
     setLoading(true);
     fetchLogs();
   }, [selectedDate]);
@@ -228,10 +243,10 @@ export default function History() {
 
       // Fallback to API
       const res = await api.get('/api/food/search', { q: query });
-      const mapFood = (food: any, source: 'master' | 'custom'): FoodItem => ({
+      const mapFood = (food: any): FoodItem => ({
         id: food.id,
         name: food.name,
-        source,
+        source: food.is_custom ? 'custom' : 'master',
         calories_per_base: food.calories || 0,
         protein_per_base: food.protein_g || 0,
         carbs_per_base: food.carbs_g || 0,
@@ -240,9 +255,8 @@ export default function History() {
         base_qty: food.base_qty || 100,
       });
       
-      const masterFoods = (res.master || []).map((f: any) => mapFood(f, 'master'));
-      const customFoods = (res.custom || []).map((f: any) => mapFood(f, 'custom'));
-      setSearchResults([...masterFoods, ...customFoods]);
+      // One ranking across master and custom foods
+      setSearchResults((res.results || []).map(mapFood));
     } catch (e) {
       console.error('Search error:', e);
     } finally {
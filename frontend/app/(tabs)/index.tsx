@@ -11,6 +11,7 @@ import { useToast } from '../../components/Toast';
 import { DashboardSkeleton } from '../../components/SkeletonLoader';
 import { BarChart } from 'react-native-gifted-charts';
 import { dataEvents } from '../../core/dataEvents';
+import { liveEvents } from '../../core/liveEvents';
 import { ensureFoodDB } from '../../core/foodDB';
 
 const { width } = Dimensions.get('window');
@@ -121,6 +122,13 @@ export default function Dashboard() {
   const router = useRouter();
   const { showToast } = useToast();
 
+  const applyStreak = (value: any) => {
+    // The stored streak has lapsed once a full day passes without a log
+    const yesterday = new Date(Date.now() - 86400000).toISOString().split('T')[0];
+    const { current_streak, last_completed_date } = value;
+    setStreak(last_completed_date && last_completed_date >= yesterday ? current_streak || 0 : 0);
+  };
+
   const fetchDashboard = async () => {
     try {
       const { data: { session } } = await supabase.auth.getSession();
@@ -130,33 +138,18 @@ export default function Dashboard() {
       }
       
       const today = new Date().toISOString().split('T')[0];
-      const res = await api.get('/api/analytics/daily', { date: today });
-      setData(res);
-      
-      try {
-        const streakRes = await supabase.from('streaks').select('current_streak').single();
-        if (streakRes.data) setStreak(streakRes.data.current_streak || 0);
-      } catch (e) {}
-      
-      // Fetch latest weight
-      try {
-        const weightRes = await supabase
-          .from('weight_logs')
-          .select('weight_kg, date')
-          .order('date', { ascending: false })
-          .limit(7);
-        
-        if (weightRes.data && weightRes.data.length > 0) {
-          console.log('Weight data fetched:', weightRes.data);
-          setLatestWeight(weightRes.data[0].weight_kg);
-          const history = weightRes.data.reverse().map(w => w.weight_kg);
-          console.log('Weight history set:', history);
-          setWeightHistory(history);
-        } else {
-          console.log('No weight data found');
-        }
-      } catch (e) {
-        console.error('Weight fetch error:', e);
+      // One round trip for everything on the dashboard
+      const res = await api.get('/api/bootstrap/', {
+        date: today,
+        sections: 'summary,targets,streak,weights',
+      });
+      setData({ summary: res.summary, targets: res.targets });
+
+      if (res.streak) applyStreak(res.streak);
+
+      if (res.weights && res.weights.length > 0) {
+        setLatestWeight(res.weights[0].weight_kg);
+        setWeightHistory([...res.weights].reverse().map((w: any) => w.weight_kg));
       }
     } catch (e) {
       console.error("Dashboard fetch error:", e);
@@ -169,14 +162,25 @@ export default function Dashboard() {
   useEffect(() => { fetchDashboard(); ensureFoodDB(); }, []);
 
   // Auto-refresh on data changes from other pages
+  // While the event stream is up, food and water totals arrive as `summary_updated`
+  const refreshTotals = () => { if (!liveEvents.isLive()) fetchDashboard(); };
+
+  const applySummary = (update: any) => {
+    if (update.date !== new Date().toISOString().split('T')[0]) return;
+    setData((prev: any) => prev ? { ...prev, summary: update.summary } : prev);
+    applyStreak(update.streak);
+  };
+
   useEffect(() => {
-    const unsub1 = dataEvents.on('food_logged', fetchDashboard);
-    const unsub2 = dataEvents.on('food_deleted', fetchDashboard);
-    const unsub3 = dataEvents.on('food_edited', fetchDashboard);
-    const unsub4 = dataEvents.on('water_logged', fetchDashboard);
+    const unsub1 = dataEvents.on('food_logged', refreshTotals);
+    const unsub2 = dataEvents.on('food_deleted', refreshTotals);
+    const unsub3 = dataEvents.on('food_edited', refreshTotals);
+    const unsub4 = dataEvents.on('water_logged', refreshTotals);
     const unsub5 = dataEvents.on('weight_logged', fetchDashboard);
     const unsub6 = dataEvents.on('targets_updated', fetchDashboard);
-    return () => { unsub1(); unsub2(); unsub3(); unsub4(); unsub5(); unsub6(); };
+    const unsub7 = dataEvents.on('summary_updated', applySummary);
+    const unsub8 = dataEvents.on('live_resync', fetchDashboard);
+    return () => { unsub1(); unsub2(); unsub3(); unsub4(); unsub5(); unsub6(); unsub7(); unsub8(); };
   }, []);
 
   const onRefresh = useCallback(() => {
@@ -190,7 +194,6 @@ export default function Dashboard() {
       showToast(`Added ${amount}ml of water!`, 'success');
       setWaterModalVisible(false);
       setCustomWater('');
-      fetchDashboard();
     } catch (e) {
       showToast('Failed to log water', 'error');
     }
@@ -4,7 +4,10 @@ import { cacheGet, cacheSet, cacheInvalidate, buildCacheKey, enqueue } from './c
 import NetInfo from '@react-native-community/netinfo';
 import { dataEvents } from './dataEvents';
 
-const BACKEND_URL = process.env.EXPO_PUBLIC_API_URL || "http://localhost:8000";
+export const BACKEND_URL = process.env.EXPO_PUBLIC_API_URL || "http://localhost:8000";
+
+// Identifies this app instance on writes, so it can skip its own echoes on the event stream
+export const CLIENT_ID = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
 
 // Check connectivity quickly
 const checkOnline = async (): Promise<boolean> => {
@@ -18,13 +21,13 @@ const checkOnline = async (): Promise<boolean> => {
 
 // Map endpoints to their cache group for invalidation
 const INVALIDATION_MAP: Record<string, string[]> = {
-  '/api/food/log': ['/api/food/log', '/api/analytics/daily', '/api/analytics/weekly', '/api/food/recent'],
-  '/api/water/': ['/api/water/', '/api/analytics/daily', '/api/analytics/weekly'],
-  '/api/weight/': ['/api/weight/', '/api/analytics/daily', '/api/analytics/weekly'],
-  '/api/food/favorites': ['/api/food/favorites'],
+  '/api/food/log': ['/api/food/log', '/api/analytics/daily', '/api/analytics/weekly', '/api/food/recent', '/api/bootstrap/'],
+  '/api/water/': ['/api/water/', '/api/analytics/daily', '/api/analytics/weekly', '/api/bootstrap/'],
+  '/api/weight/': ['/api/weight/', '/api/analytics/daily', '/api/analytics/weekly', '/api/bootstrap/'],
+  '/api/food/favorites': ['/api/food/favorites', '/api/bootstrap/'],
   '/api/food/custom': ['/api/food/custom', '/api/food/search'],
-  '/api/profile/': ['/api/profile/', '/api/analytics/daily'],
-  '/api/profile/targets': ['/api/profile/targets', '/api/analytics/daily', '/api/analytics/weekly'],
+  '/api/profile/': ['/api/profile/', '/api/analytics/daily', '/api/bootstrap/'],
+  '/api/profile/targets': ['/api/profile/targets', '/api/analytics/daily', '/api/analytics/weekly', '/api/bootstrap/'],
 };
 
 // Map endpoints to events for auto-refresh
@@ -82,18 +85,28 @@ export const api = {
     }
 
     try {
-      const res = await fetch(url.toString(), {
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json',
-        },
-      });
+      const headers: Record<string, string> = {
+        'Authorization': `Bearer ${token}`,
+        'Content-Type': 'application/json',
+      };
+      // Revalidate what we already have; an unchanged response comes back as an empty 304
+      const cached = await cacheGet(cacheKey);
+      const etag = cached !== null ? await cacheGet(`${cacheKey}:etag`) : null;
+      if (etag) headers['If-None-Match'] = etag;
+
+      const res = await fetch(url.toString(), { headers });
 
+      if (res.status === 304 && cached !== null) {
+        await cacheSet(cacheKey, cached);
+        return cached;
+      }
       if (!res.ok) throw new Error(await res.text());
       const data = await res.json();
 
       // Cache the fresh response
       await cacheSet(cacheKey, data);
+      const newEtag = res.headers.get('ETag');
+      if (newEtag) await cacheSet(`${cacheKey}:etag`, newEtag);
       return data;
     } catch (e) {
       // Network failed — try cache
@@ -117,6 +130,7 @@ export const api = {
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
+          'X-Client-ID': CLIENT_ID,
         },
         body: JSON.stringify(body),
       });
@@ -152,6 +166,7 @@ export const api = {
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
+          'X-Client-ID': CLIENT_ID,
         },
         body: JSON.stringify(body),
       });
@@ -186,6 +201,7 @@ export const api = {
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
+          'X-Client-ID': CLIENT_ID,
         },
       });
 
@@ -100,6 +100,16 @@ export const dequeue = async (): Promise<QueuedMutation | null> => {
   }
 };
 
+export const removeFromQueue = async (ids: string[]) => {
+  try {
+    const done = new Set(ids);
+    const queue = await getQueue();
+    await AsyncStorage.setItem(QUEUE_KEY, JSON.stringify(queue.filter(m => !done.has(m.id))));
+  } catch (e) {
+    console.warn('Queue remove error:', e);
+  }
+};
+
 export const clearQueue = async () => {
   await AsyncStorage.removeItem(QUEUE_KEY);
 };
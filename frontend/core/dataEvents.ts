@@ -8,9 +8,12 @@ type EventName =
   | 'water_logged'
   | 'weight_logged'
   | 'profile_updated'
-  | 'targets_updated';
+  | 'targets_updated'
+  // From the server event stream (core/liveEvents.ts)
+  | 'summary_updated'
+  | 'live_resync';
 
-type Listener = () => void;
+type Listener = (payload?: any) => void;
 
 const listeners: Map<EventName, Set<Listener>> = new Map();
 
@@ -22,9 +25,9 @@ export const dataEvents = {
     return () => { listeners.get(event)?.delete(callback); };
   },
 
-  emit(event: EventName) {
+  emit(event: EventName, payload?: any) {
     listeners.get(event)?.forEach(cb => {
-      try { cb(); } catch (e) { console.warn(`Event handler error [${event}]:`, e); }
+      try { cb(payload); } catch (e) { console.warn(`Event handler error [${event}]:`, e); }
     });
   },
 };
@@ -23,6 +23,14 @@ interface CachedFood {
 export const refreshFoodDB = async (): Promise<boolean> => {
   try {
     const res = await api.get('/api/food/search', { q: '' });
+    // The whole custom library, page by page
+    const custom: any[] = [];
+    let cursor: string | null = null;
+    do {
+      const page = await api.get('/api/food/custom', cursor ? { cursor, limit: 200 } : { limit: 200 });
+      custom.push(...(page.foods || []));
+      cursor = page.next_cursor || null;
+    } while (cursor);
     const masterFoods: CachedFood[] = (res.master || []).map((f: any) => ({
       id: f.id,
       name: f.name,
@@ -34,7 +42,7 @@ export const refreshFoodDB = async (): Promise<boolean> => {
       unit_type: f.unit_type || 'g',
       source: 'master' as const,
     }));
-    const customFoods: CachedFood[] = (res.custom || []).map((f: any) => ({
+    const customFoods: CachedFood[] = custom.map((f: any) => ({
       id: f.id,
       name: f.name,
       calories: f.calories || 0,
@@ -0,0 +1,129 @@
+// Server-sent change events (GET /api/events): totals and rows written on any device
+import { AppState } from 'react-native';
+import { supabase } from './supabase';
+import { cacheGet, cacheSet, cacheInvalidate, buildCacheKey } from './cache';
+import { dataEvents } from './dataEvents';
+import { BACKEND_URL, CLIENT_ID } from './api';
+
+const MAX_BACKOFF = 30 * 1000;
+
+// Row events from other devices: which cached reads they make stale, and what to tell the screens
+const ROW_EVENTS: Record<string, { keys: string[]; event: any }> = {
+  food_log: { keys: ['/api/food/log', '/api/food/recent', '/api/bootstrap/'], event: 'food_logged' },
+  water_log: { keys: ['/api/water/', '/api/bootstrap/'], event: 'water_logged' },
+  weight_log: { keys: ['/api/weight/', '/api/analytics/weekly', '/api/bootstrap/'], event: 'weight_logged' },
+};
+
+let xhr: XMLHttpRequest | null = null;
+let live = false;
+let connectedBefore = false;
+let backoff = 1000;
+let retryTimer: ReturnType<typeof setTimeout> | null = null;
+let running = false;
+
+// Keep the cached daily summary current so the next read (even offline) shows it
+const applySummary = async (data: any) => {
+  const key = buildCacheKey('/api/analytics/daily', { date: data.date });
+  const cached = await cacheGet(key);
+  if (cached) {
+    await cacheSet(key, { ...cached, summary: data.summary });
+    await cacheInvalidate(`${key}:etag`);
+  }
+  await cacheInvalidate('/api/analytics/weekly');
+  dataEvents.emit('summary_updated', data);
+};
+
+const handle = async (event: string, data: any) => {
+  if (event === 'ready') {
+    live = true;
+    backoff = 1000;
+    // Events sent while we were away are not replayed
+    if (connectedBefore) dataEvents.emit('live_resync');
+    connectedBefore = true;
+  } else if (event === 'summary') {
+    await applySummary(data);
+  } else if (ROW_EVENTS[event] && data.origin !== CLIENT_ID) {
+    const { keys, event: name } = ROW_EVENTS[event];
+    for (const k of keys) await cacheInvalidate(k);
+    dataEvents.emit(event === 'food_log' && data.action === 'deleted' ? 'food_deleted' : name, data);
+  }
+};
+
+// Splits the growing response text into complete `event:`/`data:` frames
+const parseFrames = (text: string, onFrame: (event: string, data: any) => void): number => {
+  let consumed = 0;
+  let end: number;
+  while ((end = text.indexOf('\n\n', consumed)) !== -1) {
+    let event = 'message';
+    let data = '';
+    for (const line of text.slice(consumed, end).split('\n')) {
+      if (line.startsWith('event: ')) event = line.slice(7);
+      else if (line.startsWith('data: ')) data += line.slice(6);
+    }
+    consumed = end + 2;
+    if (data) {
+      try { onFrame(event, JSON.parse(data)); } catch (e) { console.warn('Bad event frame:', e); }
+    }
+  }
+  return consumed;
+};
+
+const scheduleReconnect = () => {
+  live = false;
+  xhr = null;
+  if (!running || retryTimer) return;
+  retryTimer = setTimeout(() => { retryTimer = null; connect(); }, backoff);
+  backoff = Math.min(backoff * 2, MAX_BACKOFF);
+};
+
+const connect = async () => {
+  if (!running || xhr) return;
+  const { data: { session } } = await supabase.auth.getSession();
+  if (!session) return;
+
+  // fetch() can't read a body incrementally in React Native; XHR progress events can
+  const request = new XMLHttpRequest();
+  let offset = 0;
+  request.open('GET', `${BACKEND_URL}/api/events`);
+  request.setRequestHeader('Authorization', `Bearer ${session.access_token}`);
+  request.setRequestHeader('Accept', 'text/event-stream');
+  request.onprogress = () => {
+    offset += parseFrames(request.responseText.slice(offset), (event, data) => { handle(event, data); });
+  };
+  request.onload = scheduleReconnect;
+  request.onerror = scheduleReconnect;
+  request.send();
+  xhr = request;
+};
+
+export const liveEvents = {
+  // True while the stream is up: totals arrive as events, no refetch needed after a write
+  isLive: () => live,
+
+  start() {
+    running = true;
+    connect();
+    // Drop the connection while backgrounded; catch up on return
+    const sub = AppState.addEventListener('change', state => {
+      if (state === 'active') connect();
+      else liveEvents.pause();
+    });
+    return () => { sub.remove(); liveEvents.stop(); };
+  },
+
+  pause() {
+    if (retryTimer) { clearTimeout(retryTimer); retryTimer = null; }
+    const request = xhr;
+    xhr = null;
+    live = false;
+    if (request) {
+      request.onload = request.onerror = null;
+      request.abort();
+    }
+  },
+
+  stop() {
+    running = false;
+    liveEvents.pause();
+  },
+};
@@ -1,11 +1,17 @@
 
 import React, { createContext, useContext, useEffect, useState, useRef, useCallback } from 'react';
 import NetInfo, { NetInfoState } from '@react-native-community/netinfo';
-import { dequeue, queueSize, QueuedMutation } from './cache';
+import { getQueue, removeFromQueue, queueSize, QueuedMutation } from './cache';
 import { supabase } from './supabase';
+import { CLIENT_ID } from './api';
 
 const BACKEND_URL = process.env.EXPO_PUBLIC_API_URL || "http://localhost:8000";
 
+// Replay results that can never succeed on retry; anything else not ok stays queued
+const DROPPED_STATUSES = ['invalid', 'not_found', 'skipped'];
+// The same for mutations replayed one by one: the row is gone, or the body is invalid
+const DROPPED_HTTP_STATUSES = [404, 422];
+
 interface NetworkContextType {
   isOnline: boolean;
   pendingCount: number;
@@ -20,7 +26,7 @@ export const NetworkProvider = ({ children }: { children: React.ReactNode }) =>
   const [pendingCount, setPendingCount] = useState(0);
   const isSyncing = useRef(false);
 
-  // Flush the offline queue: replay mutations in order
+  // Flush the offline queue: replay every mutation in one request
   const flushQueue = useCallback(async () => {
     if (isSyncing.current) return;
     isSyncing.current = true;
@@ -30,29 +36,63 @@ export const NetworkProvider = ({ children }: { children: React.ReactNode }) =>
       const token = session?.access_token;
       if (!token) { isSyncing.current = false; return; }
 
-      let mutation: QueuedMutation | null;
-      let successCount = 0;
+      const queue = await getQueue();
+      if (queue.length === 0) return;
+
+      const headers = {
+        'Authorization': `Bearer ${token}`,
+        'Content-Type': 'application/json',
+        // Lets this device ignore the change events its own replay sends
+        'X-Client-ID': CLIENT_ID,
+      };
+      const res = await fetch(`${BACKEND_URL}/api/sync/replay`, {
+        method: 'POST',
+        headers,
+        body: JSON.stringify({ mutations: queue }),
+      });
+      if (!res.ok) {
+        // Keep the queue; the next reconnect retries it
+        console.warn('Sync replay failed with status', res.status);
+        return;
+      }
+      const { results } = await res.json();
 
-      while ((mutation = await dequeue()) !== null) {
-        try {
-          const opts: RequestInit = {
-            method: mutation.method,
-            headers: {
-              'Authorization': `Bearer ${token}`,
-              'Content-Type': 'application/json',
-            },
-          };
-          if (mutation.body && mutation.method !== 'DELETE') {
-            opts.body = JSON.stringify(mutation.body);
+      // Mutations the server can't batch are replayed one by one, in order
+      let successCount = 0;
+      const handled: string[] = [];
+      for (let i = 0; i < queue.length; i++) {
+        const mutation: QueuedMutation = queue[i];
+        const result = results[i];
+        if (result?.status === 'unsupported') {
+          try {
+            const opts: RequestInit = { method: mutation.method, headers };
+            if (mutation.body && mutation.method !== 'DELETE') {
+              opts.body = JSON.stringify(mutation.body);
+            }
+            const single = await fetch(`${BACKEND_URL}${mutation.endpoint}`, opts);
+            if (!single.ok && !DROPPED_HTTP_STATUSES.includes(single.status)) {
+              // Auth, server or network trouble: stays queued for the next flush
+              console.warn('Sync mutation failed with status', single.status, 'will retry later');
+              continue;
+            }
+            if (!single.ok) console.warn('Sync mutation rejected:', mutation.endpoint, single.status);
+          } catch (e) {
+            // Stays queued; everything the server already applied is removed below
+            console.warn('Sync mutation failed, will retry later:', e);
+            continue;
           }
-          await fetch(`${BACKEND_URL}${mutation.endpoint}`, opts);
-          successCount++;
-        } catch (e) {
-          console.warn('Sync mutation failed, will retry later:', e);
-          // Put it back? For now we just drop failed items to avoid infinite loops
-          break;
+        } else if (DROPPED_STATUSES.includes(result?.status)) {
+          // The server will never accept these; dropped rather than retried forever
+          console.warn('Sync mutation rejected:', mutation.endpoint, result?.status, result?.error);
+        } else if (result?.status !== 'ok' && result?.status !== 'superseded') {
+          // `error` (or no result) is usually a transient upstream failure: keep it queued
+          console.warn('Sync mutation failed, will retry later:', mutation.endpoint, result?.error);
+          continue;
         }
+        handled.push(mutation.id);
+        successCount++;
       }
+      await removeFromQueue(handled);
 
       if (successCount > 0) {
         console.log(`Synced ${successCount} offline mutation(s)`);